@@ -1,12 +1,18 @@
+import asyncio
 import json
+import logging
+import time
 
 from containers import Container
+from core.metrics import bind_timings, record, registry, server_timing, span, timed
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from models import QueryInput
+from models import BatchQueryInput, QueryInput
+from utils import get_encoder
 
 router = APIRouter()
+log = logging.getLogger(__name__)
 
 
 async def stream_response_with_saving(
@@ -33,22 +39,56 @@ async def stream_response_with_saving(
         await save_session(session_id, "상담원", message=full_response)
 
 
+def response_headers(encoder, timings: dict, server_timing_enabled: bool) -> dict:
+    """스트리밍 응답 헤더. 설정 시 스트림 시작 전까지의 단계별 소요 시간을 Server-Timing 헤더로 붙입니다."""
+    headers = dict(encoder.headers)
+    if server_timing_enabled and timings:
+        headers["Server-Timing"] = server_timing(timings)
+    return headers
+
+
+async def replay_answer(answer: dict):
+    """캐시된 답변을 생성 스트림과 같은 형태(partial dict)로 재생합니다."""
+    yield answer
+
+
 async def event_stream(
-    prompt: str, rewrited_query: str, generate_response: str, save_session, session_id: int, is_reject_message
+    prompt: str,
+    rewrited_query: str,
+    generate_response: str,
+    save_turn,
+    session_id: int,
+    is_reject_message,
+    on_complete=None,
+    timings: dict | None = None,
+    encoder=None,
 ):
     # Function Calling 기반 구조체 스트리밍(답변+유도질문)
-    full_response = ""
+    timings = timings if timings is not None else {}
+    encoder = encoder or get_encoder(2)
+    start = time.perf_counter()
+    final = {}
+    for event in encoder.start():
+        yield event
     async for partial in generate_response(prompt):
-        if "answer" in partial:
-            full_response = partial["answer"]
+        if not final:
+            record("first_token", time.perf_counter() - start, timings)
+        final.update(partial)
         # partial: {"answer": ...} 또는 {"follow_up": ...} (또는 둘 다)
-        yield f"data: {json.dumps(partial, ensure_ascii=False)}\n\n"
+        for event in encoder.partial(partial):
+            yield event
+    for event in encoder.finish(final):
+        yield event
+    record("stream", time.perf_counter() - start, timings)
 
     # history save reject filter
-    if not is_reject_message(text=full_response):
-        # save the message
-        await save_session(session_id, "user", message=rewrited_query)
-        await save_session(session_id, "assistant", message=full_response)
+    full_response = final.get("answer", "")
+    rejected = is_reject_message(text=full_response)
+    if not rejected:
+        # save the turn (user + assistant) in one round trip
+        await save_turn(session_id, user_message=rewrited_query, assistant_message=full_response)
+    if on_complete is not None:
+        await on_complete(final, rejected)
 
 
 @router.post("/ask/stream")
@@ -61,8 +101,12 @@ async def ask_q(
     OpenAIClient=Depends(Provide[Container.OpenAIClient]),
     rewriter=Depends(Provide[Container.rewriter]),
     prompt_builder=Depends(Provide[Container.prompt_builder]),
+    context_packer=Depends(Provide[Container.context_packer]),
     chroma_client=Depends(Provide[Container.chroma_client]),
     RejectFilter=Depends(Provide[Container.RejectFilter]),
+    answer_cache=Depends(Provide[Container.answer_cache]),
+    logger=Depends(Provide[Container.logger]),
+    config=Depends(Provide[Container.config]),
 ):
     """
     Handle the user's question, retrieve context, generate a response,
@@ -76,33 +120,146 @@ async def ask_q(
     """
     query = input.question
     session_id = input.session_id
+    encoder = get_encoder(input.protocol)
+    timings = {}
+    bind_timings(timings)  # 이 요청에서 만든 하위 태스크의 span(bm25/dense/rerank 등)도 같은 dict에 기록
+    started = time.perf_counter()
 
-    # rewrite the user's question
-    rewrited_query = await rewriter.rewrite_if_needed(query)
-    # Save the user's question in the session
-    # Retrieve context from the Chroma collection
-    history = await session_service.get_session_history(session_id)
-    collections = await chroma_client.get_chroma_collections(embedding_service.get_all_embeddings_async)
-    context = await retriever.retrieve_context(
-        query=query,
-        collections=collections,
-        get_all_embeddings_async=embedding_service.get_all_embeddings_async,
-    )
+    with span("collections"):
+        collections = await chroma_client.get_chroma_collections(embedding_service.get_all_embeddings_async)
+
+    def retrieve(text: str) -> asyncio.Task:
+        return asyncio.create_task(
+            retriever.retrieve_context(
+                query=text,
+                collections=collections,
+                get_all_embeddings_async=embedding_service.get_all_embeddings_async,
+            )
+        )
+
+    # 세션 히스토리는 프롬프트를 만들 때까지 기다리지 않고 나머지 단계와 동시에 조회
+    history_task = asyncio.create_task(timed("history", session_service.get_session_history(session_id)))
+    rewrite_task = retrieval_task = None
+    try:
+        # 질문 임베딩 (재기술 게이트·답변 캐시·검색에 재사용, 임베딩 캐시에 남음)
+        with span("query_embedding"):
+            q_embedding = (await embedding_service.get_all_embeddings_async([query]))[0]
+
+        # 의미적으로 거의 같은 질문의 답변이 캐시에 있으면 검색·생성 없이 그대로 재생
+        # (히스토리에 따라 답변이 달라질 수 있으므로 기본적으로 대화 첫 턴에만 사용, 히스토리는 적중했을 때만 기다림)
+        cached_answer = answer_cache.lookup(q_embedding) if config.ANSWER_CACHE_ENABLED else None
+        if cached_answer is not None and config.ANSWER_CACHE_FIRST_TURN_ONLY and await history_task:
+            cached_answer = None
+        if cached_answer is not None:
+            history_task.cancel()
+
+            async def log_cached(answer: dict, rejected: bool):
+                record("total", time.perf_counter() - started, timings)
+                registry.inc("rag_requests_total", outcome="answer_cache")
+                await asyncio.to_thread(
+                    logger.save_log,
+                    question=query,
+                    context="",
+                    response=answer.get("answer", ""),
+                    timings=timings,
+                    session_id=session_id,
+                    cache_hit=True,
+                )
+
+            return StreamingResponse(
+                event_stream(
+                    None,
+                    query,
+                    lambda _: replay_answer(cached_answer),
+                    session_service.save_turn,
+                    session_id,
+                    RejectFilter.is_reject_message,
+                    on_complete=log_cached,
+                    timings=timings,
+                    encoder=encoder,
+                ),
+                media_type=encoder.media_type,
+                headers=response_headers(encoder, timings, config.SERVER_TIMING_ENABLED),
+            )
+
+        # 서로 독립적인 단계는 동시에 실행: 질문 재기술(LLM), 원문 질문 기준의 추측(speculative) 검색, 히스토리 조회
+        rewrite_task = asyncio.create_task(timed("rewrite", rewriter.rewrite_if_needed(query, embedding=q_embedding)))
+        retrieval_task = retrieve(query)
+        rewrited_query = await rewrite_task
+        if rewrited_query != query:
+            # 재기술된 질문이 다르면 추측 검색 결과는 버리고 재기술된 질문으로 다시 검색
+            retrieval_task.cancel()
+            retrieval_task = retrieve(rewrited_query)
+        with span("retrieval_wait"):
+            candidates = await retrieval_task
+        history = await history_task
+    except BaseException:
+        for task in (history_task, rewrite_task, retrieval_task):
+            if task is not None:
+                task.cancel()
+        raise
+    use_answer_cache = config.ANSWER_CACHE_ENABLED and not (history and config.ANSWER_CACHE_FIRST_TURN_ONLY)
+
+    # Build the prompt for the response (참고 문서는 토큰 예산 안에서 리랭크 점수 순으로 채움)
+    packed = context_packer.pack(rewrited_query, candidates)
+    context = packed.text
+    final_prompt = prompt_builder.build_messages(context, history, rewrited_query)
+    log.debug("Final Prompt: %s", final_prompt)
+
+    usage = {}  # 스트림 종료 후 토큰 사용량(프롬프트 캐시 적중 토큰 포함)이 기록됨
+
+    async def on_complete(answer: dict, rejected: bool):
+        if use_answer_cache and not rejected:
+            answer_cache.store(query, q_embedding, answer)
+        record("total", time.perf_counter() - started, timings)
+        registry.inc("rag_requests_total", outcome="rejected" if rejected else "generated")
+        await asyncio.to_thread(
+            logger.save_log,
+            question=query,
+            context=context,
+            response=answer.get("answer", ""),
+            rewritten_query=rewrited_query,
+            doc_ids=packed.doc_ids,
+            timings=timings,
+            session_id=session_id,
+            context_tokens=packed.tokens,
+            usage=usage,
+        )
 
-    # Build the prompt for the response
-    history_prompt = prompt_builder.build_history_prompt(history)
-    system_prompt = prompt_builder.build_system_prompt(context)
-    user_prompt = prompt_builder.build_user_prompt(rewrited_query)
-    final_prompt = [system_prompt] + history_prompt + [user_prompt]
-    print(f"Final Prompt: {final_prompt}")
     return StreamingResponse(
         event_stream(
             final_prompt,
             rewrited_query,
-            OpenAIClient.stream_answer_and_followup,
-            session_service.save_session,
+            lambda messages: OpenAIClient.stream_answer_and_followup(messages, usage=usage),
+            session_service.save_turn,
             session_id,
             RejectFilter.is_reject_message,
+            on_complete=on_complete,
+            timings=timings,
+            encoder=encoder,
         ),
-        media_type="text/plain",
+        media_type=encoder.media_type,
+        headers=response_headers(encoder, timings, config.SERVER_TIMING_ENABLED),
     )
+
+
+@router.post("/ask/batch")
+@inject
+async def ask_batch(
+    input: BatchQueryInput,
+    batch_service=Depends(Provide[Container.batch_service]),
+    config=Depends(Provide[Container.config]),
+):
+    """
+    여러 질문을 한 번에 답변하고 결과를 JSON Lines(application/x-ndjson)로 스트리밍합니다. (대량 평가·백필용)
+    한 줄이 질문 하나의 결과이며 끝난 순서대로 전송됩니다. (입력 순서는 index로 확인)
+    세션·답변 캐시·질의 로그는 사용하지 않고, OpenAI 호출은 사용자 요청보다 낮은 우선순위로 처리됩니다.
+    """
+    if len(input.questions) > config.BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"questions must be at most {config.BATCH_MAX_QUESTIONS}")
+
+    async def lines():
+        async for result in batch_service.answer_batch(input.items(), concurrency=input.concurrency):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,22 @@
+from containers import Container
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+
+@router.get("/healthz")
+async def healthz():
+    """프로세스 생존 여부 (liveness)"""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+@inject
+async def readyz(
+    lifecycle=Depends(Provide[Container.lifecycle]),
+):
+    """모델·인덱스·컬렉션 로드와 워밍업이 끝났는지 여부 (readiness)"""
+    status = lifecycle.status()
+    return JSONResponse(status, status_code=200 if lifecycle.ready else 503)
@@ -1,13 +1,51 @@
+import asyncio
+import datetime
+import json
+
 from containers import Container
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
 router = APIRouter()
 
 
+def stream_json_array(rows):
+    """로그를 한 건씩 JSON 배열로 직렬화해 스트리밍합니다."""
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(row, ensure_ascii=False)
+    yield "]"
+
+
 @router.get("/logs")
 @inject
 async def get_logs_route(
+    cursor: int | None = Query(None, description="이전 응답의 X-Next-Cursor 값 (이 id보다 오래된 로그 조회)"),
+    limit: int = Query(100, ge=1, le=1000),
+    since: datetime.datetime | None = Query(None, description="조회 시작 시각 (포함)"),
+    until: datetime.datetime | None = Query(None, description="조회 종료 시각 (미포함)"),
+    logger=Depends(Provide[Container.logger]),
+):
+    """
+    질의응답 로그를 최신순으로 조회합니다.
+    다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 반환합니다.
+    """
+    headers = {}
+    id_range, next_cursor = await asyncio.to_thread(logger.page_range, cursor, limit, since, until)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    # 페이지를 id 범위로 고정해, 응답 도중 새 로그가 쓰여도 커서와 본문이 어긋나지 않게 함
+    rows = [] if id_range is None else logger.iter_logs(cursor, limit, since, until, id_range=id_range)
+    return StreamingResponse(stream_json_array(rows), media_type="application/json", headers=headers)
+
+
+@router.get("/logs/stats")
+@inject
+async def get_log_stats_route(
+    since: datetime.datetime | None = Query(None, description="집계 시작 시각 (포함)"),
+    until: datetime.datetime | None = Query(None, description="집계 종료 시각 (미포함)"),
     logger=Depends(Provide[Container.logger]),
 ):
-    return logger.get_logs()
+    """LLM 토큰 사용량과 프롬프트 캐시 적중률을 집계합니다."""
+    return await asyncio.to_thread(logger.usage_stats, since=since, until=until)
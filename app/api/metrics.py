@@ -0,0 +1,34 @@
+from containers import Container
+from core.metrics import registry
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+@inject
+async def metrics_route(
+    embedding_cache=Depends(Provide[Container.embedding_cache]),
+    answer_cache=Depends(Provide[Container.answer_cache]),
+    rewriter=Depends(Provide[Container.rewriter]),
+    OpenAIClient=Depends(Provide[Container.OpenAIClient]),
+    embedding_limiter=Depends(Provide[Container.embedding_limiter]),
+    chat_limiter=Depends(Provide[Container.chat_limiter]),
+    fallback_chat_limiter=Depends(Provide[Container.fallback_chat_limiter]),
+):
+    """
+    Prometheus 텍스트 형식의 메트릭입니다.
+    단계별 소요 시간 히스토그램(rag_stage_seconds)과 캐시·재기술·LLM 호출·리미터 통계 게이지를 반환합니다.
+    """
+    gauges = {
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "rewriter": rewriter.stats(),
+        "llm": OpenAIClient.stats(),
+        "embedding_limiter": embedding_limiter.stats(),
+        "chat_limiter": chat_limiter.stats(),
+        "fallback_chat_limiter": fallback_chat_limiter.stats(),
+    }
+    return PlainTextResponse(registry.render(gauges), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,70 @@
+import time
+
+from containers import Container
+from core.metrics import registry
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match에 현재 ETag(약한 비교)가 있으면 True"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def cached_response(request: Request, etag: str, max_age: int, build) -> Response:
+    """ETag·Cache-Control을 붙여 응답합니다. 클라이언트가 같은 ETag를 갖고 있으면 본문 없이 304를 반환합니다."""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build(), headers=headers)
+
+
+@router.get("/suggest")
+@inject
+async def suggest(
+    request: Request,
+    q: str = Query("", max_length=200),
+    limit: int | None = Query(None, ge=1, le=50),
+    suggest_index=Depends(Provide[Container.suggest_index]),
+    config=Depends(Provide[Container.config]),
+):
+    """
+    입력 중인 질문과 맞는 FAQ 제목을 순위대로 추천합니다. (type-ahead)
+    서버 시작 시 만든 메모리 인덱스만 사용하므로 네트워크 호출이 없고, 결과는 인덱스 버전이 같으면 변하지 않아
+    ETag/Cache-Control로 캐시할 수 있습니다. match가 exact인 제목은 /faq/{id}로 답변 생성 없이 바로 보여줄 수 있습니다.
+    """
+    limit = limit or config.SUGGEST_LIMIT
+    etag = f'"{suggest_index.cache_key(q, limit)}"'
+
+    def build() -> dict:
+        start = time.perf_counter()
+        suggestions = suggest_index.search(q, limit)
+        registry.observe("rag_suggest_seconds", time.perf_counter() - start)
+        return {"query": q, "suggestions": suggestions}
+
+    return cached_response(request, etag, config.SUGGEST_CACHE_MAX_AGE, build)
+
+
+@router.get("/faq/{doc_id}")
+@inject
+async def faq(
+    request: Request,
+    doc_id: str,
+    document_store=Depends(Provide[Container.document_store]),
+    config=Depends(Provide[Container.config]),
+):
+    """FAQ 문서 원문을 반환합니다. (/suggest에서 고른 제목을 답변 생성 없이 보여줄 때 사용)"""
+    row = document_store.row_of(doc_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="FAQ not found")
+    etag = f'"{document_store.version}-{doc_id}"'
+    return cached_response(
+        request, etag, config.SUGGEST_CACHE_MAX_AGE, lambda: {"id": doc_id, "document": document_store.documents[row]}
+    )
@@ -1,18 +1,33 @@
-from asyncio import Semaphore
-
 import chromadb
-import redis
+import redis.asyncio as redis
 import tiktoken
-from core import ChromaClient, Logger
+from core import (
+    AppLifecycle,
+    BM25Index,
+    ChromaClient,
+    DenseIndex,
+    DocumentStore,
+    EmbeddingCache,
+    InMemorySessionStore,
+    Logger,
+    RateLimiter,
+    RedisSessionStore,
+    SuggestIndex,
+)
 from core.config import Settings
 from dependency_injector import containers, providers
 from openai import AsyncOpenAI
 from services import (
+    BatchAnswerService,
     ChatSessionService,
+    ContextPacker,
     EmbeddingService,
     OpenAIClient,
+    RerankScheduler,
     RetrievalService,
     RewriterService,
+    SemanticAnswerCache,
+    load_reranker,
     prompt_builder,
 )
 from utils import RejectFilter
@@ -26,17 +41,67 @@ class Container(containers.DeclarativeContainer):
 
     config = providers.Singleton(Settings)
 
-    semaphore = providers.Singleton(Semaphore, config.provided.EMBEDDING_CONCURRENCY)
+    # OpenAI 호출 리미터 (한도가 모델별로 적용되므로 임베딩/채팅/폴백 모델 각각 하나씩 공유)
+    embedding_limiter = providers.Singleton(
+        RateLimiter,
+        name="embedding",
+        max_concurrency=config.provided.EMBEDDING_CONCURRENCY,
+        rpm=config.provided.EMBEDDING_RPM,
+        tpm=config.provided.EMBEDDING_TPM,
+    )
+
+    chat_limiter = providers.Singleton(
+        RateLimiter,
+        name="chat",
+        max_concurrency=config.provided.CHAT_MAX_CONCURRENCY,
+        rpm=config.provided.CHAT_RPM,
+        tpm=config.provided.CHAT_TPM,
+    )
+
+    fallback_chat_limiter = providers.Singleton(
+        RateLimiter,
+        name="chat-fallback",
+        max_concurrency=config.provided.LLM_FALLBACK_MAX_CONCURRENCY,
+        rpm=config.provided.LLM_FALLBACK_RPM,
+        tpm=config.provided.LLM_FALLBACK_TPM,
+    )
 
-    GPT_CLIENT = providers.Singleton(AsyncOpenAI, api_key=config.provided.OPENAI_API_KEY)
+    GPT_CLIENT = providers.Singleton(
+        AsyncOpenAI,
+        api_key=config.provided.OPENAI_API_KEY,
+        base_url=config.provided.OPENAI_BASE_URL,
+        max_retries=config.provided.OPENAI_MAX_RETRIES,
+    )
+
+    FALLBACK_GPT_CLIENT = providers.Singleton(
+        AsyncOpenAI,
+        api_key=config.provided.OPENAI_API_KEY,
+        base_url=providers.Callable(
+            lambda fallback, primary: fallback or primary,
+            config.provided.LLM_FALLBACK_BASE_URL,
+            config.provided.OPENAI_BASE_URL,
+        ),
+        max_retries=config.provided.OPENAI_MAX_RETRIES,
+    )
 
     ENCODING = providers.Singleton(tiktoken.encoding_for_model, model_name=config.provided.EMBEDDING_MODEL)
 
-    redis_client = providers.Singleton(
-        redis.Redis,
+    CHAT_ENCODING = providers.Singleton(tiktoken.encoding_for_model, model_name=config.provided.CHAT_MODEL)
+
+    redis_pool = providers.Singleton(
+        redis.ConnectionPool,
         host=config.provided.REDIS_HOST,
         port=config.provided.REDIS_PORT,
         db=config.provided.REDIS_DB,
+        max_connections=config.provided.REDIS_MAX_CONNECTIONS,
+    )
+
+    redis_client = providers.Singleton(redis.Redis, connection_pool=redis_pool)
+
+    session_store = providers.Selector(
+        config.provided.SESSION_BACKEND,
+        redis=providers.Singleton(RedisSessionStore, redis_client=redis_client),
+        memory=providers.Singleton(InMemorySessionStore),
     )
 
     chromadb_client = providers.Singleton(
@@ -44,7 +109,63 @@ class Container(containers.DeclarativeContainer):
         path=config.provided.CHROMA_DIR,
     )
 
-    retriever = providers.Factory(RetrievalService, reranking_model=config.provided.RERANKING_MODEL)
+    embedding_cache = providers.Singleton(
+        EmbeddingCache,
+        path=config.provided.EMBEDDING_CACHE_PATH,
+        max_memory_mb=config.provided.EMBEDDING_CACHE_MEMORY_MB,
+    )
+
+    document_store = providers.Singleton(DocumentStore, index_dir=config.provided.INDEX_DIR, encoding=CHAT_ENCODING)
+
+    bm25_index = providers.Singleton(BM25Index, index_dir=config.provided.INDEX_DIR)
+
+    dense_index = providers.Singleton(
+        DenseIndex,
+        index_dir=config.provided.INDEX_DIR,
+        dtype=config.provided.DENSE_INDEX_DTYPE,
+    )
+
+    suggest_index = providers.Singleton(SuggestIndex, min_overlap=config.provided.SUGGEST_MIN_OVERLAP)
+
+    reranker = providers.Singleton(
+        load_reranker,
+        model_name=config.provided.RERANKING_MODEL,
+        backend=config.provided.RERANKER_BACKEND,
+        onnx_dir=config.provided.RERANKER_ONNX_DIR,
+        num_threads=config.provided.RERANKER_ONNX_THREADS,
+    )
+
+    rerank_scheduler = providers.Singleton(
+        RerankScheduler,
+        reranker=reranker,
+        max_batch_size=config.provided.RERANK_MAX_BATCH_SIZE,
+        max_wait_ms=config.provided.RERANK_MAX_WAIT_MS,
+    )
+
+    answer_cache = providers.Singleton(
+        SemanticAnswerCache,
+        document_store=document_store,
+        threshold=config.provided.ANSWER_CACHE_THRESHOLD,
+        max_entries=config.provided.ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds=config.provided.ANSWER_CACHE_TTL_SECONDS,
+    )
+
+    retriever = providers.Singleton(
+        RetrievalService,
+        rerank_scheduler=rerank_scheduler,
+        bm25_index=bm25_index,
+        document_store=document_store,
+        dense_index=dense_index,
+        dense_backend=config.provided.DENSE_BACKEND,
+        fusion_method=config.provided.FUSION_METHOD,
+        fusion_rrf_k=config.provided.FUSION_RRF_K,
+        bm25_weight=config.provided.FUSION_BM25_WEIGHT,
+        dense_weight=config.provided.FUSION_DENSE_WEIGHT,
+        bm25_depth=config.provided.BM25_DEPTH,
+        dense_depth=config.provided.DENSE_DEPTH,
+        rerank_depth=config.provided.RERANK_DEPTH,
+        top_n=config.provided.CONTEXT_TOP_N,
+    )
 
     embedding_service = providers.Factory(
         EmbeddingService,
@@ -53,28 +174,98 @@ class Container(containers.DeclarativeContainer):
         chunk_size=config.provided.CHUNK_SIZE,
         embedding_model=config.provided.EMBEDDING_MODEL,
         max_tokens=config.provided.MAX_TOKENS,
-        semaphore=semaphore,
+        limiter=embedding_limiter,
+        cache=embedding_cache,
+        batch_size=config.provided.EMBEDDING_BATCH_SIZE,
+        batch_max_tokens=config.provided.EMBEDDING_BATCH_TOKENS,
     )
 
     chat_session_service = providers.Factory(
         ChatSessionService,
-        redis_client=redis_client,
+        session_store=session_store,
         session_key_prefix=config.provided.SESSION_KEY_PREFIX,
         max_session_length=config.provided.MAX_SESSION_LENGTH,
+        session_ttl=config.provided.SESSION_TTL_SECONDS,
+    )
+    rewriter = providers.Singleton(
+        RewriterService,
+        client=GPT_CLIENT,
+        model=config.provided.CHAT_MODEL,
+        dense_index=dense_index,
+        gate_threshold=config.provided.REWRITE_GATE_THRESHOLD,
+        cache_size=config.provided.REWRITE_CACHE_SIZE,
+        limiter=chat_limiter,
+        encoding=CHAT_ENCODING,
     )
-    rewriter = providers.Factory(RewriterService, client=GPT_CLIENT)
 
-    OpenAIClient = providers.Factory(OpenAIClient, client=GPT_CLIENT)
+    OpenAIClient = providers.Singleton(
+        OpenAIClient,
+        client=GPT_CLIENT,
+        model=config.provided.CHAT_MODEL,
+        fallback_client=FALLBACK_GPT_CLIENT,
+        fallback_model=config.provided.LLM_FALLBACK_MODEL,
+        hedge_enabled=config.provided.LLM_HEDGE_ENABLED,
+        hedge_percentile=config.provided.LLM_HEDGE_PERCENTILE,
+        hedge_min_delay=config.provided.LLM_HEDGE_MIN_DELAY,
+        hedge_max_delay=config.provided.LLM_HEDGE_MAX_DELAY,
+        hedge_initial_delay=config.provided.LLM_HEDGE_INITIAL_DELAY,
+        idle_timeout=config.provided.LLM_IDLE_TIMEOUT,
+        limiter=chat_limiter,
+        fallback_limiter=fallback_chat_limiter,
+        encoding=CHAT_ENCODING,
+        completion_token_estimate=config.provided.LLM_COMPLETION_TOKEN_ESTIMATE,
+    )
 
     prompt_builder = providers.Factory(prompt_builder)
 
-    logger = providers.Factory(Logger, log_path=config.provided.LOG_PATH)
+    context_packer = providers.Singleton(
+        ContextPacker,
+        encoding=CHAT_ENCODING,
+        document_store=document_store,
+        token_budget=config.provided.CONTEXT_TOKEN_BUDGET,
+        min_passage_tokens=config.provided.CONTEXT_MIN_PASSAGE_TOKENS,
+    )
+
+    logger = providers.Singleton(Logger, log_path=config.provided.LOG_PATH)
 
     chroma_client = providers.Singleton(
         ChromaClient,
         chroma_client=chromadb_client,
         title_collection_name=config.provided.TITLE_COLLECTION_NAME,
         full_collection_name=config.provided.FULL_COLLECTION_NAME,
+        document_store=document_store,
+        bm25_index=bm25_index,
+        doc_path=config.provided.DOC_PATH,
+        dense_index=dense_index,
+        suggest_index=suggest_index,
+    )
+
+    batch_service = providers.Singleton(
+        BatchAnswerService,
+        retriever=retriever,
+        embedding_service=embedding_service,
+        rewriter=rewriter,
+        generator=OpenAIClient,
+        context_packer=context_packer,
+        prompt_builder=prompt_builder,
+        chroma_client=chroma_client,
+        chunk_size=config.provided.BATCH_CHUNK_SIZE,
+        max_concurrency=config.provided.BATCH_MAX_CONCURRENCY,
     )
 
     RejectFilter = providers.Factory(RejectFilter)
+
+    lifecycle = providers.Singleton(
+        AppLifecycle,
+        encoding=ENCODING.provider,
+        chat_encoding=CHAT_ENCODING.provider,
+        reranker=reranker.provider,
+        rerank_scheduler=rerank_scheduler.provider,
+        document_store=document_store.provider,
+        bm25_index=bm25_index.provider,
+        dense_index=dense_index.provider,
+        chroma_client=chroma_client.provider,
+        embedding_service=embedding_service.provider,
+        embedding_cache=embedding_cache.provider,
+        session_store=session_store.provider,
+    )
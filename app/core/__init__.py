@@ -1,9 +1,37 @@
 from . import config
+from .bm25_index import BM25Index
 from .chroma_client import ChromaClient
+from .dense_index import DenseIndex
+from .document_store import DocumentStore
+from .embedding_cache import EmbeddingCache
+from .ingestion import CorpusIngestor, IngestPlan
+from .lifecycle import AppLifecycle
 from .logger import Logger
+from .metrics import bind_timings, record, registry, server_timing, span, timed
+from .rate_limiter import Priority, RateLimiter
+from .session_store import InMemorySessionStore, RedisSessionStore
+from .suggest_index import SuggestIndex
 
 __all__ = [
+    "AppLifecycle",
+    "BM25Index",
     "ChromaClient",
     "config",
+    "CorpusIngestor",
+    "DenseIndex",
+    "DocumentStore",
+    "EmbeddingCache",
+    "IngestPlan",
+    "InMemorySessionStore",
     "Logger",
+    "Priority",
+    "RateLimiter",
+    "registry",
+    "bind_timings",
+    "record",
+    "server_timing",
+    "span",
+    "timed",
+    "RedisSessionStore",
+    "SuggestIndex",
 ]
@@ -0,0 +1,182 @@
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from .string_table import StringTable, load_array, save_array, save_json
+
+_WORD_PATTERN = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    한국어 검색용 토크나이저.
+    영문/숫자/한글 단어를 그대로 토큰으로 쓰고, 3글자 이상의 한글 단어는 글자 bigram을 추가합니다.
+    ('스마트스토어에서' → '스마트스토어에서', '스마', '마트', ... '에서') 조사·복합어가 붙어도 매칭되도록 합니다.
+    """
+    tokens = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and "가" <= word[0] <= "힣":
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    수집(ingest) 시점에 미리 계산해 두는 희소 BM25 인덱스입니다.
+    단어별 posting list(CSR: indptr/indices/data)에 BM25 가중치를 저장해 두므로,
+    질의 시에는 질문에 등장한 단어들의 posting만 합산하면 됩니다.
+    단어 사전은 정렬된 StringTable(단어 id = 정렬 순서)로, posting 배열은 .npy로 저장하고 mmap으로 읽어
+    여러 워커 프로세스가 같은 페이지를 공유합니다. (단어 조회는 이진 탐색)
+    """
+
+    DIR_NAME = "bm25"
+
+    def __init__(self, index_dir: str, k1: float = 1.5, b: float = 0.75):
+        self.index_dir = os.path.join(index_dir, self.DIR_NAME)
+        self.k1 = k1
+        self.b = b
+        self.terms = StringTable.from_strings([])
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.n_docs = 0
+        self.load()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.n_docs > 0
+
+    def build(self, documents: list[str]):
+        """문서 목록(행 순서 = DocumentStore 행 순서)으로 인덱스를 새로 만듭니다."""
+        term_freqs = [Counter(tokenize(doc)) for doc in documents]
+        doc_lens = np.array([sum(tf.values()) for tf in term_freqs], dtype=np.float32)
+        avgdl = float(doc_lens.mean()) if len(doc_lens) and doc_lens.mean() > 0 else 1.0
+
+        # 단어 id를 사전순으로 부여해 저장된 단어 테이블에서 이진 탐색으로 찾을 수 있게 함
+        terms = sorted(set().union(*term_freqs))
+        vocab = {term: i for i, term in enumerate(terms)}
+        term_ids, rows, tfs = [], [], []
+        for row, tf in enumerate(term_freqs):
+            for term, count in tf.items():
+                term_ids.append(vocab[term])
+                rows.append(row)
+                tfs.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        # 단어 id 기준으로 정렬해 CSR(posting list) 구성
+        order = np.argsort(term_ids, kind="stable")
+        term_ids, rows, tfs = term_ids[order], rows[order], tfs[order]
+        df = np.bincount(term_ids, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        n_docs = len(documents)
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1.0 - self.b + self.b * doc_lens[rows] / avgdl)
+        weights = idf[term_ids] * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        self.terms = StringTable.from_strings(terms)
+        self.indptr = indptr
+        self.indices = rows
+        self.data = weights.astype(np.float32)
+        self.n_docs = n_docs
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.terms.save(os.path.join(self.index_dir, "terms"))
+        save_array(os.path.join(self.index_dir, "indptr.npy"), self.indptr)
+        save_array(os.path.join(self.index_dir, "indices.npy"), self.indices)
+        save_array(os.path.join(self.index_dir, "data.npy"), self.data)
+        meta = {"k1": self.k1, "b": self.b, "n_docs": self.n_docs, "n_terms": len(self.terms)}
+        save_json(os.path.join(self.index_dir, "meta.json"), meta)
+
+    def load(self) -> bool:
+        meta_path = os.path.join(self.index_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        terms = StringTable.load(os.path.join(self.index_dir, "terms"))
+        if terms is None or len(terms) != meta.get("n_terms"):
+            return False  # 이전 형식(단어 목록을 JSON에 저장)이거나 저장 중인 인덱스
+        self.k1, self.b, self.n_docs = meta["k1"], meta["b"], meta["n_docs"]
+        self.terms = terms
+        self.indptr = load_array(os.path.join(self.index_dir, "indptr.npy"))
+        self.indices = load_array(os.path.join(self.index_dir, "indices.npy"))
+        self.data = load_array(os.path.join(self.index_dir, "data.npy"))
+        return True
+
+    def search(self, query: str, top_k: int = 10) -> list[tuple[int, float]]:
+        """
+        질문과 BM25 점수가 높은 상위 top_k 문서의 (행 번호, 점수)를 반환합니다.
+        질문 단어의 posting list만 읽으므로 비용은 코퍼스 크기가 아닌 질문 단어 수에 비례합니다.
+        """
+        if top_k <= 0:
+            return []
+        counts = Counter(tokenize(query))
+        rows, weights = [], []
+        for term, query_tf in counts.items():
+            term_id = self.terms.find(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows.append(self.indices[start:end])
+            weights.append(self.data[start:end] * query_tf)
+        if not rows:
+            return []
+        rows = np.concatenate(rows)
+        weights = np.concatenate(weights)
+
+        matched, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        # 전체 정렬 대신 부분 선택(argpartition) 후 상위 k개만 정렬
+        k = min(top_k, len(matched))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(matched[i]), float(scores[i])) for i in top]
+
+    def search_batch(self, queries: list[str], top_k: int = 10) -> list[list[tuple[int, float]]]:
+        """
+        여러 질문을 한 번에 검색합니다. (대량 처리용, 질문별 결과는 search()와 같음)
+        모든 질문의 posting을 모아 (질문 × 문서) 점수 행렬을 bincount 한 번으로 만들고,
+        행 단위 부분 정렬로 상위 top_k를 구합니다.
+        점수 행렬은 질문 수 × 문서 수 크기이므로 질문은 적당한 크기로 나눠 넘깁니다.
+        """
+        results: list[list[tuple[int, float]]] = [[] for _ in queries]
+        if not queries or top_k <= 0 or not self.is_ready:
+            return results
+        query_ids, rows, weights = [], [], []
+        for qi, query in enumerate(queries):
+            for term, query_tf in Counter(tokenize(query)).items():
+                term_id = self.terms.find(term)
+                if term_id is None:
+                    continue
+                start, end = self.indptr[term_id], self.indptr[term_id + 1]
+                query_ids.append(np.full(end - start, qi, dtype=np.int64))
+                rows.append(self.indices[start:end])
+                weights.append(self.data[start:end] * query_tf)
+        if not rows:
+            return results
+
+        cells = np.concatenate(query_ids) * self.n_docs + np.concatenate(rows)
+        scores = np.bincount(cells, weights=np.concatenate(weights), minlength=len(queries) * self.n_docs)
+        scores = scores.reshape(len(queries), self.n_docs)
+
+        k = min(top_k, self.n_docs)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for qi in range(len(queries)):
+            # BM25 가중치는 항상 양수이므로 점수 0 = 질문 단어가 하나도 없는 문서
+            results[qi] = [(int(row), float(score)) for row, score in zip(top[qi], top_scores[qi]) if score > 0]
+        return results
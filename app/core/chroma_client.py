@@ -1,6 +1,7 @@
-import pickle
 import re
 
+from .ingestion import CorpusIngestor
+
 
 class ChromaClient:
     """
@@ -8,10 +9,72 @@ class ChromaClient:
     이 클래스는 FAQ 데이터의 제목과 전체 내용을 저장하고 검색하는 기능을 제공합니다.
     """
 
-    def __init__(self, chroma_client, title_collection_name: str, full_collection_name: str):
+    def __init__(
+        self,
+        chroma_client,
+        title_collection_name: str,
+        full_collection_name: str,
+        document_store=None,
+        bm25_index=None,
+        doc_path: str | None = None,
+        dense_index=None,
+        suggest_index=None,
+    ):
         self.chroma_client = chroma_client
         self.title_collection_name = title_collection_name
         self.full_collection_name = full_collection_name
+        self.document_store = document_store
+        self.bm25_index = bm25_index
+        self.doc_path = doc_path
+        self.dense_index = dense_index
+        self.suggest_index = suggest_index
+        self._collections = None
+
+    @property
+    def index_dir(self) -> str | None:
+        return self.document_store.index_dir if self.document_store is not None else None
+
+    @property
+    def corpus_manifest(self) -> dict | None:
+        """마지막 수집(scripts.ingest) 결과 매니페스트 (코퍼스 버전, 문서 수, 변경 요약)."""
+        return CorpusIngestor.read_manifest(self.index_dir) if self.index_dir is not None else None
+
+    def reset(self):
+        """캐시된 컬렉션을 버려 다음 호출에서 다시 열도록 합니다."""
+        self._collections = None
+
+    def build_lexical_index(self, ids: list[str], documents: list[str]):
+        """
+        전체 QA 문서로 문서 저장소와 BM25 인덱스를 만들고 Chroma 데이터 옆에 저장합니다.
+        """
+        if self.document_store is None or self.bm25_index is None:
+            return
+        self.document_store.build(ids, documents)
+        self.bm25_index.build(documents)
+        self.document_store.save()
+        self.bm25_index.save()
+
+    def build_dense_index(self, title_collection):
+        """
+        제목 컬렉션의 임베딩을 문서 저장소 행 순서로 모아 프로세스 내 dense 인덱스를 만들고 저장합니다.
+        """
+        if self.dense_index is None or self.document_store is None:
+            return
+        resp = title_collection.get(include=["embeddings"])
+        embedding_by_id = dict(zip(resp["ids"], resp["embeddings"]))
+        ids = self.document_store.ids
+        self.dense_index.build(ids, [embedding_by_id.get(doc_id) for doc_id in ids])
+        self.dense_index.save()
+
+    def build_suggest_index(self, title_collection):
+        """
+        제목 컬렉션의 제목으로 자동완성 인덱스를 메모리에 만듭니다. (디스크에 저장하지 않고 서버 시작·재수집 시 생성)
+        """
+        if self.suggest_index is None:
+            return
+        resp = title_collection.get(include=["documents"])
+        version = self.document_store.version if self.document_store is not None else ""
+        self.suggest_index.build(resp["ids"], resp["documents"], version=version)
 
     def clean_context(self, text: str) -> str:
         """
@@ -38,29 +101,31 @@ class ChromaClient:
     async def get_chroma_collections(self, get_all_embeddings_async):
         """
         Initialize and return the title and full QA Chroma collections.
+        컬렉션은 서버 시작 시 한 번만 열고, 이후 호출에서는 캐시된 컬렉션을 반환합니다.
         """
-        global title_collection, full_collection
+        if self._collections is not None:
+            return self._collections
+
         title_collection = self.chroma_client.get_or_create_collection(name=self.title_collection_name)
         full_collection = self.chroma_client.get_or_create_collection(name=self.full_collection_name)
 
         if title_collection.count() == 0 or full_collection.count() == 0:
-            with open("docs/final_result.pkl", "rb") as f:
-                doc_text = pickle.load(f)
-
-            qa_pairs = [
-                (self.clean_context(q.strip()), self.clean_context(a.strip()))
-                for q, a in doc_text.items()
-                if q.strip() and a.strip()
-            ]
+            # 수집 전 상태에서만 서버가 직접 수집 (평소에는 python -m scripts.ingest 로 증분 반영)
+            await CorpusIngestor(self, self.doc_path).run(get_all_embeddings_async)
 
-            ids = [f"qa_{i}" for i in range(len(qa_pairs))]
-            titles = [q[0] for q, _ in qa_pairs]
-            full_texts = [f"Q: {q}\nA: {a}" for q, a in qa_pairs]
+        elif self.bm25_index is not None and not self.bm25_index.is_ready:
+            # 디스크에 인덱스가 없는 경우(기존 Chroma 데이터) 한 번만 생성해 저장
+            resp = full_collection.get()
+            self.build_lexical_index(resp["ids"], resp["documents"])
 
-            title_embeddings = await get_all_embeddings_async(titles)
-            full_embeddings = await get_all_embeddings_async(full_texts)
+        if self.dense_index is not None and self.dense_index.ids != self.document_store.ids:
+            # dense 인덱스가 없거나 문서 저장소와 행이 어긋난 경우 Chroma에서 다시 생성
+            self.build_dense_index(title_collection)
 
-            title_collection.add(documents=titles, embeddings=title_embeddings, ids=ids)
-            full_collection.add(documents=full_texts, embeddings=full_embeddings, ids=ids)
+        if self.suggest_index is not None and (
+            not self.suggest_index.is_ready or self.suggest_index.version != self.document_store.version
+        ):
+            self.build_suggest_index(title_collection)
 
-        return [title_collection, full_collection]
+        self._collections = [title_collection, full_collection]
+        return self._collections
@@ -11,27 +11,100 @@ class Settings(BaseSettings):
     )
 
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: str | None = None  # OpenAI 호환 엔드포인트 (로컬 가짜 서버: http://localhost:8001/v1)
+    OPENAI_MAX_RETRIES: int = 0  # SDK 자체 재시도 (0: 재시도·429 대기는 RateLimiter가 담당)
     DOC_PATH: str
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_DB: int
 
-    # 로그 파일 경로
-    LOG_PATH: str = "chat_log.csv"
+    # generator.py / context_packer.py 관련 설정
+    CHAT_MODEL: str = "gpt-4o-mini"
+    LLM_FALLBACK_MODEL: str | None = None  # 기본 모델 실패 시 사용할 모델 (없으면 폴백 안 함)
+    LLM_FALLBACK_BASE_URL: str | None = None  # 폴백 엔드포인트 (없으면 OPENAI_BASE_URL과 같은 곳)
+    LLM_FALLBACK_MAX_CONCURRENCY: int = 16  # 폴백 모델 동시 호출 상한·분당 요청/토큰 한도 (채팅 리미터와 별도)
+    LLM_FALLBACK_RPM: int = 0
+    LLM_FALLBACK_TPM: int = 0
+    LLM_HEDGE_ENABLED: bool = True  # 첫 토큰이 늦으면 같은 요청을 하나 더 보냄
+    LLM_HEDGE_PERCENTILE: float = 95.0  # 최근 첫 토큰 지연의 이 백분위수를 헤지 마감 시간으로 사용
+    LLM_HEDGE_MIN_DELAY: float = 0.5  # 헤지 마감 시간 하한/상한(초)
+    LLM_HEDGE_MAX_DELAY: float = 5.0
+    LLM_HEDGE_INITIAL_DELAY: float = 2.0  # 지연 표본이 쌓이기 전 마감 시간(초)
+    LLM_IDLE_TIMEOUT: float = 30.0  # 이 시간 동안 스트림에 응답이 없으면 실패로 처리(초)
+    CHAT_MAX_CONCURRENCY: int = 64  # 채팅 모델(재기술·답변) 동시 호출 상한 (429를 받으면 AIMD로 줄였다가 회복)
+    CHAT_RPM: int = 0  # 채팅 모델 분당 요청/토큰 한도 (0: 응답 헤더 x-ratelimit-limit-*에서 학습)
+    CHAT_TPM: int = 0
+    LLM_COMPLETION_TOKEN_ESTIMATE: int = 400  # TPM 예산 계산용 답변 토큰 수 추정치
+    CONTEXT_TOKEN_BUDGET: int = 1500  # 시스템 프롬프트에 넣을 참고 문서의 최대 토큰 수
+    CONTEXT_MIN_PASSAGE_TOKENS: int = 32  # 남은 예산이 이보다 작으면 문서를 잘라 넣지 않음
+
+    # rewriter.py 관련 설정
+    REWRITE_GATE_THRESHOLD: float = 0.6  # FAQ 제목과의 최대 코사인 유사도가 이 값 이상이면 LLM 재기술 생략
+    REWRITE_CACHE_SIZE: int = 1024  # 재기술 결과 LRU 캐시 크기
+
+    # 로그 파일 경로 (SQLite)
+    LOG_PATH: str = "chat_log.sqlite3"
+    LOG_LEVEL: str = "INFO"  # 애플리케이션 로깅 레벨 (DEBUG면 최종 프롬프트도 출력)
+    SERVER_TIMING_ENABLED: bool = False  # /ask/stream 응답에 단계별 소요 시간 Server-Timing 헤더 추가
 
     # embedding.py 관련 설정
     MAX_TOKENS: int = 8000
     CHUNK_SIZE: int = 7000
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     RERANKING_MODEL: str = "BAAI/bge-reranker-base"
-    EMBEDDING_CONCURRENCY: int = 5  # 임베딩 동시 처리 수
+    RERANKER_BACKEND: str = "torch"  # torch | onnx (int8 양자화, CPU 전용 배포용) | none (리랭킹 생략, 벤치마크용)
+    RERANKER_ONNX_DIR: str = "models/reranker_onnx"  # ONNX 변환 모델 저장 경로
+    RERANKER_ONNX_THREADS: int = 0  # ONNX Runtime intra-op 스레드 수 (0: 자동)
+    RERANK_MAX_BATCH_SIZE: int = 64  # 리랭커 1회 추론에 묶을 최대 (질문, 문서) 쌍 수
+    RERANK_MAX_WAIT_MS: float = 5.0  # 다른 요청을 모으기 위해 기다리는 최대 시간
+    EMBEDDING_CONCURRENCY: int = 5  # 임베딩 동시 호출 상한 (429를 받으면 AIMD로 줄였다가 회복)
+    EMBEDDING_RPM: int = 0  # 임베딩 모델 분당 요청/토큰 한도 (0: 응답 헤더에서 학습)
+    EMBEDDING_TPM: int = 0
+    EMBEDDING_BATCH_SIZE: int = 256  # 임베딩 요청 1회당 최대 입력 개수 (API 한도 2048)
+    EMBEDDING_BATCH_TOKENS: int = 100_000  # 임베딩 요청 1회당 최대 토큰 수 (API 한도 300k)
 
     # chroma_client.py 관련 설정정
     TITLE_COLLECTION_NAME: str = "qa_title"
     FULL_COLLECTION_NAME: str = "qa_full"
     CHROMA_DIR: str = "chroma_db"
-    EMBEDDING_CACHE_PATH: str = "docs/final_result_embedded.pkl"
+    INDEX_DIR: str = "chroma_db/indexes"  # 문서 저장소·BM25·dense 인덱스 저장 경로
+    DENSE_BACKEND: str = "chroma"  # chroma | numpy (프로세스 내 mmap 행렬 검색)
+    DENSE_INDEX_DTYPE: str = "float32"  # float32 | float16 (메모리 절반, 대신 CPU 행렬 곱은 느려짐)
+
+    # retrieval.py 관련 설정 (검색기별 후보 수와 융합 방식)
+    BM25_DEPTH: int = 10  # BM25 후보 수
+    DENSE_DEPTH: int = 5  # dense(제목 임베딩) 후보 수
+    FUSION_METHOD: str = "rrf"  # rrf | weighted (정규화 점수 가중합)
+    FUSION_RRF_K: int = 60
+    FUSION_BM25_WEIGHT: float = 1.0
+    FUSION_DENSE_WEIGHT: float = 1.0
+    RERANK_DEPTH: int = 15  # 융합 후 리랭킹할 최대 후보 수
+    CONTEXT_TOP_N: int = 5  # 리랭킹 후 프롬프트에 넣을 문서 수
+
+    # batch.py 관련 설정 (/ask/batch, scripts.ask_batch)
+    BATCH_CHUNK_SIZE: int = 64  # 임베딩·검색·리랭킹을 한 번에 처리할 질문 수
+    BATCH_MAX_CONCURRENCY: int = 16  # 동시에 생성할 답변 수 상한
+    BATCH_MAX_QUESTIONS: int = 10_000  # /ask/batch 요청 1회당 최대 질문 수
+
+    # suggest_index.py 관련 설정 (/suggest 자동완성)
+    SUGGEST_LIMIT: int = 8  # 기본 추천 제목 수
+    SUGGEST_MIN_OVERLAP: float = 0.5  # 부분 일치로 인정할 입력 bigram 겹침 비율
+    SUGGEST_CACHE_MAX_AGE: int = 300  # /suggest·/faq 응답의 Cache-Control max-age(초)
+
+    # embedding_cache.py 관련 설정
+    EMBEDDING_CACHE_PATH: str = "docs/embedding_cache.sqlite3"
+    EMBEDDING_CACHE_MEMORY_MB: int = 64  # 프로세스 내 LRU 캐시 메모리 상한
+
+    # answer_cache.py 관련 설정
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95  # 캐시된 답변을 재사용할 최소 코사인 유사도
+    ANSWER_CACHE_MAX_ENTRIES: int = 2000
+    ANSWER_CACHE_TTL_SECONDS: int = 60 * 60 * 24
+    ANSWER_CACHE_FIRST_TURN_ONLY: bool = True  # 히스토리가 없는 첫 질문에만 캐시 사용
 
     # Redis 설정
+    SESSION_BACKEND: str = "redis"  # redis | memory (테스트·벤치마크용)
     SESSION_KEY_PREFIX: str = "chat:session:"
-    MAX_SESSION_LENGTH: int = 5  # 최대 세션 길이
+    MAX_SESSION_LENGTH: int = 5  # 최대 세션 길이 (최신 메시지 기준)
+    SESSION_TTL_SECONDS: int = 60 * 60 * 24  # 세션 만료 시간
+    REDIS_MAX_CONNECTIONS: int = 50  # 공유 커넥션 풀 크기
@@ -0,0 +1,119 @@
+import json
+import os
+
+import numpy as np
+
+from .string_table import StringTable, load_array, save_array, save_json
+
+
+class DenseIndex:
+    """
+    제목 임베딩을 프로세스 안에서 검색하는 밀집(dense) 벡터 인덱스입니다.
+    정규화된 임베딩을 DocumentStore 행 순서대로 하나의 연속 행렬(float32 또는 float16)로 저장하고 mmap으로 읽어,
+    질문 하나당 행렬-벡터 곱 한 번과 부분 정렬로 top-k를 구합니다. 원본 데이터는 계속 Chroma가 보관합니다.
+    행렬과 문서 id(StringTable)는 읽기 전용 mmap이므로 여러 워커 프로세스가 같은 페이지를 공유합니다.
+    """
+
+    DIR_NAME = "dense"
+
+    def __init__(self, index_dir: str, dtype: str = "float32"):
+        self.index_dir = os.path.join(index_dir, self.DIR_NAME)
+        self.dtype = np.dtype(dtype)
+        self.ids = StringTable.from_strings([])
+        self.matrix = np.zeros((0, 0), dtype=self.dtype)
+        self._empty_rows = np.zeros(0, dtype=np.int64)  # 임베딩이 없는(0 벡터) 행 번호
+        self.load()
+
+    @property
+    def is_ready(self) -> bool:
+        return len(self.ids) > 0
+
+    def build(self, ids: list[str], embeddings):
+        """
+        DocumentStore 행 순서의 id 목록과 같은 순서의 임베딩으로 인덱스를 만듭니다.
+        임베딩이 없는 행(None)은 0 벡터로 채우고, 검색 시 점수를 -inf로 가려 결과에서 뺍니다.
+        """
+        dim = next((len(e) for e in embeddings if e is not None), 0)
+        matrix = np.zeros((len(ids), dim), dtype=np.float32)
+        for row, embedding in enumerate(embeddings):
+            if embedding is not None:
+                matrix[row] = embedding
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        self._set(StringTable.from_strings(ids), matrix.astype(self.dtype))
+
+    def _set(self, ids: StringTable, matrix: np.ndarray):
+        self.ids, self.matrix = ids, matrix
+        self._empty_rows = np.flatnonzero(~matrix.any(axis=1))
+
+    @property
+    def searchable(self) -> int:
+        """검색 결과에 나올 수 있는(임베딩이 있는) 행 수"""
+        return len(self.ids) - len(self._empty_rows)
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        # 다른 프로세스(서버)가 mmap 중인 파일을 덮어쓰지 않도록 새 파일에 쓴 뒤 교체
+        save_array(os.path.join(self.index_dir, "embeddings.npy"), self.matrix)
+        self.ids.save(os.path.join(self.index_dir, "ids"))
+        save_json(os.path.join(self.index_dir, "meta.json"), {"dtype": self.dtype.name, "count": len(self.ids)})
+
+    def load(self) -> bool:
+        meta_path = os.path.join(self.index_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["dtype"] != self.dtype.name:
+            # 설정한 정밀도와 다르게 저장된 인덱스는 다시 만들도록 무시
+            return False
+        ids = StringTable.load(os.path.join(self.index_dir, "ids"))
+        matrix = load_array(os.path.join(self.index_dir, "embeddings.npy"))
+        if ids is None or not len(ids) == len(matrix) == meta.get("count"):
+            return False  # 이전 형식(id 목록을 JSON에 저장)이거나 저장 중인 인덱스
+        self._set(ids, matrix)
+        return True
+
+    def search(self, embedding: list[float], top_k: int = 10) -> list[tuple[int, float]]:
+        """질문 임베딩과 코사인 유사도가 높은 상위 top_k 문서의 (행 번호, 점수)를 반환합니다."""
+        if not self.searchable or top_k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = self.matrix @ (query / norm).astype(self.dtype)
+        scores[self._empty_rows] = -np.inf  # 0 벡터 행은 점수 0으로 상위에 섞이지 않도록 제외
+
+        # 전체 정렬 대신 부분 선택(argpartition) 후 상위 k개만 정렬
+        k = min(top_k, self.searchable)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def search_batch(self, embeddings: list[list[float]], top_k: int = 10) -> list[list[tuple[int, float]]]:
+        """
+        여러 질문 임베딩을 행렬-행렬 곱 한 번으로 검색합니다. (대량 처리용)
+        질문별 결과는 search()와 같습니다. (부동소수점 합산 순서 차이로 점수가 같은 문서의 순서는 바뀔 수 있음)
+        임베딩이 없거나(빈 리스트) 0 벡터인 질문의 결과는 빈 리스트입니다.
+        """
+        results: list[list[tuple[int, float]]] = [[] for _ in embeddings]
+        valid = [i for i, embedding in enumerate(embeddings) if embedding is not None and len(embedding)]
+        if not self.searchable or top_k <= 0 or not valid:
+            return results
+        queries = np.asarray([embeddings[i] for i in valid], dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        np.divide(queries, norms, out=queries, where=norms > 0)
+        scores = queries.astype(self.dtype) @ self.matrix.T
+        scores[:, self._empty_rows] = -np.inf
+
+        k = min(top_k, self.searchable)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for j, i in enumerate(valid):
+            if norms[j, 0] > 0:
+                results[i] = [(int(row), float(score)) for row, score in zip(top[j], top_scores[j])]
+        return results
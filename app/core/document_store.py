@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .string_table import StringTable, load_array, save_array, save_json
+
+
+class DocumentStore:
+    """
+    검색 인덱스들이 공유하는 문서 저장소입니다.
+    행 번호(row) ↔ 문서 id ↔ 문서 본문을 매핑하며, 인덱스 디렉토리에 함께 저장됩니다.
+    encoding(채팅 모델 tiktoken)이 주어지면 수집 시점에 문서별 토큰 수를 미리 계산해 함께 저장합니다.
+    id·본문은 StringTable(UTF-8 블롭 + 오프셋), 토큰 수와 id 정렬 순서는 .npy로 저장하고 mmap으로 읽으므로
+    여러 워커 프로세스가 같은 페이지를 공유합니다. (id → 행 조회는 정렬 순서 배열에서 이진 탐색)
+    """
+
+    DIR_NAME = "documents"
+
+    def __init__(self, index_dir: str, encoding=None):
+        self.index_dir = index_dir
+        self.encoding = encoding
+        self.ids = StringTable.from_strings([])
+        self.documents = StringTable.from_strings([])
+        self.token_counts = np.zeros(0, dtype=np.int32)
+        self._id_order = np.zeros(0, dtype=np.int64)  # id 사전순으로 정렬한 행 번호
+        self.version = ""  # 코퍼스 내용 해시 (캐시 무효화용)
+        self.load()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.index_dir, self.DIR_NAME)
+
+    @property
+    def encoding_name(self) -> str | None:
+        return getattr(self.encoding, "name", None)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, ids: list[str], documents: list[str], token_counts: list[int] | None = None):
+        ids, documents = list(ids), list(documents)
+        if token_counts is None or len(token_counts) != len(documents):
+            token_counts = [len(self.encoding.encode(doc)) for doc in documents] if self.encoding else []
+        self.ids = StringTable.from_strings(ids)
+        self.documents = StringTable.from_strings(documents)
+        self.token_counts = np.asarray(token_counts, dtype=np.int32)
+        self._id_order = np.asarray(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.int64)
+        digest = hashlib.sha1()
+        for doc_id, document in zip(ids, documents):
+            digest.update(f"{doc_id}\x00{document}\x00".encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.ids.save(os.path.join(self.path, "ids"))
+        self.documents.save(os.path.join(self.path, "documents"))
+        save_array(os.path.join(self.path, "token_counts.npy"), self.token_counts)
+        save_array(os.path.join(self.path, "id_order.npy"), self._id_order)
+        # 메타데이터를 마지막에 교체: 읽는 쪽은 문서 수가 메타와 맞을 때만 사용
+        meta = {"count": len(self.ids), "version": self.version, "token_encoding": self.encoding_name}
+        save_json(os.path.join(self.path, "meta.json"), meta)
+
+    def load(self) -> bool:
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        ids = StringTable.load(os.path.join(self.path, "ids"))
+        documents = StringTable.load(os.path.join(self.path, "documents"))
+        if ids is None or documents is None or not len(ids) == len(documents) == meta["count"]:
+            return False
+        token_counts = load_array(os.path.join(self.path, "token_counts.npy"))
+        if meta.get("token_encoding") != self.encoding_name or len(token_counts) != len(ids):
+            # 다른 토크나이저로 계산된 토큰 수는 버리고 다시 계산
+            self.build(ids, documents)
+            return True
+        self.ids, self.documents, self.token_counts = ids, documents, token_counts
+        self._id_order = load_array(os.path.join(self.path, "id_order.npy"))
+        self.version = meta["version"]
+        return True
+
+    def row_of(self, doc_id: str) -> int | None:
+        return self.ids.find(doc_id, self._id_order)
+
+    def token_count(self, doc_id: str) -> int | None:
+        """수집 시 미리 계산한 문서의 토큰 수. 계산되지 않았으면 None."""
+        row = self.row_of(doc_id)
+        return int(self.token_counts[row]) if row is not None and len(self.token_counts) else None
+
+    def get_documents(self, ids: list[str]) -> list[str]:
+        """id 목록 순서대로 문서 본문을 반환합니다. 없는 id는 건너뜁니다."""
+        return [self.documents[row] for row in map(self.row_of, ids) if row is not None]
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    쿼리/문서 임베딩을 위한 2단 캐시입니다.
+    1단: 메모리 사용량(바이트) 상한이 있는 프로세스 내 LRU
+    2단: SQLite 기반의 영구 디스크 저장소 (서버 재시작 후에도 유지)
+
+    키는 (임베딩 모델, 정규화된 텍스트)로 만들어지므로 모델이 바뀌면 자연스럽게 캐시가 분리됩니다.
+    """
+
+    def __init__(self, path: str, max_memory_mb: int = 64):
+        self.path = path
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """유니코드(NFKC) 정규화 후 연속 공백을 하나로 합칩니다."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+    def make_key(self, model: str, text: str) -> str:
+        raw = f"{model}\x00{self.normalize_text(text)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def get_many(self, model: str, texts: list[str]) -> list[list[float] | None]:
+        """
+        여러 텍스트의 임베딩을 한 번에 조회합니다. 캐시에 없는 항목은 None으로 반환됩니다.
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            pending = {key for key in keys if key not in found}
+            # SQLite 변수 개수 제한(999)을 넘지 않도록 나누어 조회
+            pending_keys = list(pending)
+            for i in range(0, len(pending_keys), 500):
+                part = pending_keys[i : i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+
+            results = []
+            for key in keys:
+                vector = found.get(key)
+                if vector is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                if key in pending:
+                    self.disk_hits += 1
+                else:
+                    self.memory_hits += 1
+                results.append(vector.tolist())
+        return results
+
+    def get(self, model: str, text: str) -> list[float] | None:
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model: str, texts: list[str], embeddings: list[list[float]]):
+        """
+        임베딩 결과를 메모리와 디스크에 함께 저장합니다. 빈 임베딩(실패)은 저장하지 않습니다.
+        """
+        rows = []
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                if embedding is None or len(embedding) == 0:
+                    continue
+                key = self.make_key(model, text)
+                vector = np.asarray(embedding, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+            if rows:
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self._conn.commit()
+
+    def put(self, model: str, text: str, embedding: list[float]):
+        self.put_many(model, [text], [embedding])
+
+    def stats(self) -> dict:
+        """캐시 적중/미스 횟수와 현재 메모리 사용량을 반환합니다."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
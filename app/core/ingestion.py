@@ -0,0 +1,282 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import pickle
+from dataclasses import dataclass, field
+
+from .rate_limiter import Priority
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestPlan:
+    """현재 컬렉션 상태와 원본 FAQ 덤프를 비교한 결과입니다."""
+
+    ids: list[str]
+    titles: list[str]
+    full_texts: list[str]
+    hashes: list[str]
+    added: list[int] = field(default_factory=list)  # 새 항목 (corpus 행 번호)
+    updated: list[int] = field(default_factory=list)  # 내용이 바뀐 항목 (corpus 행 번호)
+    removed: list[str] = field(default_factory=list)  # 덤프에서 사라진 항목 id
+    renamed: dict[str, int] = field(default_factory=dict)  # 이전 형식 id(qa_<i>) → 내용이 같은 corpus 행 번호
+    failed: list[str] = field(default_factory=list)  # 임베딩에 실패해 반영하지 못한 항목 id (다음 실행 때 재시도)
+    previous: dict[str, str] = field(default_factory=dict)  # 바뀐 항목 id → 컬렉션에 저장돼 있던 전체 QA 문서
+
+    @property
+    def pending(self) -> list[int]:
+        return sorted(self.added + self.updated)
+
+    def summary(self) -> dict:
+        return {
+            "documents": len(self.ids),
+            "added": len(self.added),
+            "updated": len(self.updated),
+            "removed": len(self.removed),
+            "renamed": len(self.renamed),
+            "failed": len(self.failed),
+        }
+
+    def indexed(self) -> tuple[list[str], list[str]]:
+        """
+        컬렉션에 실제로 반영된 (ids, full_texts). 문서 저장소·BM25·매니페스트는 이 목록으로 만듭니다.
+        임베딩에 실패한 새 항목은 빼고, 바뀐 항목은 컬렉션에 남아 있는 이전 문서를 그대로 씁니다.
+        """
+        failed = set(self.failed)
+        ids, full_texts = [], []
+        for doc_id, full_text in zip(self.ids, self.full_texts):
+            if doc_id in failed:
+                if doc_id not in self.previous:
+                    continue
+                full_text = self.previous[doc_id]
+            ids.append(doc_id)
+            full_texts.append(full_text)
+        return ids, full_texts
+
+
+class CorpusIngestor:
+    """
+    FAQ 덤프(pkl)를 Chroma 컬렉션과 검색 인덱스에 증분 반영하는 수집기입니다.
+    정제된 Q/A 쌍마다 내용 해시를 컬렉션 메타데이터에 저장해 두고, 새로 추가되거나 바뀐 항목만 임베딩합니다.
+    배치마다 upsert하므로 중간에 중단되어도 다시 실행하면 남은 항목부터 이어서 처리합니다.
+    해시 없이 qa_<i> id로 저장된 이전 컬렉션은 문서 내용으로 짝을 찾아 기존 임베딩을 새 id로 옮깁니다. (재임베딩 없음)
+    """
+
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, chroma_client, doc_path: str, batch_size: int = 256):
+        self.chroma_client = chroma_client
+        self.doc_path = doc_path
+        self.batch_size = batch_size
+
+    @classmethod
+    def read_manifest(cls, index_dir: str) -> dict | None:
+        """서버가 읽는 코퍼스 버전 매니페스트. 수집한 적이 없으면 None."""
+        path = os.path.join(index_dir, cls.MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def content_hash(title: str, full_text: str) -> str:
+        return hashlib.sha1(f"{title}\x00{full_text}".encode("utf-8")).hexdigest()
+
+    def load_corpus(self) -> tuple[list[str], list[str], list[str], list[str]]:
+        """
+        덤프를 읽어 정제한 뒤 (ids, titles, full_texts, hashes)를 반환합니다.
+        id는 원본 질문으로부터 만들어 답변이 바뀌어도 유지되고, 해시는 정제된 내용 전체로 계산합니다.
+        """
+        with open(self.doc_path, "rb") as f:
+            doc_text = pickle.load(f)
+
+        ids, titles, full_texts, hashes = [], [], [], []
+        for q, a in doc_text.items():
+            q, a = q.strip(), a.strip()
+            if not q or not a:
+                continue
+            question = self.chroma_client.clean_context(q)
+            answer = self.chroma_client.clean_context(a)
+            if not question:
+                continue
+            title = question[0]
+            full_text = f"Q: {question}\nA: {answer}"
+            ids.append(f"qa_{hashlib.sha1(q.encode('utf-8')).hexdigest()[:16]}")
+            titles.append(title)
+            full_texts.append(full_text)
+            hashes.append(self.content_hash(title, full_text))
+        return ids, titles, full_texts, hashes
+
+    def plan(self, full_collection) -> IngestPlan:
+        ids, titles, full_texts, hashes = self.load_corpus()
+        plan = IngestPlan(ids=ids, titles=titles, full_texts=full_texts, hashes=hashes)
+        corpus_ids = set(ids)
+
+        # 전체 QA 컬렉션의 해시가 체크포인트 역할 (제목 → 전체 순서로 upsert하므로 전체 쪽이 마지막으로 완료된 배치)
+        existing = full_collection.get(include=["metadatas", "documents"])
+        stored, documents, legacy = {}, {}, {}
+        for doc_id, metadata, document in zip(existing["ids"], existing["metadatas"], existing["documents"]):
+            content_hash = (metadata or {}).get("hash")
+            if content_hash is None and doc_id not in corpus_ids:
+                legacy[doc_id] = document  # 해시 메타데이터가 없던 이전 형식 (qa_<i>)
+            else:
+                stored[doc_id] = content_hash
+                documents[doc_id] = document
+
+        # 이전 형식 항목은 전체 QA 문서가 같은 corpus 행으로 옮기고, 짝이 없으면 삭제
+        row_of_text = {full_text: row for row, full_text in enumerate(full_texts)}
+        for legacy_id, document in legacy.items():
+            row = row_of_text.get(document)
+            if row is None or ids[row] in stored or row in plan.renamed.values():
+                plan.removed.append(legacy_id)
+            else:
+                plan.renamed[legacy_id] = row
+        renamed_rows = set(plan.renamed.values())
+
+        for row, (doc_id, content_hash) in enumerate(zip(ids, hashes)):
+            if row in renamed_rows:
+                continue
+            if doc_id not in stored:
+                plan.added.append(row)
+            elif stored[doc_id] != content_hash:
+                plan.updated.append(row)
+                plan.previous[doc_id] = documents[doc_id]
+        plan.removed += [doc_id for doc_id in stored if doc_id not in corpus_ids]
+        return plan
+
+    def migrate_legacy(self, plan: IngestPlan, title_collection, full_collection):
+        """
+        이전 형식 id로 저장된 임베딩을 새 id로 복사한 뒤 이전 id를 삭제합니다.
+        두 컬렉션 중 한쪽에라도 임베딩이 없는 항목은 새 항목(added)으로 돌려 다시 임베딩합니다.
+        """
+        legacy_ids = list(plan.renamed)
+        for start in range(0, len(legacy_ids), self.batch_size):
+            batch = legacy_ids[start : start + self.batch_size]
+            rows = [plan.renamed[legacy_id] for legacy_id in batch]
+            titles = title_collection.get(ids=batch, include=["embeddings"])
+            fulls = full_collection.get(ids=batch, include=["embeddings"])
+            title_of = dict(zip(titles["ids"], titles["embeddings"]))
+            full_of = dict(zip(fulls["ids"], fulls["embeddings"]))
+            moved = []
+            for legacy_id, row in zip(batch, rows):
+                if legacy_id in title_of and legacy_id in full_of:
+                    moved.append((legacy_id, row))
+                else:
+                    plan.added.append(row)
+            if moved:
+                new_ids = [plan.ids[row] for _, row in moved]
+                metadatas = [{"hash": plan.hashes[row]} for _, row in moved]
+                title_collection.upsert(
+                    ids=new_ids,
+                    documents=[plan.titles[row] for _, row in moved],
+                    embeddings=[title_of[legacy_id] for legacy_id, _ in moved],
+                    metadatas=metadatas,
+                )
+                full_collection.upsert(
+                    ids=new_ids,
+                    documents=[plan.full_texts[row] for _, row in moved],
+                    embeddings=[full_of[legacy_id] for legacy_id, _ in moved],
+                    metadatas=metadatas,
+                )
+            title_collection.delete(ids=batch)
+            full_collection.delete(ids=batch)
+
+    async def run(self, get_all_embeddings_async, dry_run: bool = False, progress=log.info) -> dict:
+        """
+        덤프와 컬렉션의 차이만 반영하고, 문서 저장소·BM25·dense 인덱스와 매니페스트를 갱신합니다.
+
+        Args:
+            get_all_embeddings_async: 텍스트 목록 → 임베딩 목록 (EmbeddingService.get_all_embeddings_async)
+            dry_run (bool): True면 변경 사항만 계산하고 반영하지 않음
+            progress: 진행 상황 메시지를 받을 함수 (기본값: 로그, CLI는 print)
+
+        Returns:
+            dict: 매니페스트 (dry_run이면 변경 요약)
+        """
+        title_collection = self.chroma_client.chroma_client.get_or_create_collection(
+            name=self.chroma_client.title_collection_name
+        )
+        full_collection = self.chroma_client.chroma_client.get_or_create_collection(
+            name=self.chroma_client.full_collection_name
+        )
+
+        plan = self.plan(full_collection)
+        summary = plan.summary()
+        progress(f"[Ingest] {summary}")
+        if dry_run:
+            return summary
+
+        if plan.renamed:
+            self.migrate_legacy(plan, title_collection, full_collection)
+            progress(f"[Ingest] {len(plan.renamed)} legacy ids migrated")
+
+        pending = plan.pending
+        for start in range(0, len(pending), self.batch_size):
+            rows = pending[start : start + self.batch_size]
+
+            # 제목과 전체 QA를 한 번에 임베딩 (배치 요청 수 절감, 사용자 질문보다 낮은 우선순위)
+            texts = [plan.titles[row] for row in rows] + [plan.full_texts[row] for row in rows]
+            embeddings = await get_all_embeddings_async(texts, priority=Priority.BULK)
+            title_embeddings, full_embeddings = embeddings[: len(rows)], embeddings[len(rows) :]
+
+            # 임베딩에 실패한 항목(빈 벡터)은 upsert에서 빼고 보고 (컬렉션에 반영되지 않았으므로 다음 실행 때 재시도)
+            ok = [i for i in range(len(rows)) if len(title_embeddings[i]) and len(full_embeddings[i])]
+            plan.failed += [plan.ids[rows[i]] for i in sorted(set(range(len(rows))) - set(ok))]
+            if ok:
+                ids = [plan.ids[rows[i]] for i in ok]
+                metadatas = [{"hash": plan.hashes[rows[i]]} for i in ok]
+                title_collection.upsert(
+                    ids=ids,
+                    documents=[plan.titles[rows[i]] for i in ok],
+                    embeddings=[title_embeddings[i] for i in ok],
+                    metadatas=metadatas,
+                )
+                full_collection.upsert(
+                    ids=ids,
+                    documents=[plan.full_texts[rows[i]] for i in ok],
+                    embeddings=[full_embeddings[i] for i in ok],
+                    metadatas=metadatas,
+                )
+            progress(f"[Ingest] {min(start + len(rows), len(pending))}/{len(pending)} upserted")
+
+        if plan.failed:
+            log.warning(
+                "[Ingest] 임베딩 실패로 %d건 반영하지 못함 (다음 실행 때 재시도): %s",
+                len(plan.failed),
+                plan.failed[:20],
+            )
+
+        if plan.removed:
+            for start in range(0, len(plan.removed), self.batch_size):
+                batch = plan.removed[start : start + self.batch_size]
+                title_collection.delete(ids=batch)
+                full_collection.delete(ids=batch)
+            progress(f"[Ingest] {len(plan.removed)} removed")
+
+        self.chroma_client.build_lexical_index(*plan.indexed())
+        self.chroma_client.build_dense_index(title_collection)
+        self.chroma_client.reset()
+        return self.write_manifest(plan)
+
+    def write_manifest(self, plan: IngestPlan) -> dict:
+        document_store = self.chroma_client.document_store
+        manifest = {
+            "version": document_store.version if document_store is not None else "",
+            "source": os.path.abspath(self.doc_path),
+            "ingested_at": datetime.datetime.now().isoformat(),
+            **plan.summary(),
+            "documents": len(plan.indexed()[0]),
+        }
+        index_dir = self.chroma_client.index_dir
+        if index_dir is None:
+            return manifest
+        os.makedirs(index_dir, exist_ok=True)
+        path = os.path.join(index_dir, self.MANIFEST_NAME)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return manifest
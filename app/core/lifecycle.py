@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class AppLifecycle:
+    """
+    서버 시작 시 모델·인덱스·컬렉션을 한 번만 로드하고 워밍업하는 라이프사이클 관리자입니다.
+    FastAPI lifespan에서 startup/shutdown을 호출하며, 구성 요소별 상태를 /readyz로 보고합니다.
+    요청 처리 중에는 모델 로드나 컬렉션 오픈 비용이 발생하지 않습니다.
+    """
+
+    def __init__(
+        self,
+        encoding,
+        chat_encoding,
+        reranker,
+        rerank_scheduler,
+        document_store,
+        bm25_index,
+        dense_index,
+        chroma_client,
+        embedding_service,
+        embedding_cache,
+        session_store,
+    ):
+        # 각 인자는 provider(호출 시 싱글턴 인스턴스를 반환)로 주입받아 startup 시점에 로드
+        self._encoding = encoding
+        self._chat_encoding = chat_encoding
+        self._reranker = reranker
+        self._rerank_scheduler = rerank_scheduler
+        self._document_store = document_store
+        self._bm25_index = bm25_index
+        self._dense_index = dense_index
+        self._chroma_client = chroma_client
+        self._embedding_service = embedding_service
+        self._embedding_cache = embedding_cache
+        self._session_store = session_store
+        self.components: dict[str, dict] = {}
+        self.corpus: dict | None = None  # 수집 매니페스트 (코퍼스 버전)
+        self.ready = False
+
+    async def _step(self, name: str, func) -> bool:
+        start = time.perf_counter()
+        try:
+            result = func()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            self.components[name] = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+            log.exception("[Startup] %s 실패: %s", name, e)
+            return False
+        self.components[name] = {"status": "ok", "seconds": round(time.perf_counter() - start, 3)}
+        return True
+
+    async def _load_collections(self):
+        embedding_service = self._embedding_service()
+        chroma_client = self._chroma_client()
+        await chroma_client.get_chroma_collections(embedding_service.get_all_embeddings_async)
+        self.corpus = chroma_client.corpus_manifest
+
+    async def _warmup(self):
+        # 첫 요청이 추론 그래프 초기화·스레드 풀 생성 비용을 내지 않도록 미리 한 번 실행
+        self._bm25_index().search("스마트스토어 환불", top_k=1)
+        await self._rerank_scheduler().score([("스마트스토어 환불 방법", "Q: 환불은 어떻게 하나요?")])
+
+    async def startup(self):
+        steps = [
+            ("encoding", lambda: asyncio.to_thread(self._encoding)),
+            ("chat_encoding", lambda: asyncio.to_thread(self._chat_encoding)),
+            ("reranker", lambda: asyncio.to_thread(self._reranker)),
+            ("document_store", lambda: asyncio.to_thread(self._document_store)),
+            ("bm25_index", lambda: asyncio.to_thread(self._bm25_index)),
+            ("dense_index", lambda: asyncio.to_thread(self._dense_index)),
+            ("session_store", lambda: self._session_store().ping()),
+            ("collections", self._load_collections),
+            ("warmup", self._warmup),
+        ]
+        results = [await self._step(name, func) for name, func in steps]
+        self.ready = all(results)
+
+    async def shutdown(self):
+        self.ready = False
+        await self._rerank_scheduler().close()
+        await self._session_store().close()
+        self._embedding_cache().close()
+
+    def status(self) -> dict:
+        return {"status": "ready" if self.ready else "not_ready", "components": self.components, "corpus": self.corpus}
@@ -1,48 +1,231 @@
-import csv
+import contextlib
 import datetime
+import json
 import os
+import sqlite3
+import threading
 
 
 class Logger:
+    """
+    질의응답 로그 저장소입니다. (SQLite, WAL 모드)
+    연결을 한 번만 열어 두고 행 단위로 추가하며, id 커서와 시간 범위로 페이지 단위 조회를 지원합니다.
+    """
+
+    COLUMNS = [
+        "id",
+        "timestamp",
+        "session_id",
+        "question",
+        "rewritten_query",
+        "doc_ids",
+        "retrieved_context",
+        "ai_response",
+        "timings",
+        "context_tokens",
+        "prompt_tokens",
+        "cached_tokens",
+        "completion_tokens",
+        "cache_hit",
+        "feedback",
+    ]
+
     def __init__(self, log_path: str):
         self.log_path = log_path
+        if os.path.dirname(log_path):
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(log_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                timestamp TEXT NOT NULL,
+                session_id TEXT,
+                question TEXT,
+                rewritten_query TEXT,
+                doc_ids TEXT,
+                retrieved_context TEXT,
+                ai_response TEXT,
+                timings TEXT,
+                context_tokens INTEGER,
+                prompt_tokens INTEGER,
+                cached_tokens INTEGER,
+                completion_tokens INTEGER,
+                cache_hit INTEGER NOT NULL DEFAULT 0,
+                feedback TEXT
+            )
+            """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_logs_ts ON chat_logs (ts)")
+        self._conn.commit()
 
-    def save_log(self, question: str, context: str, response: str):
-        """
-        Save the chat log to a CSV file.
-        """
-        new = not os.path.exists(self.log_path)
-        with open(self.log_path, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if new:
-                writer.writerow(
-                    [
-                        "timestamp",
-                        "question",
-                        "retrieved_context",
-                        "ai_response",
-                        "feedback",
-                    ]
-                )
-            writer.writerow(
-                [
-                    datetime.datetime.now().isoformat(),
-                    question,
-                    context,
-                    response,
-                ]
+    def save_log(
+        self,
+        question: str,
+        context: str,
+        response: str,
+        rewritten_query: str | None = None,
+        doc_ids: list[str] | None = None,
+        timings: dict | None = None,
+        session_id: str | None = None,
+        cache_hit: bool = False,
+        context_tokens: int | None = None,
+        usage: dict | None = None,
+    ):
+        """
+        Save one chat interaction (question, rewritten query, retrieved doc ids, answer, stage timings, context tokens).
+        usage: LLM 토큰 사용량 {"prompt_tokens", "cached_tokens", "completion_tokens"}
+        """
+        now = datetime.datetime.now()
+        usage = usage or {}
+        row = (
+            now.timestamp(),
+            now.isoformat(),
+            session_id,
+            question,
+            rewritten_query,
+            json.dumps(doc_ids or [], ensure_ascii=False),
+            context,
+            response,
+            json.dumps(timings or {}),
+            context_tokens,
+            usage.get("prompt_tokens"),
+            usage.get("cached_tokens"),
+            usage.get("completion_tokens"),
+            int(cache_hit),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO chat_logs (ts, timestamp, session_id, question, rewritten_query, doc_ids, "
+                "retrieved_context, ai_response, timings, context_tokens, prompt_tokens, cached_tokens, "
+                "completion_tokens, cache_hit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
             )
+            self._conn.commit()
+
+    @contextlib.contextmanager
+    def _reader(self):
+        # WAL 모드에서는 읽기 전용 연결이 쓰기와 동시에 동작하므로 조회마다 별도 연결 사용
+        # (스트리밍 응답은 생성기의 next()를 스레드 풀의 여러 스레드에서 차례로 호출하므로 스레드 검사 해제)
+        conn = sqlite3.connect(f"file:{self.log_path}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _where(
+        cursor: int | None,
+        since: datetime.datetime | None,
+        until: datetime.datetime | None,
+        id_range: tuple[int, int] | None = None,
+    ) -> tuple[str, list]:
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        if id_range is not None:
+            clauses.append("id BETWEEN ? AND ?")
+            params.extend(id_range)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until.timestamp())
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def page_range(
+        self,
+        cursor: int | None = None,
+        limit: int = 100,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+    ) -> tuple[tuple[int, int] | None, int | None]:
+        """
+        페이지에 들어갈 id 범위 (가장 오래된 id, 가장 최신 id)와 다음 페이지 커서를 한 번의 조회로 구합니다.
+        로그는 id가 단조 증가하고 삭제되지 않으므로 iter_logs(id_range=...)는 그 사이에 쓰인 로그와 관계없이
+        정확히 이 페이지를 반환하고, 다음 커서는 그 페이지에서 마지막으로 반환한 id가 됩니다. 빈 페이지면 (None, None).
+        """
+        where, params = self._where(cursor, since, until)
+        with self._reader() as conn:
+            ids = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT id FROM chat_logs {where} ORDER BY id DESC LIMIT ?", params + [limit + 1]
+                )
+            ]
+        if not ids:
+            return None, None
+        page = ids[:limit]
+        return (page[-1], page[0]), (page[-1] if len(ids) > limit else None)
+
+    def iter_logs(
+        self,
+        cursor: int | None = None,
+        limit: int = 100,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+        chunk_size: int = 200,
+        id_range: tuple[int, int] | None = None,
+    ):
+        """
+        최신순으로 로그를 조회합니다. 전체를 메모리에 올리지 않고 chunk_size 단위로 읽어 하나씩 반환합니다.
+
+        Args:
+            cursor (int | None): 이 id보다 오래된 로그만 조회 (이전 페이지의 X-Next-Cursor 값)
+            limit (int): 최대 조회 개수
+            since / until (datetime | None): 조회 시간 범위 [since, until)
+            id_range (tuple[int, int] | None): 이 id 범위(양 끝 포함)만 조회 (page_range로 구한 페이지)
+
+        Yields:
+            dict: 로그 한 건
+        """
+        where, params = self._where(cursor, since, until, id_range)
+        columns = ", ".join(self.COLUMNS)
+        with self._reader() as conn:
+            result = conn.execute(f"SELECT {columns} FROM chat_logs {where} ORDER BY id DESC LIMIT ?", params + [limit])
+            while rows := result.fetchmany(chunk_size):
+                for row in rows:
+                    log = dict(zip(self.COLUMNS, row))
+                    log["doc_ids"] = json.loads(log["doc_ids"] or "[]")
+                    log["timings"] = json.loads(log["timings"] or "{}")
+                    log["cache_hit"] = bool(log["cache_hit"])
+                    yield log
+
+    def usage_stats(self, since: datetime.datetime | None = None, until: datetime.datetime | None = None) -> dict:
+        """
+        기간 내 LLM 토큰 사용량과 프롬프트 캐시 적중률(cached_tokens / prompt_tokens)을 집계합니다.
+        """
+        where, params = self._where(None, since, until)
+        where = f"{where} AND prompt_tokens IS NOT NULL" if where else "WHERE prompt_tokens IS NOT NULL"
+        with self._reader() as conn:
+            requests, prompt_tokens, cached_tokens, completion_tokens, cached_requests = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(cached_tokens), 0), "
+                "COALESCE(SUM(completion_tokens), 0), COALESCE(SUM(cached_tokens > 0), 0) "
+                f"FROM chat_logs {where}",
+                params,
+            ).fetchone()
+        return {
+            "requests": requests,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_token_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+            "cached_request_ratio": cached_requests / requests if requests else 0.0,
+        }
 
-    def get_logs(self) -> list:
+    def get_logs(self, limit: int = 100) -> list:
         """
-        Retrieve all chat logs from the CSV file.
+        Retrieve the most recent chat logs.
 
         Returns:
             list: A list of dictionaries containing the chat logs.
         """
-        if not os.path.exists(self.log_path):
-            return []
+        return list(self.iter_logs(limit=limit))
 
-        with open(self.log_path, "r", encoding="utf-8") as f:
-            rows = list(csv.DictReader(f))
-        return rows
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,165 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 단계별 소요 시간(초) 히스토그램 버킷
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 현재 요청의 단계별 소요 시간 dict (asyncio 태스크·to_thread 스레드로 컨텍스트가 복사되므로 같은 dict를 공유)
+_request_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram 형식)"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    프로세스 내 메트릭 저장소입니다. 외부 의존성 없이 히스토그램/카운터를 모아 Prometheus 텍스트 형식으로 출력합니다.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple[str, tuple]:
+        return name, tuple(sorted(labels.items()))
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    @staticmethod
+    def _labels(labels: tuple, **extra) -> str:
+        items = list(labels) + list(extra.items())
+        if not items:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+    @staticmethod
+    def _number(value: float) -> str:
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(float(value))
+
+    def render(self, gauges: dict[str, dict] | None = None) -> str:
+        """
+        Prometheus 텍스트 형식(0.0.4)으로 직렬화합니다.
+
+        Args:
+            gauges (dict[str, dict] | None): {구성 요소 이름: stats() 결과}. 숫자 값만 `rag_<이름>_<키>` 게이지로 출력
+        """
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        seen = set()
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{self._labels(labels, le=self._number(bound))} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {self._number(histogram.sum)}")
+            lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{self._labels(labels)} {self._number(value)}")
+
+        for component, stats in (gauges or {}).items():
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"rag_{component}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {self._number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Metrics()
+registry.describe("rag_stage_seconds", "Per-stage latency of the /ask pipeline")
+registry.describe("rag_requests_total", "Answered /ask requests by outcome")
+registry.describe("rag_batch_stage_seconds", "Per-stage latency of /ask/batch (chunk-level and per-item stages)")
+registry.describe("rag_batch_items_total", "Answered /ask/batch questions by outcome")
+registry.describe("rag_suggest_seconds", "Latency of /suggest title lookups")
+
+
+def bind_timings(timings: dict):
+    """현재 요청(과 여기서 만든 하위 태스크)의 span이 기록될 dict를 지정합니다."""
+    return _request_timings.set(timings)
+
+
+def record(stage: str, seconds: float, timings: dict | None = None):
+    """단계 소요 시간을 히스토그램과 요청의 timings(기본: 현재 컨텍스트에 지정된 dict)에 기록합니다."""
+    registry.observe("rag_stage_seconds", seconds, stage=stage)
+    if timings is None:
+        timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = seconds
+
+
+@contextmanager
+def span(stage: str):
+    """with 블록의 소요 시간을 stage 이름으로 기록합니다. (async 함수 안에서 await를 감싸도 됨)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+async def timed(stage: str, awaitable):
+    """awaitable 하나의 소요 시간을 기록합니다. (asyncio.gather 인자로 쓰기 위한 형태)"""
+    with span(stage):
+        return await awaitable
+
+
+def server_timing(timings: dict) -> str:
+    """timings dict를 Server-Timing 헤더 값으로 변환합니다. (밀리초)"""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
@@ -0,0 +1,309 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+log = logging.getLogger(__name__)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class Priority(IntEnum):
+    """작을수록 먼저 처리됩니다."""
+
+    INTERACTIVE = 0  # 사용자 질문 (임베딩·재기술·답변 생성)
+    BULK = 1  # 코퍼스 수집 등 대량 작업
+
+
+def parse_duration(value: str | None) -> float | None:
+    """OpenAI 헤더의 기간 표기("20ms", "1s", "6m0s", "1h2m3.5s")를 초로 변환합니다."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts) if parts else None
+
+
+def estimate_message_tokens(messages: list[dict], encoding=None) -> int:
+    """채팅 메시지의 프롬프트 토큰 수를 추정합니다. (메시지당 형식 토큰 4개 + 응답 프라이밍 3개)"""
+    total = 3
+    for message in messages:
+        content = message.get("content") or ""
+        total += 4 + (len(encoding.encode(content)) if encoding is not None else len(content) // 2)
+    return total
+
+
+class TokenBucket:
+    """분당 한도(capacity)만큼 채워지고 초당 capacity/60씩 다시 차는 토큰 버킷. capacity 0이면 무제한."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def set_capacity(self, per_minute: float):
+        was_unlimited = self.unlimited
+        self.capacity = float(per_minute)
+        self.level = self.capacity if was_unlimited else min(self.level, self.capacity)
+
+    def refill(self, now: float):
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """amount만큼 꺼내려면 기다려야 하는 시간(초). 한도보다 큰 요청은 가득 찰 때까지만 기다림"""
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        return max(amount - self.level, 0.0) * 60 / self.capacity
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.level -= amount
+
+
+class Lease:
+    """획득한 호출 슬롯. 응답 헤더와 실제 토큰 사용량을 리미터에 반영할 때 사용합니다."""
+
+    def __init__(self, limiter: "RateLimiter", tokens: int, started: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.started = started
+
+    def observe(self, headers):
+        """응답의 x-ratelimit-* 헤더로 남은 한도를 맞춥니다."""
+        if headers is not None:
+            self.limiter.observe_headers(headers)
+
+    def settle(self, actual_tokens: int | None):
+        """추정치와 실제 사용 토큰 수의 차이를 토큰 버킷에 반영합니다."""
+        if actual_tokens is not None:
+            self.limiter.tokens_bucket.take(actual_tokens - self.tokens)
+            self.tokens = actual_tokens
+
+
+class RateLimiter:
+    """
+    OpenAI 호출용 공유 리미터입니다. (모델마다 한 인스턴스: 한도가 모델별로 적용되므로)
+    - AIMD 동시성: 성공할 때마다 동시 호출 한도를 조금씩(1/한도) 늘리고, 429를 받으면 절반으로 줄입니다.
+      429 응답의 Retry-After 동안은 새 호출을 보내지 않아 재시도 폭주를 막습니다.
+    - 토큰 버킷: 분당 요청 수(RPM)와 분당 토큰 수(TPM) 예산. 0이면 응답 헤더(x-ratelimit-limit-*)에서 한도를 학습합니다.
+    - 우선순위: 대기 중인 호출은 Priority 순(사용자 질문 → 대량 수집)으로 슬롯을 받습니다.
+    """
+
+    def __init__(
+        self,
+        name: str = "openai",
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        rpm: int = 0,
+        tpm: int = 0,
+        decrease_factor: float = 0.5,
+        default_retry_after: float = 1.0,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.decrease_factor = decrease_factor
+        self.default_retry_after = default_retry_after
+        self.requests_bucket = TokenBucket(rpm)
+        self.tokens_bucket = TokenBucket(tpm)
+        self._learn_rpm = rpm <= 0
+        self._learn_tpm = tpm <= 0
+        self.in_flight = 0
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_loop: asyncio.AbstractEventLoop | None = None
+        self.counts = {"calls": 0, "rate_limited": 0, "retries": 0, "errors": 0}
+
+    @property
+    def paused(self) -> bool:
+        """429의 Retry-After 동안 새 호출을 보내지 않고 멈춰 있는지 여부"""
+        return time.monotonic() < self._paused_until
+
+    # 슬롯 배분
+    def _dispatch(self):
+        now = time.monotonic()
+        self.requests_bucket.refill(now)
+        self.tokens_bucket.refill(now)
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():  # 취소된 대기자
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= int(self.concurrency):
+                return  # 다른 호출이 끝나면(release) 다시 배분
+            wait = max(
+                self._paused_until - now,
+                self.requests_bucket.wait_time(1),
+                self.tokens_bucket.wait_time(tokens),
+            )
+            if wait > 0:
+                self._schedule(wait)
+                return
+            heapq.heappop(self._waiters)
+            self.requests_bucket.take(1)
+            self.tokens_bucket.take(tokens)
+            self.in_flight += 1
+            future.set_result(now)
+
+    def _schedule(self, delay: float):
+        """delay초 뒤에 다시 배분합니다. (이미 더 이른 예약이 있으면 그대로 둠)"""
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None and self._timer_loop is loop:
+            if self._timer.when() <= when:
+                return
+            self._timer.cancel()
+        self._timer, self._timer_loop = loop.call_at(when, self._on_timer), loop
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    async def acquire(self, tokens: int = 0, priority: Priority = Priority.INTERACTIVE) -> Lease:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), tokens, future))
+        self._dispatch()
+        try:
+            started = await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 슬롯을 받은 직후 취소된 경우 반납
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+        self.counts["calls"] += 1
+        return Lease(self, tokens, started)
+
+    def release(self, lease: Lease, error: BaseException | None = None):
+        self.in_flight -= 1
+        if error is None:
+            # additive increase: 한도만큼 성공하면 한도 +1
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / max(self.concurrency, 1))
+        elif self.is_rate_limited(error):
+            self._on_rate_limited(lease, self.retry_after(error))
+        elif not isinstance(error, asyncio.CancelledError):
+            self.counts["errors"] += 1
+        self._dispatch()
+
+    def _on_rate_limited(self, lease: Lease, retry_after: float | None):
+        now = time.monotonic()
+        self.counts["rate_limited"] += 1
+        self._paused_until = max(self._paused_until, now + (retry_after or self.default_retry_after))
+        # multiplicative decrease: 마지막 감소 이후에 보낸 호출의 429에만 반응 (한 번의 폭주로 여러 번 줄이지 않음)
+        if lease.started >= self._last_decrease:
+            self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease_factor)
+            self._last_decrease = now
+            log.warning(
+                "[RateLimiter:%s] 429 수신, 동시 호출 한도 %.1f, %.2f초 대기",
+                self.name,
+                self.concurrency,
+                self._paused_until - now,
+            )
+
+    def observe_headers(self, headers):
+        """x-ratelimit-limit/remaining-* 헤더로 한도를 학습하고 남은 예산을 맞춥니다."""
+        for bucket, kind, learn in (
+            (self.requests_bucket, "requests", self._learn_rpm),
+            (self.tokens_bucket, "tokens", self._learn_tpm),
+        ):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            if learn and limit and limit.isdigit() and float(limit) != bucket.capacity:
+                bucket.set_capacity(float(limit))
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining and remaining.isdigit() and not bucket.unlimited:
+                bucket.level = min(bucket.level, float(remaining))
+
+    @staticmethod
+    def _headers(error: BaseException):
+        return getattr(getattr(error, "response", None), "headers", None)
+
+    @staticmethod
+    def is_rate_limited(error: BaseException) -> bool:
+        return getattr(error, "status_code", None) == 429
+
+    @classmethod
+    def retry_after(cls, error: BaseException) -> float | None:
+        headers = cls._headers(error)
+        if headers is None:
+            return None
+        retry_after_ms = parse_duration(headers.get("retry-after-ms"))
+        if retry_after_ms is not None:
+            return retry_after_ms / 1000
+        # 값을 읽을 수 없으면 retry-after → 요청 한도 초기화 시각 순으로 사용
+        return parse_duration(headers.get("retry-after")) or parse_duration(headers.get("x-ratelimit-reset-requests"))
+
+    @classmethod
+    def is_retryable(cls, error: BaseException) -> bool:
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            return status == 429 or status >= 500 or status == 408
+        # 타임아웃·연결 오류 (openai.APITimeoutError/APIConnectionError 포함)
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or type(error).__name__ in (
+            "APITimeoutError",
+            "APIConnectionError",
+        )
+
+    @asynccontextmanager
+    async def limit(self, tokens: int = 0, priority: Priority = Priority.INTERACTIVE):
+        """슬롯 하나를 잡고 있는 동안 호출합니다. 예외는 종류에 따라(429 등) 리미터 상태에 반영됩니다."""
+        lease = await self.acquire(tokens, priority)
+        try:
+            yield lease
+        except BaseException as e:
+            self.release(lease, error=e)
+            raise
+        self.release(lease)
+
+    async def run(
+        self,
+        call,
+        tokens: int = 0,
+        priority: Priority = Priority.INTERACTIVE,
+        max_attempts: int = 3,
+        timeout: float | None = None,
+    ):
+        """
+        call(lease)를 리미터 안에서 실행하고, 재시도 가능한 오류면 다시 시도합니다.
+        429는 Retry-After 동안 리미터 전체가 멈추므로 따로 잠들지 않고, 그 외 오류는 지수 백오프 후 재시도합니다.
+        마지막 시도가 실패하면 기다리지 않고 바로 예외를 올립니다.
+        """
+        for attempt in range(1, max_attempts + 1):
+            try:
+                async with self.limit(tokens, priority) as lease:
+                    return await asyncio.wait_for(call(lease), timeout) if timeout else await call(lease)
+            except Exception as e:
+                if attempt == max_attempts or not self.is_retryable(e):
+                    raise
+                self.counts["retries"] += 1
+                log.info("[RateLimiter:%s] %d/%d회차 실패, 재시도: %s", self.name, attempt, max_attempts, e)
+                if not self.is_rate_limited(e):
+                    await asyncio.sleep(min(2**attempt, 30))
+
+    def stats(self) -> dict:
+        return {
+            **self.counts,
+            "concurrency_limit": round(self.concurrency, 2),
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for *_, future in self._waiters if not future.done()),
+            "rpm_limit": self.requests_bucket.capacity,
+            "tpm_limit": self.tokens_bucket.capacity,
+        }
@@ -0,0 +1,57 @@
+import time
+
+
+class RedisSessionStore:
+    """
+    asyncio Redis 클라이언트(공유 커넥션 풀)를 사용하는 세션 저장소입니다.
+    한 턴의 메시지 추가·길이 제한·TTL 설정을 하나의 파이프라인(왕복 1회)으로 처리합니다.
+    """
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    async def append(self, key: str, values: list[str], max_length: int, ttl: int | None = None):
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, *values)
+            pipe.ltrim(key, -max_length, -1)  # 최신 max_length개만 유지
+            if ttl:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def range(self, key: str) -> list[str]:
+        return await self.redis_client.lrange(key, 0, -1)
+
+    async def ping(self):
+        await self.redis_client.ping()
+
+    async def close(self):
+        await self.redis_client.aclose()
+
+
+class InMemorySessionStore:
+    """
+    RedisSessionStore와 같은 인터페이스의 프로세스 내 세션 저장소입니다. (테스트·벤치마크용)
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[list[str], float | None]] = {}
+
+    def _alive(self, key: str) -> list[str]:
+        values, expires_at = self._data.get(key, ([], None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return []
+        return values
+
+    async def append(self, key: str, values: list[str], max_length: int, ttl: int | None = None):
+        merged = (self._alive(key) + list(values))[-max_length:]
+        self._data[key] = (merged, time.monotonic() + ttl if ttl else None)
+
+    async def range(self, key: str) -> list[str]:
+        return list(self._alive(key))
+
+    async def ping(self):
+        return True
+
+    async def close(self):
+        self._data.clear()
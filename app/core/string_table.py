@@ -0,0 +1,118 @@
+import json
+import mmap
+import os
+from collections.abc import Sequence
+
+import numpy as np
+
+
+def save_array(path: str, array: np.ndarray):
+    """.npy 파일을 새 파일에 쓴 뒤 교체합니다. (다른 프로세스가 mmap 중인 기존 파일은 그대로 유효)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, path)
+
+
+def save_json(path: str, data: dict):
+    """JSON 파일을 새 파일에 쓴 뒤 교체합니다. (여러 프로세스가 동시에 저장해도 임시 파일이 겹치지 않음)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_array(path: str) -> np.ndarray:
+    """.npy 파일을 읽기 전용 mmap으로 엽니다. (np.memmap 서브클래스는 슬라이싱이 느려 같은 매핑의 ndarray 뷰로 반환)"""
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+
+class StringTable(Sequence):
+    """
+    문자열 목록을 UTF-8 바이트 블롭 하나(`<이름>.bin`)와 오프셋 배열(`<이름>.offsets.npy`)로 저장하는 읽기 전용 테이블.
+    load()는 두 파일을 mmap으로 열기 때문에 파이썬 str 객체를 만들지 않고,
+    여러 워커 프로세스가 같은 페이지 캐시를 공유합니다. 항목은 접근할 때만 디코딩합니다.
+    """
+
+    def __init__(self, blob, offsets: np.ndarray):
+        self._blob = blob  # bytes 또는 mmap.mmap (슬라이스하면 bytes)
+        self.offsets = offsets
+        self._bounds = memoryview(offsets)  # 원소 접근이 numpy 스칼라 인덱싱보다 빠름 (int 반환)
+        self._count = len(offsets) - 1
+
+    @classmethod
+    def from_strings(cls, strings) -> "StringTable":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    @classmethod
+    def load(cls, path: str) -> "StringTable | None":
+        blob_path, offsets_path = f"{path}.bin", f"{path}.offsets.npy"
+        if not (os.path.exists(blob_path) and os.path.exists(offsets_path)):
+            return None
+        offsets = load_array(offsets_path)
+        with open(blob_path, "rb") as f:
+            # 파일을 닫아도 매핑은 유지됨
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        if len(blob) != int(offsets[-1]):
+            return None  # 저장 도중 등 짝이 맞지 않는 파일
+        return cls(blob, offsets)
+
+    def save(self, path: str):
+        tmp_path = f"{path}.bin.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.raw_blob())
+        os.replace(tmp_path, f"{path}.bin")
+        save_array(f"{path}.offsets.npy", self.offsets)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def raw(self, row: int) -> bytes:
+        return self._blob[self._bounds[row] : self._bounds[row + 1]]
+
+    def raw_blob(self) -> bytes:
+        return self._blob[: int(self.offsets[-1])]
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self.raw(row).decode("utf-8")
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.raw(row).decode("utf-8")
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, StringTable):
+            return np.array_equal(self.offsets, other.offsets) and self.raw_blob() == other.raw_blob()
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def find(self, value: str, order: np.ndarray | None = None) -> int | None:
+        """
+        정렬된 테이블에서 value의 행 번호를 이진 탐색으로 찾습니다. 없으면 None.
+        order가 주어지면 `self[order[i]]`가 정렬 순서라고 보고 찾습니다. (UTF-8 바이트 순서 = 코드 포인트 순서)
+        """
+        target = value.encode("utf-8")
+        blob, bounds = self._blob, self._bounds
+        rows = memoryview(order) if order is not None else range(self._count)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = rows[mid]
+            if blob[bounds[row] : bounds[row + 1]] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._count:
+            return None
+        row = rows[lo]
+        return int(row) if blob[bounds[row] : bounds[row + 1]] == target else None
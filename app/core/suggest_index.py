@@ -0,0 +1,126 @@
+import bisect
+import hashlib
+import math
+import re
+import unicodedata
+
+import numpy as np
+
+_WORD_PATTERN = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+# 순위 단계 (작을수록 앞)
+MATCHES = ("exact", "prefix", "word_prefix", "substring", "fuzzy")
+
+
+def normalize_words(text: str) -> list[str]:
+    """NFKC 정규화·소문자 변환 후 영문/숫자/한글 단어만 남깁니다. (문장부호·띄어쓰기 차이 무시)"""
+    return _WORD_PATTERN.findall(unicodedata.normalize("NFKC", text).lower())
+
+
+def _bigrams(compact: str) -> set[str]:
+    return {compact[i : i + 2] for i in range(len(compact) - 1)}
+
+
+class SuggestIndex:
+    """
+    FAQ 제목 자동완성(type-ahead)용 프로세스 내 인덱스입니다.
+    서버 시작 시 제목 컬렉션으로 만들고 메모리에서만 검색합니다.
+    제목은 단어만 남겨 공백 없이 이어 붙인 형태(compact)로 비교하므로 띄어쓰기가 달라도 찾습니다.
+    - 접두사: 제목 compact 문자열과 (두 번째 이후) 단어 시작 위치부터의 compact 문자열을 각각 정렬해 두고 이진 탐색
+    - 부분 일치: 글자 bigram → 제목 행 번호 posting을 bincount로 합산해,
+      입력 bigram의 일정 비율 이상이 겹치는 제목을 찾음
+    순위는 완전 일치 > 제목 접두사 > 단어 접두사 > 부분 문자열 > bigram 겹침 비율 순이며, 같으면 짧은 제목이 앞입니다.
+    """
+
+    def __init__(self, min_overlap: float = 0.5, max_prefix_matches: int = 2000):
+        self.min_overlap = min_overlap
+        self.max_prefix_matches = max_prefix_matches  # 한두 글자 입력에서 단어 접두사 후보를 모두 훑지 않도록 제한
+        self.ids: list[str] = []
+        self.titles: list[str] = []
+        self.version = ""  # 인덱스를 만든 코퍼스 버전 (ETag에 사용)
+        self._compact: list[str] = []
+        self._title_keys: list[str] = []  # 정렬된 제목 compact 문자열 (제목 접두사·완전 일치)
+        self._title_rows: list[int] = []
+        self._word_keys: list[str] = []  # 정렬된 (두 번째 이후 단어 시작 위치부터의) compact 접미사
+        self._word_rows: list[int] = []
+        self._grams: dict[str, np.ndarray] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, ids: list[str], titles: list[str], version: str = ""):
+        compact, title_entries, word_entries, grams = [], [], [], {}
+        for row, title in enumerate(titles):
+            words = normalize_words(title)
+            compact.append("".join(words))
+            if words:
+                title_entries.append((compact[-1], row))
+            word_entries.extend(("".join(words[i:]), row) for i in range(1, len(words)))
+            for gram in _bigrams(compact[-1]):
+                grams.setdefault(gram, []).append(row)
+        title_entries.sort()
+        word_entries.sort()
+        # 검색 중인 요청이 중간 상태를 보지 않도록 다 만든 뒤 한꺼번에 교체
+        self._title_keys = [key for key, _ in title_entries]
+        self._title_rows = [row for _, row in title_entries]
+        self._word_keys = [key for key, _ in word_entries]
+        self._word_rows = [row for _, row in word_entries]
+        self._grams = {gram: np.asarray(rows, dtype=np.int64) for gram, rows in grams.items()}
+        self._compact = compact
+        self.ids, self.titles, self.version = list(ids), list(titles), version
+
+    def cache_key(self, query: str, limit: int) -> str:
+        """같은 인덱스 버전에서 같은 결과를 내는 (질의, limit)에 대해 같은 값을 반환합니다. (ETag용)"""
+        digest = hashlib.sha1(f"{''.join(normalize_words(query))}\x00{limit}".encode("utf-8")).hexdigest()[:16]
+        return f"{self.version}-{digest}"
+
+    @staticmethod
+    def _prefix_range(keys: list[str], prefix: str) -> tuple[int, int]:
+        """정렬된 keys에서 prefix로 시작하는 구간 [lo, hi)"""
+        return bisect.bisect_left(keys, prefix), bisect.bisect_left(keys, prefix + "\U0010ffff")
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        입력 중인 질문과 맞는 FAQ 제목을 순위대로 반환합니다.
+
+        Returns:
+            list[dict]: [{"id": 문서 id, "title": 제목, "match": exact|prefix|word_prefix|substring|fuzzy}]
+        """
+        compact = "".join(normalize_words(query))
+        if not compact or limit <= 0 or not self.is_ready:
+            return []
+        ranks: dict[int, tuple] = {}  # 행 번호 → 정렬 키 (작을수록 앞)
+
+        # 1. 제목 접두사(완전 일치 포함): 순위가 가장 높으므로 구간 전체를 훑음
+        lo, hi = self._prefix_range(self._title_keys, compact)
+        for row in self._title_rows[lo:hi]:
+            title = self._compact[row]
+            ranks[row] = (0 if title == compact else 1, 0.0, len(title), row)
+
+        # 2. 단어 접두사: 한두 글자 입력에서는 구간이 길어지므로 max_prefix_matches개까지만
+        lo, hi = self._prefix_range(self._word_keys, compact)
+        for row in self._word_rows[lo : min(hi, lo + self.max_prefix_matches)]:
+            if row not in ranks:
+                ranks[row] = (2, 0.0, len(self._compact[row]), row)
+
+        # 3. 접두사로 limit을 못 채우면 bigram 겹침으로 보충 (단어 중간부터 입력하거나 오타가 있는 경우)
+        grams = _bigrams(compact)
+        postings = [self._grams[gram] for gram in grams if gram in self._grams]
+        if len(ranks) < limit and postings:
+            hits = np.bincount(np.concatenate(postings), minlength=len(self.ids))
+            for row in np.flatnonzero(hits >= max(math.ceil(len(grams) * self.min_overlap), 1)):
+                row = int(row)
+                if row in ranks:
+                    continue
+                title = self._compact[row]
+                match = 3 if compact in title else 4
+                ranks[row] = (match, -hits[row] / len(grams), len(title), row)
+
+        ranked = sorted(ranks.values())[:limit]
+        return [
+            {"id": self.ids[row], "title": self.titles[row], "match": MATCHES[match]} for match, _, _, row in ranked
+        ]
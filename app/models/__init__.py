@@ -1,3 +1,3 @@
-from .schemas import QueryInput
+from .schemas import BatchQueryInput, BatchQuestion, QueryInput
 
-__all__ = ["QueryInput"]
+__all__ = ["QueryInput", "BatchQueryInput", "BatchQuestion"]
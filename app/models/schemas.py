@@ -1,3 +1,5 @@
+from typing import Annotated, Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -5,10 +7,38 @@ class QueryInput(BaseModel):
     """QueryInput 모델은 사용자의 질문과 세션 ID를 포함합니다.
     question: 사용자의 질문 내용
     session_id: 현재 대화 세션의 고유 식별자
+    protocol: 스트리밍 프로토콜 버전 (1: 누적 partial 전송, 2: delta SSE). 기존 클라이언트 호환을 위해 기본값은 1
     """
 
     question: str
     session_id: str
+    protocol: Literal[1, 2] = 1
+
+
+class BatchQuestion(BaseModel):
+    """BatchQuestion 모델은 일괄 답변할 질문 하나입니다.
+    question: 질문 내용
+    id: 결과와 짝을 맞추기 위한 식별자 (선택, 결과에 그대로 포함)
+    """
+
+    question: str = Field(..., min_length=1)
+    id: str | None = None
+
+
+class BatchQueryInput(BaseModel):
+    """BatchQueryInput 모델은 /ask/batch 요청입니다. (대량 평가·백필용)
+    questions: 질문 목록 (문자열 또는 {"question", "id"})
+    concurrency: 동시에 생성할 답변 수 (기본값·상한: BATCH_MAX_CONCURRENCY)
+    """
+
+    questions: list[BatchQuestion | Annotated[str, Field(min_length=1)]] = Field(..., min_length=1)
+    concurrency: int | None = Field(None, ge=1)
+
+    def items(self) -> list[dict]:
+        return [
+            {"question": q, "id": None} if isinstance(q, str) else {"question": q.question, "id": q.id}
+            for q in self.questions
+        ]
 
 
 class AnswerAndFollowup(BaseModel):
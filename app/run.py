@@ -1,4 +1,7 @@
-from api import ask, logs
+import logging
+from contextlib import asynccontextmanager
+
+from api import ask, health, logs, metrics, suggest
 from containers import Container
 from dotenv import load_dotenv
 from fastapi import FastAPI
@@ -6,10 +9,31 @@ from fastapi import FastAPI
 load_dotenv()
 
 container = Container()
-container.wire(modules=["api.ask", "api.logs"])
-app = FastAPI()
+container.wire(modules=["api.ask", "api.health", "api.logs", "api.metrics", "api.suggest"])
+
+logging.basicConfig(
+    level=container.config().LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+# OpenAI SDK가 쓰는 httpx의 요청별 INFO 로그는 핫패스 노이즈이므로 경고 이상만 출력
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 모델·인덱스·컬렉션을 첫 요청 전에 한 번만 로드하고 워밍업
+    lifecycle = container.lifecycle()
+    await lifecycle.startup()
+    yield
+    await lifecycle.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.container = container
 
 app.include_router(ask.router)
+app.include_router(health.router)
 app.include_router(logs.router)
+app.include_router(metrics.router)
+app.include_router(suggest.router)
@@ -0,0 +1,84 @@
+"""
+질문 파일을 서버 없이 프로세스 안에서 일괄 답변해 JSON Lines로 저장합니다. (대량 평가·백필용, /ask/batch와 같은 서비스)
+입력은 한 줄에 질문 하나, 또는 {"question": ..., "id": ...} JSON Lines 형식입니다.
+결과는 끝난 순서대로 한 줄씩 쓰며(index로 입력 순서 확인), 진행 상황과 요약은 stderr로 출력합니다.
+
+사용법 (app/ 디렉토리에서):
+    python -m scripts.ask_batch questions.jsonl --output answers.jsonl
+    python -m scripts.ask_batch questions.txt --concurrency 8 > answers.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import numpy as np
+from containers import Container
+
+
+def load_items(path: str) -> list[dict]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                row = json.loads(line)
+                items.append({"question": row["question"], "id": row.get("id")})
+            else:
+                items.append({"question": line, "id": None})
+    if not items:
+        raise ValueError(f"질문 파일이 비어 있습니다: {path}")
+    return items
+
+
+async def run(args):
+    container = Container()
+    batch_service = container.batch_service()
+    items = load_items(args.input)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    totals, errors = [], 0
+    started = time.perf_counter()
+    try:
+        async for result in batch_service.answer_batch(items, concurrency=args.concurrency):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            totals.append(result["timings"]["total"])
+            errors += result["error"] is not None
+            if len(totals) % args.progress_every == 0:
+                print(f"[{len(totals)}/{len(items)}] 오류 {errors}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        await container.rerank_scheduler().close()
+        container.embedding_cache().close()
+
+    elapsed = time.perf_counter() - started
+    p50, p95 = np.percentile(totals, [50, 95]) if totals else (0.0, 0.0)
+    summary = {
+        "questions": len(items),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "questions_per_s": round(len(totals) / elapsed, 2) if elapsed else None,
+        "item_total_p50_s": round(float(p50), 3),
+        "item_total_p95_s": round(float(p95), 3),
+    }
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="질문 파일 (텍스트 또는 JSON Lines)")
+    parser.add_argument("--output", default=None, help="결과 JSON Lines 경로 (기본값: stdout)")
+    parser.add_argument(
+        "--concurrency", type=int, default=None, help="동시 답변 생성 수 (기본값: BATCH_MAX_CONCURRENCY)"
+    )
+    parser.add_argument("--progress-every", type=int, default=50, help="진행 상황 출력 간격(질문 수)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Chroma 2단계 조회(제목 query → 전체 QA get)와 프로세스 내 NumPy dense 인덱스의 지연 시간과 결과 일치도를 비교합니다.
+질문 임베딩은 저장된 제목 임베딩에 노이즈를 더해 만들므로 임베딩 API를 호출하지 않습니다.
+
+사용법 (app/ 디렉토리에서, 수집(scripts.ingest)을 마친 뒤):
+    python -m scripts.bench_dense --queries 200 --top-k 5
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from containers import Container
+from core import DenseIndex
+
+
+def percentile_ms(latencies: list[float], q: float) -> float:
+    return float(np.percentile(latencies, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.02, help="질문 임베딩에 더할 가우시안 노이즈 표준편차")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    container = Container()
+    config = container.config()
+    chromadb_client = container.chromadb_client()
+    document_store = container.document_store()
+    title_collection = chromadb_client.get_or_create_collection(name=config.TITLE_COLLECTION_NAME)
+    full_collection = chromadb_client.get_or_create_collection(name=config.FULL_COLLECTION_NAME)
+
+    resp = title_collection.get(include=["embeddings"])
+    if not len(resp["ids"]):
+        raise SystemExit("제목 컬렉션이 비어 있습니다. 먼저 python -m scripts.ingest 를 실행하세요.")
+    embeddings = np.asarray(resp["embeddings"], dtype=np.float32)
+    embedding_by_id = dict(zip(resp["ids"], embeddings))
+    rng = np.random.default_rng(args.seed)
+    picks = rng.choice(len(embeddings), size=args.queries, replace=len(embeddings) < args.queries)
+    queries = embeddings[picks] + rng.normal(0, args.noise, size=(args.queries, embeddings.shape[1]))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32).tolist()
+
+    def chroma_search(query):
+        ids = title_collection.query(query_embeddings=[query], n_results=args.top_k)["ids"][0]
+        docs = full_collection.get(ids=ids)
+        return ids, docs["documents"]
+
+    engines = {"chroma": chroma_search}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for dtype in ("float32", "float16"):
+            index_dir = os.path.join(tmp_dir, dtype)
+            index = DenseIndex(index_dir, dtype=dtype)
+            index.build(document_store.ids, [embedding_by_id.get(doc_id) for doc_id in document_store.ids])
+            index.save()
+            index = DenseIndex(index_dir, dtype=dtype)  # 실제 서버처럼 mmap으로 다시 읽기
+
+            def numpy_search(query, index=index):
+                rows = [row for row, _ in index.search(query, args.top_k)]
+                return [document_store.ids[row] for row in rows], [document_store.documents[row] for row in rows]
+
+            engines[f"numpy-{dtype}"] = numpy_search
+
+        results = {}
+        for name, search in engines.items():
+            search(queries[0])  # 워밍업
+            latencies, hits = [], []
+            for query in queries:
+                start = time.perf_counter()
+                ids, _ = search(query)
+                latencies.append(time.perf_counter() - start)
+                hits.append(ids)
+            results[name] = (latencies, hits)
+
+    print(f"documents={len(document_store)} dim={embeddings.shape[1]} queries={args.queries} top_k={args.top_k}")
+    baseline = results["chroma"][1]
+    for name, (latencies, hits) in results.items():
+        overlap = statistics.mean(len(set(a) & set(b)) / args.top_k for a, b in zip(hits, baseline))
+        print(
+            f"{name:>15}: p50={percentile_ms(latencies, 50):.3f}ms p95={percentile_ms(latencies, 95):.3f}ms "
+            f"overlap@{args.top_k} vs chroma={overlap:.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
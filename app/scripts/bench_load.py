@@ -0,0 +1,373 @@
+"""
+오프라인 종단간(end-to-end) 부하 벤치마크입니다.
+가짜 OpenAI 서버(scripts.fake_openai)와 FastAPI 앱(uvicorn)을 띄운 뒤, 질문 워크로드를 동시성 단계별로 재생해
+처리량(RPS), 첫 토큰 시간/전체 지연 p50·p95·p99, 워커별 CPU·RSS·USS를 JSON으로 출력합니다.
+인덱스·캐시·로그는 --work-dir 아래에 따로 만들어 실제 임베딩 캐시를 가짜 벡터로 오염시키지 않습니다.
+
+사용법 (app/ 디렉토리에서, DOC_PATH 등은 .env 사용):
+    python -m scripts.bench_load --concurrency 1,8,32 --requests 200 --workers 2 --output bench.json
+    python -m scripts.bench_load --baseline bench.json --tolerance 0.15   # 기준 대비 회귀 시 종료 코드 1
+    python -m scripts.bench_load --app-env DENSE_BACKEND=numpy --app-env RERANKER_BACKEND=onnx
+    python -m scripts.bench_load --workers 4 --prefork --app-env DENSE_BACKEND=numpy   # 워커별 USS 비교
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import httpx
+import numpy as np
+import psutil
+from scripts.worker_memory import process_memory, worker_processes
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_QUESTIONS = [
+    "스마트스토어 판매자 가입은 어떻게 하나요?",
+    "주문을 취소하면 환불은 언제 되나요?",
+    "상품 등록 시 카테고리를 잘못 선택했어요.",
+    "정산 예정일은 어디서 확인하나요?",
+    "반품 배송비는 누가 부담하나요?",
+    "스토어 이름을 변경할 수 있나요?",
+    "미성년자도 판매자로 가입할 수 있나요?",
+    "배송지 변경 요청은 어떻게 처리하나요?",
+    "상품 상세페이지에 동영상을 넣을 수 있나요?",
+    "사업자 정보가 바뀌면 어떻게 수정하나요?",
+    "구매확정은 언제 자동으로 되나요?",
+    "오늘 저녁 메뉴 추천해줘",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float, process: subprocess.Popen):
+    """url이 200을 돌려줄 때까지 기다립니다. (앱은 /readyz: 코퍼스 수집·인덱스 로드가 끝나야 준비됨)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"프로세스가 종료되었습니다 (exit {process.returncode}): {' '.join(process.args)}")
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} 이(가) {timeout}초 안에 준비되지 않았습니다.")
+
+
+def stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def load_questions(path: str | None) -> list[str]:
+    """한 줄에 질문 하나(또는 {"question": ...} JSON Lines) 형식의 워크로드 파일을 읽습니다."""
+    if path is None:
+        return DEFAULT_QUESTIONS
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            questions.append(json.loads(line)["question"] if line.startswith("{") else line)
+    if not questions:
+        raise ValueError(f"워크로드 파일이 비어 있습니다: {path}")
+    return questions
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 1), "p95": round(p95, 1), "p99": round(p99, 1), "mean": round(np.mean(values), 1)}
+
+
+class ResourceSampler:
+    """앱 워커 프로세스들의 CPU 사용률(코어 단위 %)과 최대 RSS를 주기적으로 측정하고, 끝날 때 USS를 잽니다."""
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.interval = interval
+        self.processes = worker_processes(pid)
+        self._max_rss = {p.pid: 0 for p in self.processes}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            for process in self.processes:
+                try:
+                    self._max_rss[process.pid] = max(self._max_rss[process.pid], process.memory_info().rss)
+                except psutil.NoSuchProcess:
+                    pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._cpu_start = {p.pid: sum(p.cpu_times()[:2]) for p in self.processes}
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        elapsed = time.perf_counter() - self._started
+        self.workers = []
+        for process in self.processes:
+            try:
+                cpu = sum(process.cpu_times()[:2]) - self._cpu_start[process.pid]
+                uss = process_memory(process)["uss_mb"]
+            except psutil.NoSuchProcess:
+                cpu, uss = 0.0, 0.0
+            self.workers.append(
+                {
+                    "pid": process.pid,
+                    "cpu_percent": round(100 * cpu / elapsed, 1),
+                    "rss_mb_max": round(self._max_rss[process.pid] / 2**20, 1),
+                    "uss_mb": uss,
+                }
+            )
+
+
+async def ask_once(client: httpx.AsyncClient, question: str) -> dict:
+    """질문 하나를 스트리밍으로 요청해 첫 답변 토큰 시간과 전체 시간을 잽니다. (프로토콜 v2)"""
+    start = time.perf_counter()
+    ttft = None
+    try:
+        payload = {"question": question, "session_id": f"bench-{uuid.uuid4().hex}", "protocol": 2}
+        async with client.stream("POST", "/ask/stream", json=payload) as response:
+            if response.status_code != 200:
+                return {"ok": False, "error": f"HTTP {response.status_code}"}
+            async for line in response.aiter_lines():
+                if ttft is None and line in ("event: delta", "event: reset"):
+                    ttft = time.perf_counter() - start
+    except httpx.HTTPError as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    total = time.perf_counter() - start
+    return {"ok": True, "ttft_ms": (ttft if ttft is not None else total) * 1000, "total_ms": total * 1000}
+
+
+async def run_level(base_url: str, questions: list[str], concurrency: int, n_requests: int, timeout: float) -> dict:
+    """동시 요청 concurrency개를 유지하며 n_requests개를 보냅니다."""
+    results = []
+    next_index = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal next_index
+        while next_index < n_requests:
+            question = questions[next_index % len(questions)]
+            next_index += 1
+            results.append(await ask_once(client, question))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["ok"]]
+    errors = [r["error"] for r in results if not r["ok"]]
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "seconds": round(elapsed, 2),
+        "rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "ttft_ms": percentiles([r["ttft_ms"] for r in ok]),
+        "total_ms": percentiles([r["total_ms"] for r in ok]),
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """같은 동시성 단계끼리 비교해 RPS 감소나 p95 지연 증가가 tolerance(비율)를 넘으면 회귀로 보고합니다."""
+    base_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    regressions = []
+    for level in current["levels"]:
+        base = base_levels.get(level["concurrency"])
+        if base is None:
+            continue
+        c = level["concurrency"]
+        if base["rps"] and level["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"c={c} rps {base['rps']} → {level['rps']}")
+        for metric in ("ttft_ms", "total_ms"):
+            before, after = base[metric]["p95"], level[metric]["p95"]
+            if before and after and after > before * (1 + tolerance):
+                regressions.append(f"c={c} {metric}.p95 {before} → {after}")
+        if level["errors"] > base["errors"]:
+            regressions.append(f"c={c} errors {base['errors']} → {level['errors']}")
+    return regressions
+
+
+def print_table(result: dict):
+    print(
+        f"{'conc':>5} {'reqs':>5} {'err':>4} {'rps':>8} {'ttft p50':>9} {'ttft p95':>9} {'ttft p99':>9}"
+        f" {'tot p50':>9} {'tot p95':>9} {'tot p99':>9}  workers(cpu%/rssMB/ussMB)",
+        file=sys.stderr,
+    )
+    for level in result["levels"]:
+        ttft, total = level["ttft_ms"], level["total_ms"]
+        workers = " ".join(f"{w['cpu_percent']}/{w['rss_mb_max']}/{w.get('uss_mb')}" for w in level["workers"])
+        print(
+            f"{level['concurrency']:>5} {level['requests']:>5} {level['errors']:>4} {level['rps']:>8}"
+            f" {ttft['p50']!s:>9} {ttft['p95']!s:>9} {ttft['p99']!s:>9}"
+            f" {total['p50']!s:>9} {total['p95']!s:>9} {total['p99']!s:>9}  {workers}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="쉼표로 구분한 동시성 단계")
+    parser.add_argument("--requests", type=int, default=200, help="단계별 요청 수")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--questions", default=None, help="워크로드 파일 (한 줄에 질문 하나 또는 JSON Lines)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 수")
+    parser.add_argument(
+        "--prefork", action="store_true", help="scripts.serve로 실행 (모델·인덱스를 fork 전에 로드해 공유)"
+    )
+    parser.add_argument("--session-backend", default="memory", choices=["memory", "redis"])
+    parser.add_argument("--reranker", default="none", help="RERANKER_BACKEND (none: 모델 없이 융합 순위 유지)")
+    parser.add_argument("--answer-cache", action="store_true", help="응답 캐시 사용 (기본: 끔, 매 요청 생성)")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="앱 설정 덮어쓰기")
+    parser.add_argument("--work-dir", default="bench_data", help="벤치마크용 인덱스·캐시·로그 디렉토리")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-interval-ms", type=float, default=20)
+    parser.add_argument("--embedding-ms", type=float, default=50)
+    parser.add_argument("--slow-prob", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=5000)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--timeout", type=float, default=120, help="요청당 타임아웃(초)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로 (없으면 stdout)")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="회귀로 볼 변화 비율")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    questions = load_questions(args.questions)
+    work_dir = os.path.abspath(args.work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+
+    fake_port, app_port = free_port(), free_port()
+    fake = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "scripts.fake_openai",
+            f"--port={fake_port}",
+            f"--first-token-ms={args.first_token_ms}",
+            f"--token-interval-ms={args.token_interval_ms}",
+            f"--embedding-ms={args.embedding_ms}",
+            f"--slow-prob={args.slow_prob}",
+            f"--slow-ms={args.slow_ms}",
+            "--seed=0",
+        ],
+        cwd=APP_DIR,
+    )
+    app_env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+        "LLM_FALLBACK_BASE_URL": "",
+        "SESSION_BACKEND": args.session_backend,
+        "RERANKER_BACKEND": args.reranker,
+        "ANSWER_CACHE_ENABLED": str(args.answer_cache).lower(),
+        "CHROMA_DIR": os.path.join(work_dir, "chroma"),
+        "INDEX_DIR": os.path.join(work_dir, "indexes"),
+        "EMBEDDING_CACHE_PATH": os.path.join(work_dir, "embedding_cache.sqlite3"),
+        "LOG_PATH": os.path.join(work_dir, "chat_log.sqlite3"),
+        "LOG_LEVEL": "WARNING",
+    }
+    if args.session_backend == "memory":
+        # 메모리 세션이면 Redis 접속 정보는 쓰이지 않지만 필수 설정이므로 기본값만 채움
+        for key, value in (("REDIS_HOST", "localhost"), ("REDIS_PORT", "6379"), ("REDIS_DB", "0")):
+            app_env.setdefault(key, value)
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        app_env[key] = value
+    app = None
+    try:
+        wait_ready(f"http://127.0.0.1:{fake_port}/stats", 30, fake)
+        server = ["scripts.serve"] if args.prefork else ["uvicorn", "run:app"]
+        app = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                *server,
+                "--host=127.0.0.1",
+                f"--port={app_port}",
+                f"--workers={args.workers}",
+                "--log-level=warning",
+            ],
+            cwd=APP_DIR,
+            env=app_env,
+        )
+        base_url = f"http://127.0.0.1:{app_port}"
+        wait_ready(f"{base_url}/readyz", args.startup_timeout, app)
+        if args.warmup:
+            asyncio.run(run_level(base_url, questions, min(args.warmup, max(levels)), args.warmup, args.timeout))
+
+        result = {
+            "config": {
+                "workers": args.workers,
+                "prefork": args.prefork,
+                "requests_per_level": args.requests,
+                "questions": len(questions),
+                "session_backend": args.session_backend,
+                "reranker": args.reranker,
+                "answer_cache": args.answer_cache,
+                "app_env": args.app_env,
+                "fake_openai": {
+                    "first_token_ms": args.first_token_ms,
+                    "token_interval_ms": args.token_interval_ms,
+                    "embedding_ms": args.embedding_ms,
+                    "slow_prob": args.slow_prob,
+                    "slow_ms": args.slow_ms,
+                },
+                "cpu_count": psutil.cpu_count(),
+            },
+            "levels": [],
+        }
+        for concurrency in levels:
+            with ResourceSampler(app.pid) as sampler:
+                level = asyncio.run(run_level(base_url, questions, concurrency, args.requests, args.timeout))
+            level["workers"] = sampler.workers
+            result["levels"].append(level)
+    finally:
+        if app is not None:
+            stop(app)
+        stop(fake)
+
+    print_table(result)
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), result, args.tolerance)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
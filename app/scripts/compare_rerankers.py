@@ -0,0 +1,96 @@
+"""
+PyTorch CrossEncoder와 int8 양자화 ONNX Runtime 리랭커의 점수 일치도와 지연 시간을 비교합니다.
+
+사용법 (app/ 디렉토리에서):
+    python -m scripts.compare_rerankers --index-dir chroma_db/indexes --queries 50
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+from core.document_store import DocumentStore
+from services.reranker import load_reranker
+
+SAMPLE_DOCUMENTS = [
+    "Q: 스마트스토어 판매자 가입은 어떻게 하나요?\nA: 판매자센터에서 개인/사업자 유형을 선택해 가입할 수 있습니다.",
+    "Q: 주문을 취소하면 환불은 언제 되나요?\nA: 취소 승인 후 영업일 기준 3~5일 내 환불됩니다.",
+    "Q: 상품 등록 시 카테고리를 잘못 선택했어요.\nA: 상품 수정 화면에서 카테고리를 변경할 수 있습니다.",
+    "Q: 정산 예정일은 어디서 확인하나요?\nA: 정산관리 메뉴의 정산 내역에서 정산 예정일을 확인할 수 있습니다.",
+    "Q: 반품 배송비는 누가 부담하나요?\nA: 구매자 단순 변심은 구매자가, 상품 하자는 판매자가 부담합니다.",
+    "Q: 스마트스토어 이름을 변경할 수 있나요?\nA: 스토어 이름은 1회에 한해 변경할 수 있습니다.",
+]
+
+
+def title_of(document: str) -> str:
+    first_line = document.split("\n", 1)[0]
+    return first_line[2:].strip() if first_line.startswith("Q:") else first_line[:50]
+
+
+def build_pairs(documents: list[str], n_queries: int, n_candidates: int, seed: int) -> list[list[tuple[str, str]]]:
+    """문서 제목을 질문으로 쓰고, 정답 문서 + 무작위 문서로 후보군을 만듭니다."""
+    rng = random.Random(seed)
+    groups = []
+    for document in rng.sample(documents, min(n_queries, len(documents))):
+        others = rng.sample(documents, min(n_candidates - 1, len(documents)))
+        candidates = [document] + [d for d in others if d != document]
+        groups.append([(title_of(document), candidate) for candidate in candidates])
+    return groups
+
+
+def rank(values: np.ndarray) -> np.ndarray:
+    ranks = np.empty(len(values))
+    ranks[np.argsort(values)] = np.arange(len(values))
+    return ranks
+
+
+def time_reranker(reranker, groups, repeat: int) -> tuple[list[np.ndarray], list[float]]:
+    scores = [np.asarray(reranker.predict(pairs, batch_size=64, show_progress_bar=False)) for pairs in groups]
+    latencies = []
+    for _ in range(repeat):
+        for pairs in groups:
+            start = time.perf_counter()
+            reranker.predict(pairs, batch_size=64, show_progress_bar=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return scores, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="BAAI/bge-reranker-base")
+    parser.add_argument("--index-dir", default="chroma_db/indexes", help="FAQ 문서를 읽을 인덱스 디렉토리")
+    parser.add_argument("--onnx-dir", default="models/reranker_onnx")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op 스레드 수")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=15, help="질문당 (질문, 문서) 쌍 수")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    documents = DocumentStore(args.index_dir).documents or SAMPLE_DOCUMENTS
+    groups = build_pairs(documents, args.queries, args.candidates, args.seed)
+
+    torch_reranker = load_reranker(args.model, backend="torch")
+    onnx_reranker = load_reranker(args.model, backend="onnx", onnx_dir=args.onnx_dir, num_threads=args.threads)
+    torch_scores, torch_latency = time_reranker(torch_reranker, groups, args.repeat)
+    onnx_scores, onnx_latency = time_reranker(onnx_reranker, groups, args.repeat)
+
+    flat_torch = np.concatenate(torch_scores)
+    flat_onnx = np.concatenate(onnx_scores)
+    pearson = float(np.corrcoef(flat_torch, flat_onnx)[0, 1])
+    spearman = float(np.corrcoef(rank(flat_torch), rank(flat_onnx))[0, 1])
+    top1 = statistics.mean(int(np.argmax(t) == np.argmax(o)) for t, o in zip(torch_scores, onnx_scores))
+
+    print(f"queries={len(groups)} pairs/query={args.candidates}")
+    print(f"score agreement: pearson={pearson:.4f} spearman={spearman:.4f} top1={top1:.2%}")
+    print(f"mean |diff|: {float(np.mean(np.abs(flat_torch - flat_onnx))):.4f}")
+    for name, latency in (("torch", torch_latency), ("onnx-int8", onnx_latency)):
+        p50 = statistics.median(latency)
+        p95 = float(np.percentile(latency, 95))
+        print(f"{name:>10}: p50={p50:.1f}ms p95={p95:.1f}ms per {args.candidates} pairs")
+
+
+if __name__ == "__main__":
+    main()
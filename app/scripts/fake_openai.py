@@ -0,0 +1,235 @@
+"""
+부하·지연 테스트용 OpenAI 호환 가짜 서버입니다. (chat.completions 스트리밍/비스트리밍, embeddings)
+첫 토큰 지연, 느린 응답(꼬리 지연) 비율, 실패 비율을 조절할 수 있어 헤징/폴백 동작을 로컬에서 확인할 수 있습니다.
+
+사용법 (app/ 디렉토리에서):
+    python -m scripts.fake_openai --port 8001 --first-token-ms 300 --slow-prob 0.1 --slow-ms 5000
+    OPENAI_BASE_URL=http://localhost:8001/v1 uvicorn run:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = (
+    "스마트스토어 관련 문의에 대한 답변입니다. 판매자센터에서 해당 메뉴를 선택한 뒤 안내에 따라 진행하시면 됩니다. "
+    "자세한 내용은 참고 문서의 절차를 확인해 주세요."
+)
+FOLLOW_UP = ["처리 기간은 얼마나 걸리나요?", "판매자센터에서 진행 상태를 확인할 수 있나요?"]
+REWRITE = "스마트스토어 판매자센터 이용 방법을 알려주세요"
+
+
+def fake_embedding(text: str, dim: int = 1536) -> np.ndarray:
+    """같은 텍스트는 항상 같은 정규화 벡터 (글자 bigram 해시). 글자가 겹치는 텍스트끼리 유사도가 높습니다."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for j in range(max(len(text) - 1, 1)):
+        vector[int(hashlib.md5(text[j : j + 2].encode("utf-8")).hexdigest(), 16) % dim] += 1
+    vector /= np.linalg.norm(vector) or 1.0
+    return vector
+
+
+def create_app(
+    first_token_ms: float = 200,
+    token_interval_ms: float = 20,
+    slow_prob: float = 0.0,
+    slow_ms: float = 5000,
+    fail_prob: float = 0.0,
+    embedding_ms: float = 50,
+    embedding_dim: int = 1536,
+    chunk_chars: int = 8,
+    seed: int | None = None,
+    rpm: int = 0,
+) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.stats = {"chat": 0, "stream": 0, "embeddings": 0, "failed": 0, "slow": 0, "rate_limited": 0}
+    # rpm 한도 흉내: 분당 rpm개가 고르게 다시 차는 요청 버킷 (OpenAI처럼 짧은 구간에도 한도 적용)
+    bucket = {"level": float(rpm), "updated": time.monotonic()}
+
+    def rate_limit_headers() -> dict:
+        if not rpm:
+            return {}
+        return {
+            "x-ratelimit-limit-requests": str(rpm),
+            "x-ratelimit-remaining-requests": str(int(bucket["level"])),
+        }
+
+    def check_rate_limit() -> JSONResponse | None:
+        """분당 요청 수가 rpm을 넘으면 OpenAI처럼 429와 Retry-After를 돌려줍니다."""
+        if not rpm:
+            return None
+        now = time.monotonic()
+        bucket["level"] = min(rpm, bucket["level"] + (now - bucket["updated"]) * rpm / 60)
+        bucket["updated"] = now
+        if bucket["level"] < 1:
+            app.state.stats["rate_limited"] += 1
+            retry_after = (1 - bucket["level"]) * 60 / rpm
+            return JSONResponse(
+                {
+                    "error": {
+                        "message": "Rate limit reached for requests",
+                        "type": "requests",
+                        "code": "rate_limit_exceeded",
+                    }
+                },
+                status_code=429,
+                headers={**rate_limit_headers(), "retry-after-ms": str(int(retry_after * 1000) + 1)},
+            )
+        bucket["level"] -= 1
+        return None
+
+    def usage(prompt: str, completion: str) -> dict:
+        prompt_tokens, completion_tokens = len(prompt) // 2, len(completion) // 2
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": (prompt_tokens // 1024) * 1024 if prompt_tokens >= 1024 else 0},
+        }
+
+    async def first_token_delay():
+        delay = first_token_ms
+        if rng.random() < slow_prob:
+            app.state.stats["slow"] += 1
+            delay = slow_ms
+        await asyncio.sleep(delay / 1000)
+
+    def chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+        body = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.stats["chat"] += 1
+        if limited := check_rate_limit():
+            return limited
+        if rng.random() < fail_prob:
+            app.state.stats["failed"] += 1
+            return JSONResponse(
+                {"error": {"message": "fake upstream error", "type": "server_error"}},
+                status_code=503,
+            )
+
+        model = body.get("model", "fake")
+        prompt = json.dumps(body.get("messages", []), ensure_ascii=False)
+        structured = body.get("response_format", {}).get("type") == "json_schema"
+        content = json.dumps({"answer": ANSWER, "follow_up": FOLLOW_UP}, ensure_ascii=False) if structured else REWRITE
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            await first_token_delay()
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                    ],
+                    "usage": usage(prompt, content),
+                },
+                headers=rate_limit_headers(),
+            )
+
+        app.state.stats["stream"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events():
+            await first_token_delay()
+            yield chunk(completion_id, model, {"role": "assistant", "content": ""})
+            for i in range(0, len(content), chunk_chars):
+                yield chunk(completion_id, model, {"content": content[i : i + chunk_chars]})
+                await asyncio.sleep(token_interval_ms / 1000)
+            yield chunk(completion_id, model, {}, finish_reason="stop")
+            if include_usage:
+                body = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage(prompt, content),
+                }
+                yield f"data: {json.dumps(body)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=rate_limit_headers())
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        app.state.stats["embeddings"] += 1
+        if limited := check_rate_limit():
+            return limited
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await asyncio.sleep(embedding_ms / 1000)
+        data = [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(str(text), embedding_dim).tolist()}
+            for i, text in enumerate(inputs)
+        ]
+        tokens = sum(len(str(t)) for t in inputs) // 2
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "fake"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+            headers=rate_limit_headers(),
+        )
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--token-interval-ms", type=float, default=20)
+    parser.add_argument("--slow-prob", type=float, default=0.0, help="첫 토큰이 --slow-ms 만큼 늦는 요청 비율")
+    parser.add_argument("--slow-ms", type=float, default=5000)
+    parser.add_argument("--fail-prob", type=float, default=0.0, help="503으로 실패하는 요청 비율")
+    parser.add_argument("--embedding-ms", type=float, default=50)
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rpm", type=int, default=0, help="분당 요청 한도 (넘으면 429, 0: 무제한)")
+    args = parser.parse_args()
+
+    app = create_app(
+        first_token_ms=args.first_token_ms,
+        token_interval_ms=args.token_interval_ms,
+        slow_prob=args.slow_prob,
+        slow_ms=args.slow_ms,
+        fail_prob=args.fail_prob,
+        embedding_ms=args.embedding_ms,
+        embedding_dim=args.embedding_dim,
+        seed=args.seed,
+        rpm=args.rpm,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+FAQ 덤프를 Chroma 컬렉션과 검색 인덱스에 증분 반영합니다.
+내용 해시를 비교해 새로 추가되거나 바뀐 Q/A만 임베딩하고, 덤프에서 사라진 항목은 삭제합니다.
+중간에 중단되면 같은 명령을 다시 실행해 남은 배치부터 이어서 처리할 수 있습니다.
+
+사용법 (app/ 디렉토리에서):
+    python -m scripts.ingest                     # .env의 DOC_PATH 사용
+    python -m scripts.ingest --doc-path docs/final_result.pkl --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+
+from containers import Container
+from core import CorpusIngestor
+
+
+async def run(args):
+    container = Container()
+    config = container.config()
+    chroma_client = container.chroma_client()
+    embedding_service = container.embedding_service()
+    ingestor = CorpusIngestor(chroma_client, args.doc_path or config.DOC_PATH, batch_size=args.batch_size)
+    try:
+        result = await ingestor.run(embedding_service.get_all_embeddings_async, dry_run=args.dry_run, progress=print)
+    finally:
+        container.embedding_cache().close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not args.dry_run:
+        print(f"embedding cache: {embedding_service.cache_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doc-path", default=None, help="FAQ 덤프(pkl) 경로 (기본값: DOC_PATH)")
+    parser.add_argument("--batch-size", type=int, default=256, help="upsert(체크포인트) 단위 Q/A 개수")
+    parser.add_argument("--dry-run", action="store_true", help="변경 사항만 출력하고 반영하지 않음")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
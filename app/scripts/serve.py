@@ -0,0 +1,125 @@
+"""
+여러 워커 프로세스로 API 서버를 실행합니다. (pre-fork)
+부모 프로세스가 토크나이저·리랭커 모델·문서 저장소·BM25/dense 인덱스를 먼저 로드한 뒤 워커를 fork하므로,
+모델 가중치는 copy-on-write로, 인덱스(읽기 전용 mmap)는 같은 페이지 캐시로 모든 워커가 공유합니다.
+(uvicorn --workers는 워커마다 새 인터프리터를 띄워 모델·인덱스를 워커 수만큼 따로 올립니다)
+Chroma·Redis·SQLite 연결과 스레드 풀은 fork 후 워커의 lifespan에서 각자 엽니다.
+워커별 고유 메모리(USS)는 python -m scripts.worker_memory <부모 PID>로 확인합니다.
+
+사용법 (app/ 디렉토리에서, Linux/macOS):
+    python -m scripts.serve --workers 4 --port 8000
+    DENSE_BACKEND=numpy python -m scripts.serve --workers 4   # dense 검색도 공유 mmap 행렬 사용 (권장)
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import uvicorn
+
+log = logging.getLogger("scripts.serve")
+
+
+def preload(container):
+    """fork 전에 읽기 전용 자원을 로드합니다. 인덱스가 없으면 워커마다 수집하지 않도록 먼저 수집합니다."""
+    config = container.config()
+    document_store = container.document_store()
+    if not len(document_store):
+        log.info("[Serve] 인덱스가 없어 수집을 먼저 실행합니다.")
+        # 부모가 Chroma·SQLite 연결이나 이벤트 루프를 가진 채 fork하지 않도록 별도 프로세스에서 수집
+        subprocess.run([sys.executable, "-m", "scripts.ingest"], check=True)
+        document_store.load()
+    container.ENCODING()
+    container.CHAT_ENCODING()
+    container.bm25_index()
+    container.dense_index()
+    if config.RERANKER_BACKEND == "onnx":
+        # ONNX Runtime 세션은 생성 시 스레드 풀을 만들어 fork 후에는 쓸 수 없으므로 워커마다 로드
+        log.warning("[Serve] RERANKER_BACKEND=onnx는 워커마다 모델을 로드합니다.")
+    else:
+        # 추론(워밍업)은 하지 않고 가중치만 로드 (추론 스레드 풀은 워커에서 생성)
+        container.reranker()
+
+
+def run_worker(config: uvicorn.Config, sock):
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+    # 터미널의 Ctrl+C는 부모만 받고, 부모가 종료 신호를 한 번만 전달하도록 프로세스 그룹 분리
+    os.setpgid(0, 0)
+    gc.enable()
+    code = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        log.exception("[Serve] 워커 %d 비정상 종료", os.getpid())
+        code = 1
+    finally:
+        logging.shutdown()
+        os._exit(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info", help="uvicorn 로그 레벨")
+    args = parser.parse_args()
+
+    # 부모에서 만든 객체가 GC 때문에 워커에서 복사되지 않도록 fork 전까지 GC를 멈추고, 직전에 freeze
+    gc.disable()
+    import run
+
+    preload(run.container)
+    config = uvicorn.Config(run.app, host=args.host, port=args.port, log_level=args.log_level)
+    sock = config.bind_socket()
+    gc.collect()
+    gc.freeze()
+
+    workers: dict[int, float] = {}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(config, sock)
+        workers[pid] = time.monotonic()
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    for _ in range(args.workers):
+        spawn()
+    log.info("[Serve] 부모 %d, 워커 %s", os.getpid(), list(workers))
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        log.warning("[Serve] 워커 %d 종료 (코드 %d), 다시 시작합니다.", pid, os.waitstatus_to_exitcode(status))
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)  # 시작하자마자 죽는 경우 재시작 폭주 방지
+        spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+검색 파라미터 스윕 도구입니다. 정답이 표시된 질문→FAQ id 세트로 BM25/dense 후보 수, 융합 방식, 리랭커 사용 여부,
+리랭킹 대상 수, 최종 문서 수(top_n) 조합마다 recall@k, MRR, 단계별 지연 시간을 재고 Pareto 표로 출력합니다.
+품질 목표(--target-recall)를 만족하는 가장 빠른 설정을 고르는 데 사용합니다.
+
+임베딩은 네트워크 없이 얻습니다.
+- cache: 임베딩 캐시(SQLite)의 질문 임베딩 + 수집 시 만든 dense 인덱스 (실제 임베딩)
+  캐시에 없는 질문은 제외하며, --embed-missing을 주면 한 번만 API로 임베딩해 캐시에 저장합니다.
+- fake: 글자 bigram 해시 벡터 (scripts.fake_openai와 같음). 문서 쪽은 각 문서의 질문 줄을 임베딩합니다.
+
+정답 세트는 JSON Lines ({"question": ..., "doc_id": ...} 또는 {"question": ..., "doc_ids": [...]}) 입니다.
+없으면 문서의 질문(제목)을 그대로 질문으로 쓰는 자기 검색 세트를 만듭니다. (--write-labels로 저장 후 다듬어 사용)
+
+사용법 (app/ 디렉토리에서, 인덱스는 서버 또는 scripts.ingest로 먼저 생성):
+    python -m scripts.sweep_retrieval --labels labels.jsonl --embeddings cache --rerankers none,onnx
+    python -m scripts.sweep_retrieval --embeddings fake --bm25-depth 5,10,20 --dense-depth 0,5,10 --top-n 3,5
+"""
+
+import argparse
+import ast
+import asyncio
+import itertools
+import json
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+from core.bm25_index import BM25Index
+from core.dense_index import DenseIndex
+from core.document_store import DocumentStore
+from core.embedding_cache import EmbeddingCache
+from core.metrics import bind_timings
+from scripts.fake_openai import fake_embedding
+from services.reranker import RerankScheduler, load_reranker
+from services.retrieval import RetrievalService
+
+STAGES = ("bm25", "dense_search", "rerank")
+
+
+def title_of(document: str) -> str:
+    """문서 저장소 본문("Q: [질문 조각들]\\nA: ...")에서 첫 질문 조각을 꺼냅니다."""
+    first_line = document.split("\n", 1)[0].removeprefix("Q:").strip()
+    try:
+        chunks = ast.literal_eval(first_line)
+    except (ValueError, SyntaxError):
+        return first_line
+    return chunks[0] if isinstance(chunks, list) and chunks else first_line
+
+
+def load_labels(path: str | None, document_store: DocumentStore, sample: int, seed: int) -> list[dict]:
+    if path is None:
+        rows = random.Random(seed).sample(range(len(document_store)), min(sample, len(document_store)))
+        return [
+            {"question": title_of(document_store.documents[row]), "doc_ids": [document_store.ids[row]]} for row in rows
+        ]
+    labels = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            doc_ids = item.get("doc_ids") or [item["doc_id"]]
+            labels.append({"question": item["question"], "doc_ids": doc_ids})
+    return labels
+
+
+async def embed_missing(cache: EmbeddingCache, model: str, texts: list[str]):
+    """캐시에 없는 질문을 API로 한 번 임베딩해 캐시에 저장합니다. (이후 실행은 오프라인)"""
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI()
+    for i in range(0, len(texts), 256):
+        batch = texts[i : i + 256]
+        response = await client.embeddings.create(input=batch, model=model)
+        vectors = [np.asarray(d.embedding, dtype=np.float32) for d in sorted(response.data, key=lambda d: d.index)]
+        cache.put_many(model, batch, [(v / (np.linalg.norm(v) or 1.0)).tolist() for v in vectors])
+
+
+def prepare_embeddings(args, labels: list[dict], document_store: DocumentStore) -> tuple[dict, DenseIndex, list]:
+    """(질문 → 임베딩, dense 인덱스, 임베딩이 없어 제외한 질문 목록)을 준비합니다."""
+    questions = [label["question"] for label in labels]
+    if args.embeddings == "fake":
+        # 저장하지 않는 메모리 인덱스 (빈 임시 디렉토리라 기존 인덱스를 읽지 않음)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dense_index = DenseIndex(tmp_dir, dtype=args.dense_dtype)
+        embeddings = [fake_embedding(title_of(document), args.fake_dim) for document in document_store.documents]
+        dense_index.build(document_store.ids, embeddings)
+        return {q: fake_embedding(q, args.fake_dim).tolist() for q in questions}, dense_index, []
+
+    dense_index = DenseIndex(args.index_dir, dtype=args.dense_dtype)
+    if not dense_index.is_ready or dense_index.ids != document_store.ids:
+        sys.exit(
+            f"{args.index_dir}에 문서 저장소와 맞는 {args.dense_dtype} dense 인덱스가 없습니다. (서버나 ingest로 생성)"
+        )
+    cache = EmbeddingCache(args.embedding_cache)
+    found = cache.get_many(args.embedding_model, questions)
+    missing = [q for q, e in zip(questions, found) if e is None]
+    if missing and args.embed_missing:
+        asyncio.run(embed_missing(cache, args.embedding_model, missing))
+        found = cache.get_many(args.embedding_model, questions)
+        missing = [q for q, e in zip(questions, found) if e is None]
+    cache.close()
+    return {q: e for q, e in zip(questions, found) if e is not None}, dense_index, missing
+
+
+def score(ranked_ids: list[str], gold: list[str], ks: list[int]) -> dict:
+    gold_set = set(gold)
+    result = {f"recall@{k}": len(gold_set & set(ranked_ids[:k])) / len(gold_set) for k in ks}
+    result["mrr"] = next((1 / rank for rank, doc_id in enumerate(ranked_ids, 1) if doc_id in gold_set), 0.0)
+    return result
+
+
+async def evaluate(service: RetrievalService, labels: list[dict], embeddings: dict, top_n: int, ks: list[int]) -> dict:
+    async def get_all_embeddings_async(text_list: list[str], **_) -> list[list[float]]:
+        return [embeddings[text] for text in text_list]
+
+    totals, stage_times, scores = [], {stage: [] for stage in STAGES}, []
+    for label in labels:
+        timings = {}
+        bind_timings(timings)
+        start = time.perf_counter()
+        candidates = await service.retrieve_context(
+            label["question"], [None, None], get_all_embeddings_async, top_n=top_n
+        )
+        totals.append((time.perf_counter() - start) * 1000)
+        for stage in STAGES:
+            stage_times[stage].append(timings.get(stage, 0.0) * 1000)
+        scores.append(
+            score([c.doc_id for c in candidates], label["doc_ids"], sorted({k for k in ks if k < top_n} | {top_n}))
+        )
+
+    result = {key: round(float(np.mean([s[key] for s in scores])), 4) for key in scores[0]}
+    result["recall@n"] = result[f"recall@{top_n}"]
+    result["latency_ms_mean"] = round(float(np.mean(totals)), 2)
+    result["latency_ms_p95"] = round(float(np.percentile(totals, 95)), 2)
+    for stage in STAGES:
+        result[f"{stage}_ms_mean"] = round(float(np.mean(stage_times[stage])), 2)
+    return result
+
+
+def pareto_front(rows: list[dict], quality: str) -> set[int]:
+    """quality가 높고 지연이 낮은 쪽으로 다른 설정에 완전히 밀리지 않는 설정들의 인덱스"""
+    front = set()
+    for i, row in enumerate(rows):
+        dominated = any(
+            other[quality] >= row[quality]
+            and other["latency_ms_mean"] <= row["latency_ms_mean"]
+            and (other[quality] > row[quality] or other["latency_ms_mean"] < row["latency_ms_mean"])
+            for j, other in enumerate(rows)
+            if j != i
+        )
+        if not dominated:
+            front.add(i)
+    return front
+
+
+def int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", default="chroma_db/indexes")
+    parser.add_argument("--labels", default=None, help="정답 세트 JSON Lines (없으면 자기 검색 세트 생성)")
+    parser.add_argument("--sample", type=int, default=200, help="자기 검색 세트 질문 수")
+    parser.add_argument("--write-labels", default=None, help="사용한 정답 세트를 JSON Lines로 저장")
+    parser.add_argument("--embeddings", choices=["cache", "fake"], default="cache")
+    parser.add_argument("--embedding-cache", default="docs/embedding_cache.sqlite3")
+    parser.add_argument("--embedding-model", default="text-embedding-3-small")
+    parser.add_argument("--embed-missing", action="store_true", help="캐시에 없는 질문을 API로 임베딩 (네트워크 사용)")
+    parser.add_argument("--dense-dtype", default="float32")
+    parser.add_argument("--fake-dim", type=int, default=1536)
+    parser.add_argument("--bm25-depth", type=int_list, default=[5, 10, 20])
+    parser.add_argument("--dense-depth", type=int_list, default=[0, 5, 10])
+    parser.add_argument("--fusion", default="rrf,weighted", help="쉼표로 구분한 융합 방식")
+    parser.add_argument("--rrf-k", type=int, default=60)
+    parser.add_argument("--rerankers", default="none", help="쉼표로 구분한 RERANKER_BACKEND (none: 리랭커 끔)")
+    parser.add_argument("--reranking-model", default="BAAI/bge-reranker-base")
+    parser.add_argument("--rerank-depth", type=int_list, default=[15])
+    parser.add_argument("--top-n", type=int_list, default=[3, 5])
+    parser.add_argument("--k", type=int_list, default=[1, 3, 5], help="recall@k의 k 목록 (top_n 이하만 계산)")
+    parser.add_argument("--target-recall", type=float, default=None, help="recall@top_n 목표 (가장 빠른 설정 추천)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="전체 결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    document_store = DocumentStore(args.index_dir)
+    bm25_index = BM25Index(args.index_dir)
+    if not len(document_store) or not bm25_index.is_ready:
+        sys.exit(f"{args.index_dir}에 문서 저장소/BM25 인덱스가 없습니다. 서버나 ingest로 먼저 생성하세요.")
+
+    labels = load_labels(args.labels, document_store, args.sample, args.seed)
+    if args.write_labels:
+        with open(args.write_labels, "w", encoding="utf-8") as f:
+            for label in labels:
+                f.write(json.dumps(label, ensure_ascii=False) + "\n")
+    embeddings, dense_index, missing = prepare_embeddings(args, labels, document_store)
+    if missing:
+        print(
+            f"[Sweep] 임베딩 캐시에 없는 질문 {len(missing)}개 제외 (--embed-missing으로 채울 수 있음)", file=sys.stderr
+        )
+    labels = [label for label in labels if label["question"] in embeddings]
+    if not labels:
+        sys.exit("평가할 질문이 없습니다.")
+
+    rerankers = args.rerankers.split(",")
+    grid = list(
+        itertools.product(
+            rerankers, args.fusion.split(","), args.bm25_depth, args.dense_depth, args.rerank_depth, args.top_n
+        )
+    )
+
+    async def run_all() -> list[dict]:
+        # 질문을 하나씩 순서대로 평가하므로 다른 요청을 모으는 대기 시간(max_wait)은 0으로 둠
+        schedulers = {
+            backend: RerankScheduler(load_reranker(args.reranking_model, backend=backend), max_wait_ms=0)
+            for backend in rerankers
+        }
+        rows = []
+        for backend, fusion, bm25_depth, dense_depth, rerank_depth, top_n in grid:
+            if bm25_depth == 0 and dense_depth == 0:
+                continue
+            service = RetrievalService(
+                schedulers[backend],
+                bm25_index,
+                document_store,
+                dense_index=dense_index,
+                dense_backend="numpy",
+                fusion_method=fusion,
+                fusion_rrf_k=args.rrf_k,
+                bm25_depth=bm25_depth,
+                dense_depth=dense_depth,
+                rerank_depth=rerank_depth,
+                top_n=top_n,
+            )
+            config = {
+                "reranker": backend,
+                "fusion": fusion,
+                "bm25_depth": bm25_depth,
+                "dense_depth": dense_depth,
+                "rerank_depth": rerank_depth,
+                "top_n": top_n,
+            }
+            rows.append({**config, **await evaluate(service, labels, embeddings, top_n, args.k)})
+            print(f"[Sweep] {len(rows)}/{len(grid)} {config}", file=sys.stderr)
+        return rows
+
+    rows = asyncio.run(run_all())
+    front = pareto_front(rows, "recall@n")
+    for i, row in enumerate(rows):
+        row["pareto"] = i in front
+
+    # Pareto 표: 지연 시간 순, Pareto 최적 설정은 * 표시
+    ks = [k for k in args.k if k <= max(args.top_n)]
+    header = (
+        f"  {'reranker':>8} {'fusion':>8} {'bm25':>4} {'dense':>5} {'rerank':>6} {'n':>2} "
+        + " ".join(f"{f'R@{k}':>6}" for k in ks)
+        + f" {'R@n':>6} {'MRR':>6} {'ms':>7} {'p95':>7} "
+        + " ".join(f"{stage:>12}" for stage in STAGES)
+    )
+    print(header)
+    for row in sorted(rows, key=lambda r: r["latency_ms_mean"]):
+        recalls = " ".join(f"{row[f'recall@{k}']:>6.3f}" if f"recall@{k}" in row else f"{'-':>6}" for k in ks)
+        print(
+            f"{'*' if row['pareto'] else ' '} {row['reranker']:>8} {row['fusion']:>8} {row['bm25_depth']:>4}"
+            f" {row['dense_depth']:>5} {row['rerank_depth']:>6} {row['top_n']:>2} {recalls}"
+            f" {row['recall@n']:>6.3f} {row['mrr']:>6.3f} {row['latency_ms_mean']:>7.2f} {row['latency_ms_p95']:>7.2f} "
+            + " ".join(f"{row[f'{stage}_ms_mean']:>12.2f}" for stage in STAGES)
+        )
+
+    if args.target_recall is not None:
+        meeting = [row for row in rows if row["recall@n"] >= args.target_recall]
+        if meeting:
+            best = min(meeting, key=lambda r: r["latency_ms_mean"])
+            print(f"\n목표 recall@n ≥ {args.target_recall}를 만족하는 가장 빠른 설정: {best}")
+        else:
+            print(f"\n목표 recall@n ≥ {args.target_recall}를 만족하는 설정이 없습니다.")
+
+    if args.output:
+        result = {"questions": len(labels), "embeddings": args.embeddings, "rows": rows}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+실행 중인 서버 프로세스(부모와 워커)의 메모리 사용량을 보고합니다.
+RSS는 워커끼리 공유하는 페이지(fork 전에 로드한 모델 가중치, mmap 인덱스)를 워커마다 중복해서 세므로,
+워커를 하나 더 띄울 때 실제로 늘어나는 메모리는 워커별 고유 메모리(USS: 그 프로세스만 가진 페이지)로 봐야 합니다.
+PSS는 공유 페이지를 공유한 프로세스 수로 나눠 더한 값이라, 모든 프로세스의 PSS 합이 실제 총 사용량에 가깝습니다.
+
+사용법 (app/ 디렉토리에서):
+    python -m scripts.worker_memory <서버 부모 PID>          # scripts.serve 또는 uvicorn --workers 부모
+    python -m scripts.worker_memory <PID> --json
+"""
+
+import argparse
+import json
+
+import psutil
+
+
+def worker_processes(pid: int) -> list[psutil.Process]:
+    """부모 PID의 워커 프로세스 목록. 자식이 없으면(워커 1개로 실행) 부모가 곧 워커입니다."""
+    parent = psutil.Process(pid)
+    # multiprocessing의 resource_tracker 보조 프로세스는 제외
+    children = [p for p in parent.children() if "resource_tracker" not in " ".join(p.cmdline())]
+    return children or [parent]
+
+
+def process_memory(process: psutil.Process) -> dict:
+    """프로세스 하나의 RSS/USS/PSS/공유 메모리(MB). USS·PSS는 /proc/<pid>/smaps를 읽으므로 측정 비용이 큽니다."""
+    info = process.memory_full_info()
+    return {
+        "pid": process.pid,
+        "rss_mb": round(info.rss / 2**20, 1),
+        "uss_mb": round(info.uss / 2**20, 1),
+        "pss_mb": round(getattr(info, "pss", 0) / 2**20, 1),  # Linux 전용
+        "shared_mb": round(getattr(info, "shared", 0) / 2**20, 1),
+    }
+
+
+def memory_report(pid: int) -> dict:
+    parent = psutil.Process(pid)
+    workers = [process_memory(p) for p in worker_processes(pid)]
+    processes = workers if workers[0]["pid"] == pid else [process_memory(parent), *workers]
+    return {
+        "parent": pid,
+        "workers": workers,
+        "total": {
+            "rss_mb": round(sum(p["rss_mb"] for p in processes), 1),
+            "uss_mb": round(sum(p["uss_mb"] for p in processes), 1),
+            "pss_mb": round(sum(p["pss_mb"] for p in processes), 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pid", type=int, help="서버 부모 프로세스 PID")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args()
+
+    report = memory_report(args.pid)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'pid':>8} {'RSS MB':>9} {'USS MB':>9} {'PSS MB':>9} {'shared MB':>10}")
+    for worker in report["workers"]:
+        print(
+            f"{worker['pid']:>8} {worker['rss_mb']:>9} {worker['uss_mb']:>9}"
+            f" {worker['pss_mb']:>9} {worker['shared_mb']:>10}"
+        )
+    total = report["total"]
+    print(f"{'total':>8} {total['rss_mb']:>9} {total['uss_mb']:>9} {total['pss_mb']:>9}  (부모 포함)")
+    uss = [worker["uss_mb"] for worker in report["workers"]]
+    print(f"워커 1개 추가 시 예상 증가량(USS 평균): {sum(uss) / len(uss):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
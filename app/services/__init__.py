@@ -1,9 +1,14 @@
 # Auto-generated __init__.py
 
+from .answer_cache import SemanticAnswerCache
+from .batch import BatchAnswerService
 from .chat_session import ChatSessionService
 from .embedding import EmbeddingService
+from .fusion import Candidate, fuse
 from .generator import OpenAIClient
+from .prompting.context_packer import ContextPacker, PackedContext
 from .prompting.prompt_builder import prompt_builder
+from .reranker import RerankScheduler, load_reranker
 from .retrieval import RetrievalService
 from .rewriter import RewriterService
 
@@ -14,4 +19,12 @@ __all__ = [
     "ChatSessionService",
     "RewriterService",
     "prompt_builder",
+    "RerankScheduler",
+    "load_reranker",
+    "SemanticAnswerCache",
+    "Candidate",
+    "fuse",
+    "ContextPacker",
+    "PackedContext",
+    "BatchAnswerService",
 ]
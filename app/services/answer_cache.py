@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    의미적으로 거의 같은 질문에 대해 이전 답변(AnswerAndFollowup)을 재사용하는 응답 캐시입니다.
+    과거 질문 임베딩을 하나의 행렬로 보관하고, 새 질문과의 코사인 유사도가 threshold 이상이면 캐시된 답변을 반환합니다.
+    항목은 코퍼스 버전으로 태그되어 FAQ가 바뀌면 무효화되며, LRU/TTL로 제거됩니다.
+    """
+
+    def __init__(self, document_store, threshold: float = 0.95, max_entries: int = 2000, ttl_seconds: int = 86400):
+        self.document_store = document_store
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._matrix: np.ndarray | None = None  # (max_entries, dim) 정규화된 질문 임베딩
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._entries: list[dict | None] = [None] * max_entries
+        self._lru: OrderedDict[int, None] = OrderedDict()  # 슬롯 번호, 오래 안 쓴 순
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def corpus_version(self) -> str:
+        return self.document_store.version
+
+    def _evict(self, slot: int):
+        self._valid[slot] = False
+        self._entries[slot] = None
+        self._lru.pop(slot, None)
+
+    @staticmethod
+    def _unit(embedding: list[float]) -> np.ndarray | None:
+        """
+        단위 벡터로 정규화합니다. (청크 평균 임베딩은 길이가 1이 아니므로 내적이 코사인 유사도가 되도록)
+        빈 벡터나 영벡터면 None.
+        """
+        if embedding is None or len(embedding) == 0:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def lookup(self, embedding: list[float]) -> dict | None:
+        """유사한 질문의 캐시된 답변({"answer": ..., "follow_up": [...]})을 반환합니다. 없으면 None."""
+        query = self._unit(embedding)
+        if self._matrix is None or query is None:
+            self.misses += 1
+            return None
+        with self._lock:
+            scores = self._matrix @ query
+            scores[~self._valid] = -1.0
+            while True:
+                slot = int(np.argmax(scores))
+                if scores[slot] < self.threshold:
+                    self.misses += 1
+                    return None
+                entry = self._entries[slot]
+                expired = time.time() - entry["created_at"] > self.ttl_seconds
+                if expired or entry["corpus_version"] != self.corpus_version:
+                    self._evict(slot)
+                    scores[slot] = -1.0
+                    continue
+                self._lru.move_to_end(slot)
+                self.hits += 1
+                return entry["answer"]
+
+    def store(self, question: str, embedding: list[float], answer: dict):
+        vector = self._unit(embedding)
+        if vector is None or not answer.get("answer"):
+            return
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            free = np.flatnonzero(~self._valid)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot, _ = self._lru.popitem(last=False)
+            self._matrix[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = {
+                "question": question,
+                "answer": answer,
+                "corpus_version": self.corpus_version,
+                "created_at": time.time(),
+            }
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": int(self._valid.sum()),
+        }
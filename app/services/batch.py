@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+
+from core.metrics import registry
+from core.rate_limiter import Priority
+
+log = logging.getLogger(__name__)
+
+# 질문마다 따로 측정하는 단계 (embedding/bm25/dense_search/rerank 등은 chunk 단위로 측정해 chunk 안의 질문이 공유)
+ITEM_STAGES = ("rewrite", "queue", "first_token", "generation", "total")
+
+
+class BatchAnswerService:
+    """
+    대량 평가·백필용으로 여러 질문을 한 번에 답변합니다. /ask/stream과 같은 서비스를 쓰되 질문을 chunk_size개씩 묶어
+    - 질문 임베딩은 배치 요청으로(캐시 적중분 제외), BM25·dense 검색은 행렬 연산 한 번으로,
+      리랭킹은 꽉 찬 모델 배치로 처리하고
+    - 답변 생성은 최대 max_concurrency개까지 동시에 실행합니다. (다음 chunk 준비는 생성 슬롯이 날 때까지 대기)
+    OpenAI 호출은 모두 낮은 우선순위(Priority.BULK)로 보내 사용자 요청이 먼저 처리되며,
+    세션·답변 캐시·질의 로그는 쓰지 않습니다.
+    """
+
+    def __init__(
+        self,
+        retriever,
+        embedding_service,
+        rewriter,
+        generator,
+        context_packer,
+        prompt_builder,
+        chroma_client,
+        chunk_size: int = 64,
+        max_concurrency: int = 16,
+    ):
+        self.retriever = retriever
+        self.embedding_service = embedding_service
+        self.rewriter = rewriter
+        self.generator = generator
+        self.context_packer = context_packer
+        self.prompt_builder = prompt_builder
+        self.chroma_client = chroma_client
+        self.chunk_size = chunk_size
+        self.max_concurrency = max_concurrency
+
+    @staticmethod
+    def _result(index: int, item: dict) -> dict:
+        return {
+            "index": index,
+            "id": item.get("id"),
+            "question": item["question"],
+            "rewritten_query": None,
+            "answer": None,
+            "follow_up": [],
+            "doc_ids": [],
+            "context_tokens": 0,
+            "usage": {},
+            "timings": {},
+            "error": None,
+        }
+
+    @staticmethod
+    def _finish(result: dict, started: float) -> dict:
+        timings = result["timings"]
+        timings["total"] = time.perf_counter() - started
+        for stage in ITEM_STAGES:
+            if stage in timings:
+                registry.observe("rag_batch_stage_seconds", timings[stage], stage=stage)
+        registry.inc("rag_batch_items_total", outcome="error" if result["error"] else "generated")
+        result["timings"] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+        return result
+
+    async def _rewrite(self, question: str, embedding: list[float]) -> tuple[str, float]:
+        start = time.perf_counter()
+        try:
+            rewritten = await self.rewriter.rewrite_if_needed(
+                question, embedding=embedding or None, priority=Priority.BULK
+            )
+        except Exception as e:
+            # 재기술은 검색 품질 보정이므로 실패하면 원문 질문으로 진행
+            log.warning("[Batch] 질문 재기술 실패, 원문 사용: %s: %s", type(e).__name__, e)
+            rewritten = question
+        return rewritten, time.perf_counter() - start
+
+    async def _prepare(self, chunk: list[dict], offset: int, collections: list) -> list[tuple[dict, list[dict]]]:
+        """chunk의 질문을 임베딩·재기술·검색해 (결과 dict, 답변 생성용 messages) 목록으로 만듭니다."""
+        shared: dict[str, float] = {}
+        questions = [item["question"] for item in chunk]
+
+        start = time.perf_counter()
+        embeddings = list(await self.embedding_service.get_all_embeddings_async(questions, priority=Priority.BULK))
+        shared["embedding"] = time.perf_counter() - start
+
+        # 재기술은 질문별 LLM 호출 (동시 호출 수·속도는 채팅 리미터가 제한)
+        rewrites = await asyncio.gather(*(self._rewrite(q, e) for q, e in zip(questions, embeddings)))
+        queries = [rewritten for rewritten, _ in rewrites]
+        changed = [i for i, (question, query) in enumerate(zip(questions, queries)) if question != query]
+        if changed:
+            # 재기술된 질문만 한 번 더 배치 임베딩
+            start = time.perf_counter()
+            rewritten_embeddings = await self.embedding_service.get_all_embeddings_async(
+                [queries[i] for i in changed], priority=Priority.BULK
+            )
+            for i, embedding in zip(changed, rewritten_embeddings):
+                embeddings[i] = embedding
+            shared["rewrite_embedding"] = time.perf_counter() - start
+
+        batch = await self.retriever.retrieve_batch(queries, embeddings, collections, timings=shared)
+        for stage, seconds in shared.items():
+            registry.observe("rag_batch_stage_seconds", seconds, stage=stage)
+
+        prepared = []
+        for index, (item, query, (_, rewrite_seconds), candidates) in enumerate(
+            zip(chunk, queries, rewrites, batch), offset
+        ):
+            result = self._result(index, item)
+            packed = self.context_packer.pack(query, candidates)
+            result.update(rewritten_query=query, doc_ids=packed.doc_ids, context_tokens=packed.tokens)
+            result["timings"] = {**shared, "rewrite": rewrite_seconds}
+            prepared.append((result, self.prompt_builder.build_messages(packed.text, [], query)))
+        return prepared
+
+    async def _generate(self, result: dict, messages: list[dict], started: float) -> dict:
+        timings = result["timings"]
+        start = time.perf_counter()
+        answer: dict = {}
+        try:
+            async for partial in self.generator.stream_answer_and_followup(
+                messages, usage=result["usage"], priority=Priority.BULK
+            ):
+                if not answer:
+                    timings["first_token"] = time.perf_counter() - start
+                answer = partial  # 부분 결과는 누적 형태이므로 마지막 것이 최종 답변
+            timings["generation"] = time.perf_counter() - start
+            result["answer"] = answer.get("answer", "")
+            result["follow_up"] = answer.get("follow_up") or []
+        except Exception as e:
+            log.warning("[Batch] 답변 생성 실패 (index=%d): %s: %s", result["index"], type(e).__name__, e)
+            result["error"] = f"{type(e).__name__}: {e}"
+        return self._finish(result, started)
+
+    async def answer_batch(self, items: list[dict], concurrency: int | None = None):
+        """
+        질문 목록을 답변하고 끝나는 순서대로 결과 dict를 yield합니다. (입력 순서는 결과의 index로 확인)
+        실패한 질문도 error가 채워진 결과로 반환하므로 결과 수는 항상 질문 수와 같습니다.
+
+        Args:
+            items (list[dict]): [{"question": 질문, "id": 식별자(선택)}]
+            concurrency (int | None): 동시에 생성할 답변 수 (기본값·상한: max_concurrency)
+
+        Yields:
+            dict: index, id, question, rewritten_query, answer, follow_up, doc_ids, context_tokens, usage,
+                  timings(단계별 초), error
+        """
+        slots = asyncio.Semaphore(min(concurrency or self.max_concurrency, self.max_concurrency))
+        results: asyncio.Queue = asyncio.Queue()
+        tasks: set[asyncio.Task] = set()
+
+        async def generate(result: dict, messages: list[dict], started: float):
+            try:
+                results.put_nowait(await self._generate(result, messages, started))
+            finally:
+                slots.release()
+
+        async def produce():
+            collections = None
+            for offset in range(0, len(items), self.chunk_size):
+                chunk = items[offset : offset + self.chunk_size]
+                started = time.perf_counter()
+                try:
+                    if collections is None:
+                        collections = await self.chroma_client.get_chroma_collections(
+                            self.embedding_service.get_all_embeddings_async
+                        )
+                    prepared = await self._prepare(chunk, offset, collections)
+                except Exception as e:
+                    log.exception("[Batch] 질문 %d~%d 준비 실패", offset, offset + len(chunk) - 1)
+                    for index, item in enumerate(chunk, offset):
+                        result = self._result(index, item)
+                        result["error"] = f"{type(e).__name__}: {e}"
+                        results.put_nowait(self._finish(result, started))
+                    continue
+                for result, messages in prepared:
+                    # 생성 슬롯이 빌 때까지 대기 (준비된 프롬프트가 무한정 쌓이지 않도록 다음 chunk 준비도 멈춤)
+                    queued = time.perf_counter()
+                    await slots.acquire()
+                    result["timings"]["queue"] = time.perf_counter() - queued
+                    task = asyncio.create_task(generate(result, messages, started))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+        producer = asyncio.create_task(produce())
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            # 클라이언트 연결이 끊기는 등 중간에 멈추면 남은 준비·생성 작업을 모두 취소
+            producer.cancel()
+            for task in list(tasks):
+                task.cancel()
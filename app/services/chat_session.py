@@ -4,15 +4,16 @@ import json
 class ChatSessionService:
     """
     ChatSessionService is responsible for managing chat sessions.
-    It saves and retrieves chat messages from Redis.
+    It saves and retrieves chat messages from the session store (Redis or in-memory).
     """
 
-    def __init__(self, redis_client, session_key_prefix, max_session_length):
-        self.redis_client = redis_client
+    def __init__(self, session_store, session_key_prefix, max_session_length, session_ttl=None):
+        self.session_store = session_store
         self.session_key_prefix = session_key_prefix
         self.max_session_length = max_session_length
+        self.session_ttl = session_ttl
 
-    async def _session(self, session_id: str) -> list:
+    def _session(self, session_id: str) -> str:
         return f"{self.session_key_prefix}{session_id}"
 
     async def save_session(
@@ -22,24 +23,45 @@ class ChatSessionService:
         message: str,
     ):
         """
-        Save the chat session to Redis.
+        Save a single chat message to the session store.
 
         Args:
             session_id (str): Unique identifier for the session.
-            question (str): User's question.
-            context (str): Retrieved context.
-            response (str): AI's response.
+            role (str): Message role (user / assistant).
+            message (str): Message content.
         """
-        session_key = await self._session(session_id)
         messages = {"role": role, "content": message}
-        self.redis_client.rpush(session_key, json.dumps(messages, ensure_ascii=False))
-        self.redis_client.ltrim(
-            session_key, 0, self.max_session_length - 1
-        )  # Keep only the last MAX_SESSION_LENGTH items
+        await self.session_store.append(
+            self._session(session_id),
+            [json.dumps(messages, ensure_ascii=False)],
+            max_length=self.max_session_length,
+            ttl=self.session_ttl,
+        )
+
+    async def save_turn(self, session_id: str, user_message: str, assistant_message: str):
+        """
+        Save a finished turn (user question + assistant answer) in a single pipelined call.
+        Only the newest MAX_SESSION_LENGTH messages are kept and the session TTL is refreshed.
+
+        Args:
+            session_id (str): Unique identifier for the session.
+            user_message (str): User's question.
+            assistant_message (str): AI's response.
+        """
+        messages = [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": assistant_message},
+        ]
+        await self.session_store.append(
+            self._session(session_id),
+            [json.dumps(message, ensure_ascii=False) for message in messages],
+            max_length=self.max_session_length,
+            ttl=self.session_ttl,
+        )
 
     async def get_session_history(self, session_id: str) -> list[dict]:
         """
-        Retrieve the chat session history from Redis.
+        Retrieve the chat session history from the session store.
 
         Args:
             session_id (str): Unique identifier for the session.
@@ -47,6 +69,5 @@ class ChatSessionService:
         Returns:
             list[dict]: List of messages in the session.
         """
-        session_key = await self._session(session_id)
-        messages = self.redis_client.lrange(session_key, 0, -1)
+        messages = await self.session_store.range(self._session(session_id))
         return [json.loads(msg) for msg in messages] if messages else []
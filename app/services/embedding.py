@@ -1,9 +1,17 @@
 import asyncio
+import logging
 
 import numpy as np
 import tiktoken  # 토큰 계산을 위한 모듈
+from core.rate_limiter import Priority, RateLimiter
 from tqdm.asyncio import tqdm_asyncio
 
+log = logging.getLogger(__name__)
+
+# 배치를 나누면 일부가 성공할 수 있는 400 오류 (입력 길이 초과·잘못된 입력)
+_INPUT_ERROR_CODES = {"context_length_exceeded", "invalid_input", "string_above_max_length"}
+_INPUT_ERROR_HINTS = ("maximum context length", "too many tokens", "'$.input' is invalid", "invalid input")
+
 
 class EmbeddingService:
     """
@@ -11,13 +19,29 @@ class EmbeddingService:
     주어진 텍스트를 토큰 단위로 분할하고, 각 청크를 임베딩하여 평균 벡터를 반환합니다.
     """
 
-    def __init__(self, client, encoding, chunk_size, embedding_model, max_tokens, semaphore=None):
-        self.semaphore = semaphore
+    def __init__(
+        self,
+        client,
+        encoding,
+        chunk_size,
+        embedding_model,
+        max_tokens,
+        limiter: RateLimiter | None = None,
+        cache=None,
+        batch_size: int = 256,
+        batch_max_tokens: int = 100_000,
+    ):
+        # 모든 임베딩 호출이 공유하는 리미터 (AIMD 동시성 + RPM/TPM + 우선순위, 429 재시도 담당)
+        self.limiter = limiter or RateLimiter(name="embedding")
+        self.batch_size = batch_size  # 요청 1회당 최대 입력 개수
+        self.batch_max_tokens = batch_max_tokens  # 요청 1회당 최대 토큰 수
+        self.cache = cache  # EmbeddingCache (없으면 캐시 미사용)
         self.encoding = encoding
         self.chunk_size = chunk_size
         self.embedding_model = embedding_model
         self.max_tokens = max_tokens
-        self.encoding = tiktoken.encoding_for_model(embedding_model)
+        if self.encoding is None:
+            self.encoding = tiktoken.encoding_for_model(embedding_model)
         self.client = client  # 비동기 클라이언트
 
     # 텍스트의 토큰 수 계산
@@ -36,65 +60,179 @@ class EmbeddingService:
         norm = np.linalg.norm(vec)
         return (np.array(vec) / norm).tolist() if norm != 0 else vec
 
-    # 개별 텍스트 또는 분할된 청크들을 비동기로 임베딩
-    async def get_embedding_with_chunking(self, text: str, max_retries: int = 3, timeout: int = 10) -> list[float]:
+    # 캐시 적중/미스 통계
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache else {}
+
+    # 개별 텍스트 또는 분할된 청크들을 비동기로 임베딩 (캐시 우선 조회, 캐시 SQLite 입출력은 별도 스레드에서)
+    async def get_embedding_with_chunking(
+        self, text: str, max_retries: int = 3, timeout: int = 10, priority: Priority = Priority.INTERACTIVE
+    ) -> list[float]:
+        if self.cache is None:
+            return await self._embed_with_chunking(text, max_retries, timeout, priority)
+
+        cached = await asyncio.to_thread(self.cache.get, self.embedding_model, text)
+        if cached is not None:
+            return cached
+        embedding = await self._embed_with_chunking(text, max_retries, timeout, priority)
+        await asyncio.to_thread(self.cache.put, self.embedding_model, text, embedding)
+        return embedding
+
+    async def _embed_with_chunking(self, text: str, max_retries: int, timeout: int, priority: Priority) -> list[float]:
         if self.count_tokens(text) <= self.max_tokens:
-            embedding = await self.get_embedding(text, max_retries, timeout)
+            embedding = await self.get_embedding(text, max_retries, timeout, priority)
             return embedding
 
         # 청크 분할 후 각 청크 임베딩 → 평균 벡터 반환
         chunks = self.split_text_into_chunks(text, self.chunk_size)
-        chunk_embeddings = await asyncio.gather(*[self.get_embedding(chunk, max_retries, timeout) for chunk in chunks])
+        chunk_embeddings = await asyncio.gather(
+            *[self.get_embedding(chunk, max_retries, timeout, priority) for chunk in chunks]
+        )
         valid_embeddings = [e for e in chunk_embeddings if e]
         if not valid_embeddings:
             return []
         return list(np.mean(valid_embeddings, axis=0))
 
+    # 리미터 안에서 임베딩 API 호출 (응답 헤더로 남은 한도를, usage로 실제 토큰 수를 반영)
+    async def _create(self, texts: str | list[str], tokens: int, max_retries: int, timeout: int, priority: Priority):
+        async def call(lease):
+            raw = await self.client.embeddings.with_raw_response.create(input=texts, model=self.embedding_model)
+            lease.observe(raw.headers)
+            response = raw.parse()
+            lease.settle(getattr(response.usage, "total_tokens", None))
+            return response
+
+        return await self.limiter.run(call, tokens=tokens, priority=priority, max_attempts=max_retries, timeout=timeout)
+
     # 기본 임베딩 함수
     async def get_embedding(
         self,
         text: str,
         max_retries: int = 3,
         timeout: int = 10,
+        priority: Priority = Priority.INTERACTIVE,
     ) -> list[float]:
-        for attempt in range(1, max_retries + 1):
-            try:
-                print(text)
-                async with self.semaphore:
-                    response = await asyncio.wait_for(
-                        self.client.embeddings.create(input=text, model=self.embedding_model),
-                        timeout=timeout,
-                    )
-                    return self.normalize_vector(response.data[0].embedding)
-            except asyncio.TimeoutError:
-                print(f"[Timeout] {attempt}/{max_retries}회차 - '{text[:30]}...'")
-            except Exception as e:
-                print(f"[Exception] {attempt}/{max_retries}회차 - '{text[:30]}...': {e}")
-            await asyncio.sleep(2**attempt)
-        return []
-
-    # 전체 텍스트 리스트에 대해 비동기 임베딩 실행
-    async def get_all_embeddings_async(self, text_list: list[str]) -> list[list[float]]:
-        tasks = [self.get_embedding_with_chunking(text) for text in text_list]
-        results = []
-
-        for future in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Embedding"):
-            try:
-                result = await future
-                results.append(result)
-            except Exception as e:
-                print(f"[Unexpected Error] {e}")
-                results.append([])
-        return results
+        try:
+            response = await self._create(text, self.count_tokens(text), max_retries, timeout, priority)
+        except Exception as e:
+            log.warning("[Exception] %d회 시도 실패 - '%s...': %s: %s", max_retries, text[:30], type(e).__name__, e)
+            return []
+        return self.normalize_vector(response.data[0].embedding)
 
+    # 입력 때문에 거절된 400 오류인지 확인 (인증·서버·연결 오류는 배치를 나눠도 똑같이 실패하므로 제외)
+    @staticmethod
+    def is_input_error(error: BaseException) -> bool:
+        if getattr(error, "status_code", None) != 400:
+            return False
+        message = str(error).lower()
+        return getattr(error, "code", None) in _INPUT_ERROR_CODES or any(hint in message for hint in _INPUT_ERROR_HINTS)
 
-# EmbeddingService 클래스는 텍스트 임베딩을 비동기로 처리하며, 청크 단위로 분할하여 평균 벡터를 반환합니다.
-# 이 클래스는 토큰 수 계산, 텍스트 분할, 벡터 정규화, 개별 청크 임베딩, 전체 텍스트 리스트 임베딩 기능을 제공합니다.
-# 비동기 클라이언트와 세마포어를 사용하여 동시성을 유지하며, 오류 발생 시 재시도 로직을 포함합니다.
-# 이 서비스는 대규모 텍스트 데이터의 임베딩을 효율적으로 처리할 수 있도록 설계되었습니다.
-# 사용자는 이 클래스를 통해 텍스트 임베딩을 간편하게 수행할 수 있습니다.
-## 사용 예시:
-# embedding_service = EmbeddingService()
-# text = "여기에 임베딩할 텍스트를 입력하세요."
-# embedding = await embedding_service.get_embedding_with_chunking(text)
-# print(embedding)  # 임베딩 벡터 출력
+    # 여러 입력을 한 번의 요청으로 임베딩 (입력 순서대로 반환, 입력 오류로 거절되면 None)
+    # 그 외 오류는 get_embedding처럼 항목마다 []를 반환 (나눠도 똑같이 실패하므로 분할하지 않음)
+    async def _embed_batch(
+        self, texts: list[str], tokens: int, max_retries: int, timeout: int, priority: Priority
+    ) -> list[list[float]] | None:
+        try:
+            response = await self._create(texts, tokens, max_retries, timeout, priority)
+        except Exception as e:
+            if self.is_input_error(e):
+                log.warning("[Exception] batch(%d) 입력 오류: %s: %s", len(texts), type(e).__name__, e)
+                return None
+            log.warning("[Exception] batch(%d) %d회 시도 실패: %s: %s", len(texts), max_retries, type(e).__name__, e)
+            return [[] for _ in texts]
+        # 응답 순서가 아닌 index 기준으로 정렬해야 입력 순서가 보장됨
+        data = sorted(response.data, key=lambda d: d.index)
+        return [self.normalize_vector(d.embedding) for d in data]
+
+    # 입력 오류로 거절된 배치는 절반으로 나누어 재시도 (문제 입력만 고립시키고 그 입력은 []로 반환)
+    async def _embed_batch_with_split(
+        self, texts: list[str], token_counts: list[int], max_retries: int, timeout: int, priority: Priority
+    ) -> list[list[float]]:
+        embeddings = await self._embed_batch(texts, sum(token_counts), max_retries, timeout, priority)
+        if embeddings is not None:
+            return embeddings
+        if len(texts) == 1:
+            return [[]]
+        mid = len(texts) // 2
+        left, right = await asyncio.gather(
+            self._embed_batch_with_split(texts[:mid], token_counts[:mid], max_retries, timeout, priority),
+            self._embed_batch_with_split(texts[mid:], token_counts[mid:], max_retries, timeout, priority),
+        )
+        return left + right
+
+    # 토큰/개수 예산에 맞춰 입력 조각들을 배치로 묶음
+    def _pack_batches(self, token_counts: list[int]) -> list[list[int]]:
+        batches, current, current_tokens = [], [], 0
+        for i, n_tokens in enumerate(token_counts):
+            if current and (len(current) >= self.batch_size or current_tokens + n_tokens > self.batch_max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += n_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    # 전체 텍스트 리스트에 대해 배치 임베딩 실행 (입력 순서 보장, 캐시 SQLite 입출력은 별도 스레드에서)
+    async def get_all_embeddings_async(
+        self,
+        text_list: list[str],
+        max_retries: int = 2,
+        timeout: int = 60,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list[list[float]]:
+        results: list[list[float] | None] = [None] * len(text_list)
+        if self.cache is not None:
+            results = await asyncio.to_thread(self.cache.get_many, self.embedding_model, text_list)
+        missing = [i for i, r in enumerate(results) if r is None]
+        if not missing:
+            return results
+
+        # 토큰 수는 텍스트당 한 번만 계산하고, 긴 텍스트는 이미 인코딩된 토큰으로 청크 분할
+        pieces: list[str] = []
+        piece_tokens: list[int] = []
+        owners: list[int] = []
+        for i in missing:
+            tokens = self.encoding.encode(text_list[i])
+            if len(tokens) <= self.max_tokens:
+                spans = [tokens]
+            else:
+                spans = [tokens[j : j + self.chunk_size] for j in range(0, len(tokens), self.chunk_size)]
+            for span in spans:
+                pieces.append(text_list[i] if len(spans) == 1 else self.encoding.decode(span))
+                piece_tokens.append(max(len(span), 1))
+                owners.append(i)
+
+        batches = self._pack_batches(piece_tokens)
+        piece_embeddings: list[list[float]] = [[] for _ in pieces]
+
+        async def run(batch: list[int]):
+            embeddings = await self._embed_batch_with_split(
+                [pieces[k] for k in batch], [piece_tokens[k] for k in batch], max_retries, timeout, priority
+            )
+            for k, embedding in zip(batch, embeddings):
+                piece_embeddings[k] = embedding
+
+        await tqdm_asyncio.gather(*[run(batch) for batch in batches], desc="Embedding", disable=len(batches) < 2)
+
+        # 청크 단위 결과를 원래 텍스트 단위로 합침 (여러 청크면 평균 벡터)
+        grouped: dict[int, list[list[float]]] = {i: [] for i in missing}
+        for owner, embedding in zip(owners, piece_embeddings):
+            if embedding:
+                grouped[owner].append(embedding)
+        for i, embeddings in grouped.items():
+            if not embeddings:
+                results[i] = []
+            elif len(embeddings) == 1:
+                results[i] = embeddings[0]
+            else:
+                results[i] = np.mean(embeddings, axis=0).tolist()
+
+        if self.cache is not None:
+            await asyncio.to_thread(
+                self.cache.put_many,
+                self.embedding_model,
+                [text_list[i] for i in missing],
+                [results[i] for i in missing],
+            )
+        return results
@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Candidate:
+    """
+    검색 후보 문서 하나입니다. 이후 단계(리랭킹·프롬프트·로그·캐시)는 문서 id로 다룹니다.
+    ranks/scores는 검색기 이름(bm25, dense 등)별 순위(1부터)와 원점수입니다.
+    """
+
+    doc_id: str
+    text: str = ""
+    ranks: dict[str, int] = field(default_factory=dict)
+    scores: dict[str, float] = field(default_factory=dict)
+    fused_score: float = 0.0
+    rerank_score: float | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "doc_id": self.doc_id,
+            "ranks": self.ranks,
+            "scores": self.scores,
+            "fused_score": self.fused_score,
+            "rerank_score": self.rerank_score,
+        }
+
+
+def _rrf(ranked: dict[str, list[tuple[str, float]]], weights: dict[str, float], rrf_k: int) -> dict[str, float]:
+    # Reciprocal Rank Fusion: 점수 척도가 다른 검색기도 순위만으로 합산
+    fused: dict[str, float] = {}
+    for name, hits in ranked.items():
+        weight = weights.get(name, 1.0)
+        for rank, (doc_id, _) in enumerate(hits, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (rrf_k + rank)
+    return fused
+
+
+def _weighted(ranked: dict[str, list[tuple[str, float]]], weights: dict[str, float]) -> dict[str, float]:
+    # 검색기별 점수를 min-max 정규화한 뒤 가중합
+    fused: dict[str, float] = {}
+    for name, hits in ranked.items():
+        if not hits:
+            continue
+        weight = weights.get(name, 1.0)
+        values = [score for _, score in hits]
+        low, high = min(values), max(values)
+        for doc_id, score in hits:
+            normalized = (score - low) / (high - low) if high > low else 1.0
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * normalized
+    return fused
+
+
+def fuse(
+    ranked: dict[str, list[tuple[str, float]]],
+    method: str = "rrf",
+    weights: dict[str, float] | None = None,
+    rrf_k: int = 60,
+    limit: int | None = None,
+) -> list[Candidate]:
+    """
+    검색기별 (문서 id, 점수) 목록을 문서 id 기준으로 합쳐 융합 점수 순으로 정렬된 후보를 반환합니다.
+
+    Args:
+        ranked (dict): 검색기 이름 → 점수 내림차순 (doc_id, score) 목록
+        method (str): "rrf" (Reciprocal Rank Fusion) 또는 "weighted" (정규화 점수 가중합)
+        weights (dict | None): 검색기별 가중치 (기본 1.0)
+        rrf_k (int): RRF 상수
+        limit (int | None): 반환할 최대 후보 수
+
+    Returns:
+        list[Candidate]: text는 비어 있으며 호출 측에서 문서 저장소로 채웁니다.
+    """
+    weights = weights or {}
+    if method == "rrf":
+        fused = _rrf(ranked, weights, rrf_k)
+    elif method == "weighted":
+        fused = _weighted(ranked, weights)
+    else:
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    candidates: dict[str, Candidate] = {}
+    for name, hits in ranked.items():
+        for rank, (doc_id, score) in enumerate(hits, start=1):
+            candidate = candidates.setdefault(doc_id, Candidate(doc_id=doc_id, fused_score=fused[doc_id]))
+            candidate.ranks[name] = rank
+            candidate.scores[name] = score
+
+    ordered = sorted(candidates.values(), key=lambda c: c.fused_score, reverse=True)
+    return ordered[:limit] if limit is not None else ordered
@@ -1,33 +1,254 @@
+import asyncio
+import logging
+from collections import deque
+
+import numpy as np
+from core.rate_limiter import Priority, RateLimiter, estimate_message_tokens
 from models.schemas import AnswerAndFollowup
 
+log = logging.getLogger(__name__)
+
 
 class OpenAIClient:
-    def __init__(self, client: str):
+    """
+    GPT 스트리밍 호출 래퍼입니다. 꼬리 지연(tail latency)을 줄이기 위해
+    - 최근 첫 토큰 지연의 백분위수로 정한 마감 시간 안에 첫 토큰이 오지 않으면 같은 요청을 하나 더 보내고(헤징),
+      먼저 토큰을 보낸 스트림만 사용하고 나머지는 취소합니다.
+    - 실패(또는 idle_timeout 동안 응답 없음) 시 fallback 모델/엔드포인트로 처음부터 다시 생성합니다.
+    """
+
+    def __init__(
+        self,
+        client: str,
+        model: str = "gpt-4o-mini",
+        fallback_client=None,
+        fallback_model: str | None = None,
+        hedge_enabled: bool = True,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 0.5,
+        hedge_max_delay: float = 5.0,
+        hedge_initial_delay: float = 2.0,
+        idle_timeout: float = 30.0,
+        latency_window: int = 200,
+        limiter: RateLimiter | None = None,
+        fallback_limiter: RateLimiter | None = None,
+        encoding=None,
+        completion_token_estimate: int = 400,
+    ):
         self.client = client
+        self.model = model
+        self.fallback_client = fallback_client
+        self.fallback_model = fallback_model
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.hedge_initial_delay = hedge_initial_delay
+        self.idle_timeout = idle_timeout
+        self._first_token_latencies: deque[float] = deque(maxlen=latency_window)
+        self.counts = {"requests": 0, "hedged": 0, "hedges_skipped": 0, "hedge_wins": 0, "fallbacks": 0, "errors": 0}
+        # 스트림 하나가 끝날 때까지 슬롯 하나를 차지 (429는 헤징/폴백 경로로 처리, 리미터는 동시성·대기만 담당)
+        self.limiter = limiter or RateLimiter(name="chat")
+        # 폴백 모델은 한도가 따로 적용되므로 리미터도 따로 사용
+        self.fallback_limiter = fallback_limiter or RateLimiter(name="chat-fallback")
+        self.encoding = encoding
+        self.completion_token_estimate = completion_token_estimate
+
+    @staticmethod
+    def record_usage(usage, sink: dict):
+        """응답 usage(프롬프트/캐시/생성 토큰 수)를 sink에 기록합니다."""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        sink["prompt_tokens"] = usage.prompt_tokens
+        sink["cached_tokens"] = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        sink["completion_tokens"] = usage.completion_tokens
+
+    def first_token_deadline(self) -> float:
+        """헤지 요청을 보낼 첫 토큰 마감 시간(초). 표본이 적을 때는 초기값을 사용합니다."""
+        if len(self._first_token_latencies) < 20:
+            return self.hedge_initial_delay
+        deadline = float(np.percentile(self._first_token_latencies, self.hedge_percentile))
+        return min(max(deadline, self.hedge_min_delay), self.hedge_max_delay)
+
+    def stats(self) -> dict:
+        return {**self.counts, "first_token_deadline": self.first_token_deadline()}
+
+    @staticmethod
+    def _response_headers(stream):
+        """스트림의 HTTP 응답 헤더. (SDK가 구조화 스트림의 응답을 공개 속성으로 노출하지 않아 원본 스트림에서 읽음)"""
+        return getattr(getattr(getattr(stream, "_raw_stream", None), "response", None), "headers", None)
+
+    async def _pump(
+        self,
+        client,
+        model: str,
+        messages: list[dict],
+        queue: asyncio.Queue,
+        limiter: RateLimiter,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
+        """
+        스트림 하나를 읽어 ("acquired", 시각) / ("partial", dict) / ("done", usage) / ("error", exc)를 큐에 넣습니다.
+        acquired는 리미터 슬롯을 받은 시각(loop.time())으로, 첫 토큰 지연은 이때부터 잽니다. (리미터 대기 제외)
+        """
+        tokens = estimate_message_tokens(messages, self.encoding) + self.completion_token_estimate
+        try:
+            async with limiter.limit(tokens=tokens, priority=priority) as lease:
+                queue.put_nowait(("acquired", asyncio.get_running_loop().time()))
+                # Function Calling 스트리밍 호출 (include_usage: 마지막 청크로 토큰 사용량 수신)
+                async with client.beta.chat.completions.stream(
+                    model=model,
+                    messages=messages,
+                    response_format=AnswerAndFollowup,
+                    stream_options={"include_usage": True},
+                ) as stream:
+                    lease.observe(self._response_headers(stream))
+                    async for event in stream:
+                        if event.type == "content.delta":
+                            if event.parsed:
+                                queue.put_nowait(("partial", event.parsed))
+
+                        elif event.type == "error":
+                            raise RuntimeError(f"OpenAI Error: {event.error}")
+
+                    completion = await stream.get_final_completion()
+                lease.settle(getattr(completion.usage, "total_tokens", None))
+            queue.put_nowait(("done", completion.usage))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            queue.put_nowait(("error", e))
+
+    async def _stream_once(
+        self,
+        client,
+        model: str,
+        messages: list[dict],
+        usage: dict | None,
+        hedge: bool,
+        limiter: RateLimiter,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
+        """
+        한 모델에 대해 (필요하면 헤징하며) 스트리밍합니다. 실패하면 예외를 올립니다.
+        첫 토큰 마감 시간과 idle_timeout은 리미터 슬롯을 받은 뒤부터 재며, 리미터에 대기 중인 호출이 있거나
+        429로 멈춰 있을 때는 헤지 요청이 대기열만 늘리므로 보내지 않습니다.
+        """
+        loop = asyncio.get_running_loop()
+        racers: list[list] = []  # [task, queue, 슬롯을 받은 시각(받기 전에는 None)]
+
+        def launch():
+            queue = asyncio.Queue()
+            racers.append(
+                [asyncio.create_task(self._pump(client, model, messages, queue, limiter, priority)), queue, None]
+            )
+
+        launch()
+        deadline = None  # 첫 스트림이 슬롯을 받으면 정해짐
+        winner = None
+        try:
+            # 1. 첫 토큰 경쟁: 마감 시간까지 첫 토큰이 없으면 같은 요청을 하나 더 보냄
+            while winner is None:
+                hedging = hedge and len(racers) == 1 and deadline is not None
+                if hedging:
+                    timeout = max(deadline - loop.time(), 0)
+                elif any(racer[2] is not None for racer in racers):
+                    timeout = self.idle_timeout
+                else:
+                    timeout = None  # 리미터 대기 (대기 시간은 리미터가 한도·우선순위에 따라 정함)
+                getters = {asyncio.ensure_future(racer[1].get()): racer for racer in racers}
+                done, pending = await asyncio.wait(getters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for getter in pending:
+                    getter.cancel()
+                if not done:
+                    if hedging:
+                        if limiter.stats()["waiting"] or limiter.paused:
+                            self.counts["hedges_skipped"] += 1
+                            hedge = False
+                        else:
+                            self.counts["hedged"] += 1
+                            launch()
+                        continue
+                    raise TimeoutError(f"No first token from {model} within {self.idle_timeout}s")
+                for getter in done:
+                    racer = getters[getter]
+                    kind, payload = getter.result()
+                    if kind == "acquired":
+                        racer[2] = payload
+                        if deadline is None:
+                            deadline = payload + self.first_token_deadline()
+                        continue
+                    if kind == "error":
+                        racers.remove(racer)
+                        if not racers:
+                            raise payload
+                        continue
+                    if winner is None:
+                        winner, first = racer, (kind, payload)
+
+            # 2. 승자 외의 스트림은 취소
+            for racer in racers:
+                if racer is not winner:
+                    racer[0].cancel()
+            task, queue, started = winner
+            if priority == Priority.INTERACTIVE:
+                # 대량 처리의 첫 토큰 지연은 헤지 마감 시간 계산에서 제외
+                self._first_token_latencies.append(loop.time() - started)
+            if racers.index(winner) > 0:
+                self.counts["hedge_wins"] += 1
+
+            # 3. 승자 스트림을 끝까지 전달
+            kind, payload = first
+            while True:
+                if kind == "partial":
+                    yield payload
+                elif kind == "done":
+                    if usage is not None:
+                        self.record_usage(payload, usage)
+                    return
+                else:
+                    raise payload
+                kind, payload = await asyncio.wait_for(queue.get(), timeout=self.idle_timeout)
+        finally:
+            for task, _, _ in racers:
+                task.cancel()
 
-    async def stream_answer_and_followup(self, messages: list[dict]):
+    async def stream_answer_and_followup(
+        self, messages: list[dict], usage: dict | None = None, priority: Priority = Priority.INTERACTIVE
+    ):
         """
         OpenAI Function Calling 기반으로 '답변+후속질문'을 스트리밍 구조화하여 반환.
+        기본 모델이 실패하면 fallback 모델로 처음부터 다시 생성하며, 이때 답변은 처음부터 다시 전달됩니다.
 
         Args:
             messages (list[dict]): GPT 대화 히스토리
+            usage (dict | None): 주어지면 스트림 종료 후 prompt_tokens/cached_tokens/completion_tokens를 기록
+            priority (Priority): 호출 우선순위. 대량 처리(Priority.BULK)는 꼬리 지연보다 비용이 중요하므로 헤징하지 않음
 
         Yields:
             dict: {"answer": ..., "follow_up": ...} or 부분 결과
         """
-        # Function Calling 스트리밍 호출
-        async with self.client.beta.chat.completions.stream(
-            model="gpt-4o-mini",
-            messages=messages,
-            response_format=AnswerAndFollowup,
-        ) as stream:
-            async for event in stream:
-                if event.type == "content.delta":
-                    if event.parsed:
-                        yield event.parsed
+        self.counts["requests"] += 1
+        attempts = [(self.client, self.model, self.limiter)]
+        if self.fallback_model:
+            attempts.append((self.fallback_client or self.client, self.fallback_model, self.fallback_limiter))
 
-                elif event.type == "error":
-                    raise RuntimeError(f"OpenAI Error: {event.error}")
+        hedge = self.hedge_enabled and priority == Priority.INTERACTIVE
+        for i, (client, model, limiter) in enumerate(attempts):
+            if i > 0:
+                self.counts["fallbacks"] += 1
+            try:
+                async for partial in self._stream_once(
+                    client, model, messages, usage, hedge=hedge, limiter=limiter, priority=priority
+                ):
+                    yield partial
+                return
+            except Exception as e:
+                self.counts["errors"] += 1
+                if i == len(attempts) - 1:
+                    raise
+                log.warning("[OpenAIClient] %s 실패, fallback 사용: %s: %s", model, type(e).__name__, e)
 
     async def generate_response(self, messages: list[dict]) -> str:
         """
@@ -40,9 +261,12 @@ class OpenAIClient:
             str: The generated response from the model.
         """
 
-        response = await self.client.chat.completions.create(model="gpt-4o-mini", messages=messages, stream=True)
+        tokens = estimate_message_tokens(messages, self.encoding) + self.completion_token_estimate
+        async with self.limiter.limit(tokens=tokens) as lease:
+            response = await self.client.chat.completions.create(model=self.model, messages=messages, stream=True)
+            lease.observe(getattr(getattr(response, "response", None), "headers", None))
 
-        async for chunk in response:
-            content = chunk.choices[0].delta.content
-            if content:
-                yield content
+            async for chunk in response:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass, field
+
+from core.bm25_index import tokenize
+
+# 문서 본문을 문단/문장 단위로 나눔 (수집 시 정제된 청크는 "', '"로 이어져 있음)
+_PASSAGE_SPLIT = re.compile(r"\n|(?<=[.!?])\s+|',\s*'")
+
+NO_CONTEXT = "No relevant documents found."
+
+
+@dataclass
+class PackedContext:
+    """토큰 예산에 맞춰 채운 문맥과 요청별 보고용 정보입니다."""
+
+    text: str
+    doc_ids: list[str] = field(default_factory=list)  # 문맥에 포함된 문서 id (포함 순서)
+    trimmed_ids: list[str] = field(default_factory=list)  # 일부 구절만 포함된 문서 id
+    tokens: int = 0  # 문맥 토큰 수
+
+
+class ContextPacker:
+    """
+    리랭크 점수 순으로 정렬된 후보 문서를 토큰 예산 안에서 시스템 프롬프트용 문맥으로 채웁니다.
+    문서 토큰 수는 수집 시 DocumentStore에 미리 계산된 값을 쓰고,
+    예산을 넘는 문서는 질문과 겹치는 단어가 많은 구절만 남겨 남은 예산에 맞춥니다.
+    """
+
+    SEPARATOR = "\n\n"
+
+    def __init__(self, encoding, document_store, token_budget: int = 1500, min_passage_tokens: int = 32):
+        self.encoding = encoding
+        self.document_store = document_store
+        self.token_budget = token_budget
+        self.min_passage_tokens = min_passage_tokens
+        self._separator_tokens = len(encoding.encode(self.SEPARATOR))
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def _trim(self, query_terms: set[str], text: str, budget: int) -> tuple[str, int] | None:
+        """
+        질문 단어와 많이 겹치는 구절 순으로 예산까지 담고, 원래 순서대로 이어 붙입니다.
+        첫 구절(질문)은 항상 유지하며, 남길 구절이 없으면 None을 반환합니다.
+        """
+        passages = [p.strip() for p in _PASSAGE_SPLIT.split(text) if p.strip()]
+        if len(passages) < 2:
+            return None
+        counts = [self.count(p) + 1 for p in passages]  # +1: 구절 사이 공백
+        if counts[0] > budget:
+            return None
+
+        selected, used = [0], counts[0]
+        overlap = [len(query_terms & set(tokenize(p))) for p in passages]
+        for i in sorted(range(1, len(passages)), key=lambda i: (-overlap[i], i)):
+            if overlap[i] > 0 and used + counts[i] <= budget:
+                selected.append(i)
+                used += counts[i]
+        if len(selected) == 1:
+            return None
+        trimmed = " ".join(passages[i] for i in sorted(selected))
+        return trimmed, self.count(trimmed)
+
+    def pack(self, query: str, candidates: list) -> PackedContext:
+        """
+        후보(Candidate)를 순서대로 예산이 허락하는 만큼 문맥에 넣습니다.
+
+        Args:
+            query (str): 사용자 질문 (재기술된 질문)
+            candidates (list[Candidate]): 리랭크 점수 내림차순 후보
+
+        Returns:
+            PackedContext: 문맥 문자열, 포함된 문서 id, 토큰 수
+        """
+        packed = PackedContext(text="")
+        parts: list[str] = []
+        remaining = self.token_budget
+        query_terms = set(tokenize(query))
+
+        for candidate in candidates:
+            separator = self._separator_tokens if parts else 0
+            tokens = self.document_store.token_count(candidate.doc_id)
+            if tokens is None:
+                tokens = self.count(candidate.text)
+
+            if tokens + separator <= remaining:
+                parts.append(candidate.text)
+                remaining -= tokens + separator
+            elif remaining - separator >= self.min_passage_tokens:
+                trimmed = self._trim(query_terms, candidate.text, remaining - separator)
+                if trimmed is None:
+                    continue
+                text, tokens = trimmed
+                parts.append(text)
+                remaining -= tokens + separator
+                packed.trimmed_ids.append(candidate.doc_id)
+            else:
+                break
+            packed.doc_ids.append(candidate.doc_id)
+
+        packed.text = self.SEPARATOR.join(parts) if parts else NO_CONTEXT
+        packed.tokens = self.token_budget - remaining if parts else 0
+        return packed
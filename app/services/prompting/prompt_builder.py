@@ -2,29 +2,56 @@ import os
 from functools import lru_cache
 from string import Template
 
-TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "../../utils/templates/system_prompt.txt")
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "../../utils/templates")
+TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, "system_prompt.txt")
+CONTEXT_TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, "context_prompt.txt")
+
+
+@lru_cache(maxsize=None)
+def _read(path: str) -> str:
+    # 프로세스당 한 번만 읽어 요청마다 바이트 단위로 같은 시스템 프롬프트를 사용
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
 
 
 class prompt_builder:
-    """네이버 스마트스토어 상담원용 시스템 프롬프트 빌더"""
+    """
+    네이버 스마트스토어 상담원용 시스템 프롬프트 빌더
+
+    OpenAI 프롬프트 캐시는 요청 간 동일한 앞부분(1024토큰 이상)에만 적용되므로 메시지를
+    [고정 시스템 지침] + [대화 히스토리] + [참고 문서] + [사용자 질문] 순서로 배치합니다.
+    요청마다 달라지는 참고 문서는 고정 지침 뒤에 별도 메시지로 넣어 앞부분을 깨지 않습니다.
+    """
 
-    @lru_cache(maxsize=2000)
     def load_template(self) -> Template:
-        with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
-            return Template(f.read())
+        return Template(_read(CONTEXT_TEMPLATE_PATH))
 
-    def build_system_prompt(self, context: str) -> dict:
+    def build_system_prompt(self) -> dict:
         """
-        네이버 스마트스토어 상담원용 시스템 메시지를 반환합니다.
+        네이버 스마트스토어 상담원용 고정 시스템 메시지를 반환합니다. (요청 간 동일, 프롬프트 캐시 대상)
         messages 배열에 바로 쓸 수 있도록 role/content 구조를 반환합니다.
         """
+        return {
+            "role": "system",
+            "content": _read(TEMPLATE_PATH),
+        }
+
+    def build_context_prompt(self, context: str) -> dict:
+        """검색된 참고 문서를 담은 시스템 메시지를 반환합니다."""
         template = self.load_template()
-        system_content = template.safe_substitute(context=context)
         return {
             "role": "system",
-            "content": system_content,
+            "content": template.safe_substitute(context=context),
         }
 
+    def build_messages(self, context: str, history: list[dict], query: str) -> list[dict]:
+        """프롬프트 캐시 친화적인 순서로 전체 messages 배열을 만듭니다."""
+        return (
+            [self.build_system_prompt()]
+            + self.build_history_prompt(history)
+            + [self.build_context_prompt(context), self.build_user_prompt(query)]
+        )
+
     def build_history_prompt(self, history: list[dict]) -> str:
         """내부 히스토리(history)를 OpenAI messages로 변환"""
         messages = []
@@ -42,9 +69,3 @@ class prompt_builder:
             "role": "user",
             "content": query,
         }
-
-
-# app/api/ask.py 내 사용 예시:
-# from utils.prompt_builder import build_system_prompt, build_history_prompt
-# context_lines = build_history_prompt(history)
-# final_prompt = f"{context_lines}\n\n{build_system_prompt(context, query, rewrited_query)}"
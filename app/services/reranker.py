@@ -0,0 +1,222 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def export_onnx_reranker(model_name: str, output_dir: str, max_length: int = 512) -> str:
+    """
+    CrossEncoder 모델을 ONNX로 내보낸 뒤 int8 동적 양자화한 모델 경로를 반환합니다.
+    이미 내보낸 모델이 있으면 재사용합니다.
+    여러 워커가 동시에 시작해도 파일 잠금을 잡은 한 프로세스만 임시 디렉토리에서 내보내고, 양자화 모델을 마지막에
+    os.replace로 옮기므로 양자화 모델이 보이면 토크나이저 등 나머지 파일도 완성된 상태입니다.
+    """
+    import torch
+    from filelock import FileLock
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    quantized_path = os.path.join(output_dir, "model.int8.onnx")
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    os.makedirs(output_dir, exist_ok=True)
+    with FileLock(os.path.join(output_dir, ".export.lock")):
+        if os.path.exists(quantized_path):  # 잠금을 기다리는 동안 다른 워커가 내보낸 경우
+            return quantized_path
+        with tempfile.TemporaryDirectory(dir=output_dir, prefix=".export-") as tmp_dir:
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+            dummy = tokenizer(
+                [("스마트스토어 환불 방법", "Q: 환불은 어떻게 하나요?")],
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors="pt",
+            )
+            input_names = list(dummy.keys())
+            fp32_path = os.path.join(tmp_dir, "model.onnx")
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    (dict(dummy),),
+                    fp32_path,
+                    input_names=input_names,
+                    output_names=["logits"],
+                    dynamic_axes={
+                        **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                        "logits": {0: "batch"},
+                    },
+                    opset_version=17,
+                )
+            tokenizer.save_pretrained(tmp_dir)
+            quantize_dynamic(fp32_path, os.path.join(tmp_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+            # 양자화 모델을 맨 마지막에 옮겨, 중간에 중단되면 다음 시작 때 처음부터 다시 내보내도록 함
+            for name in sorted(os.listdir(tmp_dir), key=lambda name: name == "model.int8.onnx"):
+                os.replace(os.path.join(tmp_dir, name), os.path.join(output_dir, name))
+    return quantized_path
+
+
+class OnnxCrossEncoder:
+    """
+    int8 양자화된 ONNX 모델을 ONNX Runtime으로 실행하는 CPU 전용 리랭커입니다.
+    CrossEncoder.predict와 같은 인터페이스/점수 범위(sigmoid)를 제공합니다.
+    """
+
+    def __init__(self, model_name: str, onnx_dir: str, num_threads: int = 0, max_length: int = 512):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = os.path.join(onnx_dir, model_name.replace("/", "__"))
+        model_path = export_onnx_reranker(model_name, model_dir, max_length)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = num_threads  # 0이면 ONNX Runtime 기본값(물리 코어 수)
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+    def predict(self, pairs: list[tuple[str, str]], batch_size: int = 32, show_progress_bar: bool = False):
+        scores = []
+        for i in range(0, len(pairs), batch_size):
+            batch = pairs[i : i + batch_size]
+            features = self.tokenizer(
+                [q for q, _ in batch],
+                [d for _, d in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            inputs = {name: value.astype(np.int64) for name, value in features.items() if name in self.input_names}
+            logits = self.session.run(["logits"], inputs)[0]
+            scores.append(1.0 / (1.0 + np.exp(-logits[:, 0])))
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+
+class PassthroughReranker:
+    """
+    모델 없이 입력 순서(융합 순위)를 그대로 유지하는 점수를 돌려주는 리랭커입니다.
+    모델 다운로드 없이 전체 파이프라인을 돌려야 하는 부하 테스트·벤치마크용입니다.
+    """
+
+    def predict(self, pairs: list[tuple[str, str]], batch_size: int = 32, show_progress_bar: bool = False):
+        return -np.arange(len(pairs), dtype=np.float32)
+
+
+def load_reranker(
+    model_name: str, backend: str = "torch", onnx_dir: str = "models/reranker_onnx", num_threads: int = 0
+):
+    """
+    설정된 백엔드로 리랭커를 로드합니다.
+    - torch: sentence-transformers CrossEncoder (GPU가 있으면 cuda 사용)
+    - onnx: int8 양자화 ONNX Runtime 모델 (CPU 전용 배포용)
+    - none: 리랭킹 없이 융합 순위 유지 (벤치마크용)
+    """
+    if backend == "none":
+        return PassthroughReranker()
+    if backend == "onnx":
+        return OnnxCrossEncoder(model_name, onnx_dir, num_threads=num_threads)
+    if backend != "torch":
+        raise ValueError(f"지원하지 않는 리랭커 백엔드입니다: {backend}")
+    # torch는 모델을 만들 때만 불러옴 (services를 import하는 것만으로 torch가 필요하지 않도록)
+    import torch
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(model_name, device="cuda" if torch.cuda.is_available() else "cpu")
+
+
+class RerankScheduler:
+    """
+    여러 요청의 (질문, 문서) 쌍을 모아 한 번의 batched predict로 처리하는 마이크로 배칭 스케줄러입니다.
+    첫 요청이 들어온 뒤 최대 max_wait_ms 동안(또는 max_batch_size 쌍이 찰 때까지) 다른 요청을 기다렸다가
+    한꺼번에 추론하고, 각 요청에는 자기 몫의 점수만 돌려줍니다.
+    추론은 전용 스레드 1개에서만 실행되어 CPU 코어를 두고 요청끼리 경쟁하지 않습니다.
+    """
+
+    def __init__(self, reranker, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.reranker = reranker
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def _ensure_worker(self):
+        # 큐/워커는 실행 중인 이벤트 루프에 묶여야 하므로 첫 호출 시점에 생성
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def score(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """(질문, 문서) 쌍 목록의 리랭킹 점수를 입력 순서대로 반환합니다."""
+        if not pairs:
+            return []
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((pairs, future))
+        return await future
+
+    def _predict(self, pairs: list[tuple[str, str]]) -> list[float]:
+        scores = self.reranker.predict(pairs, batch_size=self.max_batch_size, show_progress_bar=False)
+        return [float(s) for s in scores]
+
+    async def _collect(self) -> list[tuple[list, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch_size:
+            # 이미 큐에 쌓인 요청은 기다리지 않고 바로 합침
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # 대기 중 취소된 요청은 제외
+            batch = [(pairs, future) for pairs, future in batch if not future.done()]
+            if not batch:
+                continue
+            flat_pairs = [pair for pairs, _ in batch for pair in pairs]
+            try:
+                scores = await loop.run_in_executor(self._executor, self._predict, flat_pairs)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for pairs, future in batch:
+                if not future.done():
+                    future.set_result(scores[offset : offset + len(pairs)])
+                offset += len(pairs)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
@@ -1,84 +1,225 @@
 import asyncio
+import time
 
-import numpy as np
-import torch
-from rank_bm25 import BM25Okapi
-from sentence_transformers import CrossEncoder
+from core.metrics import span
 
-loop = asyncio.get_event_loop()
-
-_bm25 = None
-_corpus = None
-_all_docs = None
+from .fusion import Candidate, fuse
 
 
 class RetrievalService:
     """
     Retriever class for handling context retrieval and reranking.
-    This class uses BM25 for initial document retrieval and CrossEncoder for reranking.
+    This class uses a precomputed BM25 index for initial document retrieval and CrossEncoder for reranking.
+    BM25와 dense 검색 결과는 문서 id 기준으로 융합(RRF 또는 가중합)한 뒤 리랭킹합니다.
     """
 
-    def __init__(self, reranking_model: str):
-        # CrossEncoder 로드
-        self.reranker = CrossEncoder(reranking_model, device="cuda" if torch.cuda.is_available() else "cpu")
-
-    def _init_bm25(self, full_collection):
-        """
-        Initialize BM25 with the corpus.
-        """
-        global _bm25, _corpus, _all_docs
-        if _bm25 is None:
-            resp = full_collection.get()
-            _all_docs = resp["documents"]
-            _corpus = [doc.split() for doc in _all_docs]
-            _bm25 = BM25Okapi(_corpus)
+    def __init__(
+        self,
+        rerank_scheduler,
+        bm25_index,
+        document_store,
+        dense_index=None,
+        dense_backend: str = "chroma",
+        fusion_method: str = "rrf",
+        fusion_rrf_k: int = 60,
+        bm25_weight: float = 1.0,
+        dense_weight: float = 1.0,
+        bm25_depth: int = 10,
+        dense_depth: int = 5,
+        rerank_depth: int = 15,
+        top_n: int = 5,
+    ):
+        # 리랭커는 요청 간 마이크로 배칭 스케줄러를 통해 공유
+        self.rerank_scheduler = rerank_scheduler
+        self.bm25_index = bm25_index
+        self.document_store = document_store
+        self.dense_index = dense_index
+        self.dense_backend = dense_backend
+        self.fusion_method = fusion_method
+        self.fusion_rrf_k = fusion_rrf_k
+        self.weights = {"bm25": bm25_weight, "dense": dense_weight}
+        self.bm25_depth = bm25_depth
+        self.dense_depth = dense_depth
+        self.rerank_depth = rerank_depth
+        self.top_n = top_n
+
+    def _bm25_search(self, query: str, n_results: int) -> list[tuple[str, float]]:
+        with span("bm25"):
+            hits = self.bm25_index.search(query, n_results)
+        return [(self.document_store.ids[row], score) for row, score in hits]
+
+    async def _dense_search(
+        self, query: str, collections: list, get_all_embeddings_async, n_results: int
+    ) -> list[tuple[str, float]]:
+        """질문 임베딩으로 제목을 검색해 (문서 id, 유사도) 목록을 반환합니다."""
+        if n_results <= 0:
+            # DENSE_DEPTH=0: dense 검색 생략 (BM25만 사용)
+            return []
+        q_embedding = (await get_all_embeddings_async(text_list=[query]))[0]
+        if self.dense_backend == "numpy" and self.dense_index is not None and self.dense_index.is_ready:
+            # 프로세스 내 행렬 검색: 행렬-벡터 곱 한 번 (Chroma 왕복 없음)
+            with span("dense_search"):
+                hits = self.dense_index.search(q_embedding, n_results)
+            return [(self.document_store.ids[row], score) for row, score in hits]
+
+        with span("dense_search"):
+            results = await asyncio.to_thread(
+                collections[0].query, query_embeddings=[q_embedding], n_results=n_results, include=["distances"]
+            )
+        # 거리가 작을수록 유사하므로 부호를 바꿔 점수로 사용
+        return [(doc_id, -distance) for doc_id, distance in zip(results["ids"][0], results["distances"][0])]
+
+    async def _dense_search_batch(
+        self, embeddings: list[list[float]], collections: list
+    ) -> list[list[tuple[str, float]]]:
+        """질문별 임베딩으로 한 번에 검색합니다. 임베딩이 없는(빈 리스트) 질문은 빈 결과입니다."""
+        if self.dense_depth <= 0:
+            return [[] for _ in embeddings]
+        if self.dense_backend == "numpy" and self.dense_index is not None and self.dense_index.is_ready:
+            # 행렬-행렬 곱 한 번
+            hits = await asyncio.to_thread(self.dense_index.search_batch, embeddings, self.dense_depth)
+            return [[(self.document_store.ids[row], score) for row, score in rows] for rows in hits]
+
+        results: list[list[tuple[str, float]]] = [[] for _ in embeddings]
+        valid = [i for i, embedding in enumerate(embeddings) if embedding]
+        if valid:
+            # Chroma도 여러 질문 임베딩을 요청 한 번으로 검색
+            response = await asyncio.to_thread(
+                collections[0].query,
+                query_embeddings=[embeddings[i] for i in valid],
+                n_results=self.dense_depth,
+                include=["distances"],
+            )
+            for i, ids, distances in zip(valid, response["ids"], response["distances"]):
+                results[i] = [(doc_id, -distance) for doc_id, distance in zip(ids, distances)]
+        return results
+
+    async def _fill_texts(self, candidates: list[Candidate], collections: list):
+        """후보의 본문을 문서 저장소에서 채웁니다. 저장소에 없는 id(인덱스 갱신 전)만 Chroma에서 가져옵니다."""
+        missing = []
+        for candidate in candidates:
+            row = self.document_store.row_of(candidate.doc_id)
+            if row is None:
+                missing.append(candidate)
+            else:
+                candidate.text = self.document_store.documents[row]
+        if missing:
+            resp = await asyncio.to_thread(collections[1].get, ids=[c.doc_id for c in missing])
+            text_by_id = dict(zip(resp["ids"], resp["documents"]))
+            for candidate in missing:
+                candidate.text = text_by_id.get(candidate.doc_id, "")
 
     async def retrieve_context(
-        self, query: str, collections: list, get_all_embeddings_async, top_k: int = 10, top_n: int = 5
-    ) -> str:
+        self, query: str, collections: list, get_all_embeddings_async, top_n: int | None = None
+    ) -> list[Candidate]:
         """
         Retrieve and rerank relevant context from Chroma collection using a reranker.
 
         Args:
             query (str): The user's input question.
-            collection: Chroma vector DB collection.
-            top_k (int): Number of documents to retrieve initially.
-            top_n (int): Number of top documents to return after reranking.
+            collections (list): [title collection, full QA collection]
+            top_n (int | None): Number of top documents to return after reranking. (기본값: 설정값)
 
         Returns:
-            str: Concatenated top_n document texts.
+            list[Candidate]: 리랭크 점수 순 상위 top_n 후보 (id, 본문, 검색기별 순위/점수, 리랭크 점수)
         """
 
-        self._init_bm25(collections[1])  # Initialize BM25 with the full collection
+        # 1. BM25 검색과 임베딩 검색을 동시에 실행
+        bm25_hits, dense_hits = await asyncio.gather(
+            asyncio.to_thread(self._bm25_search, query, self.bm25_depth),
+            self._dense_search(query, collections, get_all_embeddings_async, self.dense_depth),
+        )
+
+        # 2. 문서 id 기준 융합 후 상위 rerank_depth개만 리랭킹 대상으로 사용
+        candidates = fuse(
+            {"bm25": bm25_hits, "dense": dense_hits},
+            method=self.fusion_method,
+            weights=self.weights,
+            rrf_k=self.fusion_rrf_k,
+            limit=self.rerank_depth,
+        )
+        await self._fill_texts(candidates, collections)
+        candidates = [c for c in candidates if c.text]
+        if not candidates:
+            return []
+
+        # 3. CrossEncoder로 리랭킹 (동시 요청들과 묶어서 한 번에 추론)
+        with span("rerank"):
+            scores = await self.rerank_scheduler.score([(query, c.text) for c in candidates])
+        for candidate, score in zip(candidates, scores):
+            candidate.rerank_score = float(score)
+
+        # 4. 리랭크 점수 기준 상위 top_n 후보 반환
+        candidates.sort(key=lambda c: c.rerank_score, reverse=True)
+        return candidates[: top_n or self.top_n]
+
+    async def retrieve_batch(
+        self,
+        queries: list[str],
+        embeddings: list[list[float]],
+        collections: list,
+        top_n: int | None = None,
+        timings: dict | None = None,
+    ) -> list[list[Candidate]]:
+        """
+        여러 질문을 한 번에 검색·리랭킹합니다. (대량 평가·백필용, 질문별 결과는 retrieve_context와 같음)
+        BM25와 dense 검색은 질문 전체를 행렬 연산 한 번으로,
+        리랭킹은 모든 (질문, 문서) 쌍을 모델 배치 크기로 묶어 처리합니다.
+        요청 단위 span 대신 timings(주어지면)에 배치 단계별 소요 시간(bm25/dense_search/rerank)을 기록합니다.
 
-        # 임베딩으로 top_k 문서 검색
-        q_embedding = (await get_all_embeddings_async(text_list=[query]))[0]
-        results = collections[0].query(query_embeddings=[q_embedding], n_results=top_k // 2)
-        matched_ids = results["ids"][0]  # List[str]
-        sem_docs = collections[1].get(ids=matched_ids)["documents"]
-
-        # 1. BM25로 검색
-        tokemized_query = query.split()
-        bm25_scores = _bm25.get_scores(tokemized_query)
-        top_indices = np.argsort(bm25_scores)[-top_k:][::-1]
-        bm25_docs = [_all_docs[i] for i in top_indices]
-        if not bm25_docs:
-            return "No relevant documents found."
-
-        combined = []
-        for doc in bm25_docs + sem_docs:
-            if doc not in combined:
-                combined.append(doc)
-            if not combined:
-                return "No relevant documents found."
-
-        # 3. CrossEncoder로 리랭킹킹
-        query_doc_pairs = [(query, doc) for doc in combined]
-        scores = await loop.run_in_executor(None, self.reranker.predict, query_doc_pairs)
-
-        # 4. 유사도 기준 상위 top_n 문서 선택
-        top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_n]
-        top_docs = [combined[i] for i in top_indices]
-
-        # 5. 최종 문맥 반환
-        return "\n\n".join(top_docs)
+        Args:
+            queries (list[str]): 검색할 질문 목록
+            embeddings (list[list[float]]): 질문별 임베딩 (빈 리스트면 그 질문은 dense 검색 생략)
+            collections (list): [title collection, full QA collection]
+            top_n (int | None): 질문별로 반환할 후보 수 (기본값: 설정값)
+            timings (dict | None): 배치 단계별 소요 시간(초)을 기록할 dict
+        """
+        timings = timings if timings is not None else {}
+
+        async def measure(stage: str, awaitable):
+            start = time.perf_counter()
+            try:
+                return await awaitable
+            finally:
+                timings[stage] = time.perf_counter() - start
+
+        # 1. BM25 검색과 임베딩 검색을 동시에 실행 (각각 배치 한 번)
+        bm25_hits, dense_hits = await asyncio.gather(
+            measure("bm25", asyncio.to_thread(self.bm25_index.search_batch, queries, self.bm25_depth)),
+            measure("dense_search", self._dense_search_batch(embeddings, collections)),
+        )
+
+        # 2. 질문별로 융합한 뒤 모든 후보의 본문을 한 번에 채움
+        batch = [
+            fuse(
+                {"bm25": [(self.document_store.ids[row], score) for row, score in hits], "dense": dense},
+                method=self.fusion_method,
+                weights=self.weights,
+                rrf_k=self.fusion_rrf_k,
+                limit=self.rerank_depth,
+            )
+            for hits, dense in zip(bm25_hits, dense_hits)
+        ]
+        await self._fill_texts([c for candidates in batch for c in candidates], collections)
+        batch = [[c for c in candidates if c.text] for candidates in batch]
+
+        # 3. 모든 (질문, 문서) 쌍을 꽉 찬 모델 배치로 리랭킹
+        #    배치 하나씩 차례로 넣어, 그 사이 들어온 사용자 요청이 전체 배치가 끝날 때까지 기다리지 않게 함
+        pairs = [(query, c.text) for query, candidates in zip(queries, batch) for c in candidates]
+        step = self.rerank_scheduler.max_batch_size
+
+        async def rerank_all() -> list[float]:
+            scores = []
+            for start in range(0, len(pairs), step):
+                scores.extend(await self.rerank_scheduler.score(pairs[start : start + step]))
+            return scores
+
+        scores = await measure("rerank", rerank_all())
+        flat = (c for candidates in batch for c in candidates)
+        for candidate, score in zip(flat, scores):
+            candidate.rerank_score = float(score)
+
+        # 4. 질문별 리랭크 점수 기준 상위 top_n
+        for candidates in batch:
+            candidates.sort(key=lambda c: c.rerank_score, reverse=True)
+        return [candidates[: top_n or self.top_n] for candidates in batch]
@@ -1,7 +1,13 @@
+import asyncio
 import os
 import re
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
 from string import Template
 
+from core.rate_limiter import Priority, RateLimiter, estimate_message_tokens
+
 TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "../", "utils", "templates", "rewrite_prompt.txt")
 
 KEYWORDS = [
@@ -13,34 +19,121 @@ KEYWORDS = [
 _pat = re.compile("|".join(KEYWORDS), re.I)
 
 
+@lru_cache(maxsize=None)
+def _load_template() -> Template:
+    # 재기술 프롬프트 템플릿은 프로세스당 한 번만 읽어 컴파일
+    with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        return Template(f.read())
+
+
+def _normalize(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query).split()).lower()
+
+
 class RewriterService:
     """
     Service for rewriting user queries to match the context of Naver Smart Store.
     It uses OpenAI's API to generate a more suitable query if the original does not match predefined keywords.
+    LLM 호출 전에 키워드 → 로컬 게이트(FAQ 제목과의 임베딩 유사도) → 재기술 캐시 순으로 확인해 호출 수를 줄입니다.
     """
 
-    def __init__(self, client):
+    def __init__(
+        self,
+        client,
+        model: str = "gpt-4o-mini",
+        dense_index=None,
+        gate_threshold: float = 0.6,
+        cache_size: int = 1024,
+        limiter: RateLimiter | None = None,
+        encoding=None,
+        max_retries: int = 2,
+    ):
         self.client = client
         if not client:
             raise ValueError("OpenAI client is required for RewriterService.")
+        self.model = model
+        self.dense_index = dense_index
+        self.gate_threshold = gate_threshold
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.counts = {"keyword": 0, "gate": 0, "cache": 0, "llm": 0}
+        # 답변 생성과 같은 채팅 모델 한도를 공유하는 리미터 (토큰 추정에 채팅 모델 토크나이저 사용)
+        self.limiter = limiter or RateLimiter(name="chat")
+        self.encoding = encoding
+        self.max_retries = max_retries
 
     def build_write_prompt(self, context: str) -> str:
         """네이버 스마트스토어 상담원용 시스템 프롬프트 생성"""
-        with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
-            template = Template(f.read())
-        return template.safe_substitute(context=context)
+        return _load_template().safe_substitute(context=context)
+
+    async def _rewriter(self, query: str, priority: Priority = Priority.INTERACTIVE) -> str:
+        messages = [{"role": "user", "content": query}]
+        max_tokens = 200
 
-    async def _rewriter(self, query: str) -> str:
-        resp = await self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": query}],
-            max_tokens=200,
-        )
+        async def call(lease):
+            raw = await self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+            )
+            lease.observe(raw.headers)
+            resp = raw.parse()
+            lease.settle(getattr(resp.usage, "total_tokens", None))
+            return resp
 
+        tokens = estimate_message_tokens(messages, self.encoding) + max_tokens
+        resp = await self.limiter.run(call, tokens=tokens, priority=priority, max_attempts=self.max_retries)
         return resp.choices[0].message.content.strip()
 
-    async def rewrite_if_needed(self, q: str) -> str:
+    def passes_gate(self, embedding: list[float] | None) -> bool:
+        """질문 임베딩이 어떤 FAQ 제목과 충분히 비슷하면(검색이 이미 잘 되는 질문) 재기술을 생략합니다."""
+        if embedding is None or self.dense_index is None or not self.dense_index.is_ready:
+            return False
+        hits = self.dense_index.search(embedding, top_k=1)
+        return bool(hits) and hits[0][1] >= self.gate_threshold
+
+    def _remember(self, key: str, rewritten: str):
+        self._cache[key] = rewritten
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def rewrite_if_needed(
+        self, q: str, embedding: list[float] | None = None, priority: Priority = Priority.INTERACTIVE
+    ) -> str:
+        """
+        필요한 경우에만 질문을 재기술합니다.
+
+        Args:
+            q (str): 사용자 질문
+            embedding (list[float] | None): 질문 임베딩 (있으면 로컬 게이트에 사용)
+            priority (Priority): LLM 호출 우선순위 (대량 처리는 Priority.BULK)
+        """
         if _pat.search(q):
+            self.counts["keyword"] += 1
             return q
+        if self.passes_gate(embedding):
+            self.counts["gate"] += 1
+            return q
+
+        key = _normalize(q)
+        if key in self._cache:
+            self.counts["cache"] += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        # 같은 질문이 동시에 들어오면 LLM 호출 하나를 공유
+        task = self._inflight.get(key)
+        if task is None:
+            self.counts["llm"] += 1
+            task = asyncio.ensure_future(self._rewriter(self.build_write_prompt(context=q), priority))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        rewritten = await asyncio.shield(task)
+        self._remember(key, rewritten)
+        return rewritten
 
-        return await self._rewriter(self.build_write_prompt(context=q))
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        return {**self.counts, "llm_ratio": self.counts["llm"] / total if total else 0.0}
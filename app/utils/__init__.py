@@ -1,3 +1,4 @@
 from .reject_filters import RejectFilter
+from .sse import CumulativeEncoder, DeltaEncoder, get_encoder
 
-__all__ = ["RejectFilter"]
+__all__ = ["RejectFilter", "CumulativeEncoder", "DeltaEncoder", "get_encoder"]
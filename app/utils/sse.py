@@ -0,0 +1,84 @@
+import json
+
+PROTOCOL_VERSIONS = (1, 2)
+
+
+def format_event(data: dict, event: str | None = None, event_id: int | None = None) -> str:
+    """Server-Sent Events 한 건을 직렬화합니다."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class CumulativeEncoder:
+    """
+    프로토콜 v1 (레거시): 매 이벤트마다 누적된 partial 객체({"answer": ..., "follow_up": ...}) 전체를 전송합니다.
+    """
+
+    version = 1
+    media_type = "text/plain"
+    headers: dict[str, str] = {}
+
+    def start(self) -> list[str]:
+        return []
+
+    def partial(self, partial: dict) -> list[str]:
+        return [format_event(partial)]
+
+    def finish(self, final: dict) -> list[str]:
+        return []
+
+
+class DeltaEncoder:
+    """
+    프로토콜 v2: 답변은 이전 이벤트 이후 덧붙은 부분만(delta), 후속 질문은 마지막에 한 번만 전송합니다.
+    모든 이벤트에 증가하는 id를 붙이며, 이벤트 종류는 다음과 같습니다.
+
+    - start: {"protocol": 2}
+    - delta: {"text": 덧붙은 답변 텍스트}
+    - reset: {"answer": 전체 답변}  (새 답변이 이전 답변의 연장이 아닐 때, 클라이언트는 답변을 교체)
+    - follow_up: {"follow_up": [...]}
+    - done: {}
+    """
+
+    version = 2
+    media_type = "text/event-stream"
+    # 프록시(nginx 등)가 이벤트를 모아서 보내지 않도록 버퍼링·캐시 비활성화
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    def __init__(self):
+        self._event_id = 0
+        self._sent = ""
+
+    def _event(self, event: str, data: dict) -> str:
+        self._event_id += 1
+        return format_event(data, event=event, event_id=self._event_id)
+
+    def start(self) -> list[str]:
+        return [self._event("start", {"protocol": self.version})]
+
+    def partial(self, partial: dict) -> list[str]:
+        answer = partial.get("answer")
+        if answer is None or answer == self._sent:
+            return []
+        if answer.startswith(self._sent):
+            delta = answer[len(self._sent) :]
+            self._sent = answer
+            return [self._event("delta", {"text": delta})]
+        self._sent = answer
+        return [self._event("reset", {"answer": answer})]
+
+    def finish(self, final: dict) -> list[str]:
+        events = self.partial(final)
+        if final.get("follow_up"):
+            events.append(self._event("follow_up", {"follow_up": final["follow_up"]}))
+        events.append(self._event("done", {}))
+        return events
+
+
+def get_encoder(protocol: int):
+    return DeltaEncoder() if protocol == 2 else CumulativeEncoder()
@@ -1,11 +1,43 @@
 import io
 import json
-import re
+import time
 import uuid
 
 import requests
 import streamlit as st
 
+
+def iter_sse_events(lines):
+    """text/event-stream 응답을 (event, data) 단위로 파싱합니다."""
+    event, data = "message", []
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line:
+            if data:
+                try:
+                    yield event, json.loads("\n".join(data))
+                except json.JSONDecodeError:
+                    pass
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:") :].strip())
+
+
+def find_exact_faq(question: str):
+    """질문이 FAQ 제목과 정확히 같으면 (제목, 문서 원문)을 반환합니다. 없거나 오류면 None."""
+    try:
+        response = requests.get("http://localhost:8000/suggest", params={"q": question, "limit": 1}, timeout=1)
+        suggestions = response.json()["suggestions"] if response.status_code == 200 else []
+        if not suggestions or suggestions[0]["match"] != "exact":
+            return None
+        faq = requests.get(f"http://localhost:8000/faq/{suggestions[0]['id']}", timeout=1)
+        return (suggestions[0]["title"], faq.json()["document"]) if faq.status_code == 200 else None
+    except requests.RequestException:
+        return None
+
+
 st.set_page_config(page_title="Cox Chatbot", layout="wide")
 st.title("🧠 Cox Chatbot")
 
@@ -30,62 +62,74 @@ if question:
     with st.chat_message("user"):
         st.markdown(question)
 
+    # FAQ 제목과 정확히 같은 질문은 답변 생성 없이 FAQ 원문을 바로 보여줌
+    exact_faq = find_exact_faq(question)
+
     # 메시지 전송
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
         full_answer = ""
-        full_followup = ""
-        # 스트리밍 요청
-        with requests.post(
-            "http://localhost:8000/ask/stream",
-            json={"session_id": st.session_state.session_id, "question": question},
-            stream=True,
-        ) as response:
-            if response.status_code != 200:
-                message_placeholder.error("⚠️ 질문 처리 중 오류 발생")
-            else:
-
-                # 안전하게 한 줄씩 처리
-                text_stream = io.TextIOWrapper(response.raw, encoding="utf-8")
-                for line in text_stream:
-                    if line.startswith("data:"):
-                        chunk = line[len("data:") :].strip()
-                        # partial 토큰 (따옴표로 감싼 단어)
-                        try:
-                            data = json.loads(chunk)
-                            # 부분 스트림: answer/follow_up가 둘 다 한꺼번에 올 수도 있고, 일부만 올 수도 있음
-                            if "answer" in data:
-                                # answer는 누적(스트리밍)로 붙이기보다 최신값(최종결과)로 갱신이 더 안전함
-                                # 혹시 토큰 단위로 잘라올 수도 있으므로 +=로 붙여도 무방
-                                full_answer = data["answer"]
-                                answer_lines = re.split(r"\s*(\d+[.)])\s*", full_answer)
-                                parsed_lines = []
-                                buffer = ""
-                                for part in answer_lines:
-                                    if re.match(r"\d+\)", part):
-                                        if buffer:
-                                            parsed_lines.append(buffer.strip())
-                                        buffer = part
-                                    else:
-                                        buffer += f" {part}"
-                                if buffer:
-                                    parsed_lines.append(buffer.strip())
-
-                                # 화면에 마크다운 갱신
-                                formatted = "\n".join(parsed_lines)
-                                message_placeholder.markdown(full_answer)
-                            if "follow_up" in data:
-                                full_followup = data["follow_up"]
-                        except Exception:
-                            # 일부 incomplete chunk면 그냥 무시
-                            pass
-                message_placeholder.markdown(full_answer)
-                if full_followup:
-                    st.info("유도질문:\n" + "\n".join(f"- {q}" for q in full_followup))
+        full_followup = []
+        last_render = 0.0
+        if exact_faq is not None:
+            full_answer = f"**FAQ: {exact_faq[0]}**\n\n{exact_faq[1]}"
+            message_placeholder.markdown(full_answer)
+        else:
+            # 스트리밍 요청 (프로토콜 v2: 답변 delta만 수신해 이어 붙임)
+            with requests.post(
+                "http://localhost:8000/ask/stream",
+                json={"session_id": st.session_state.session_id, "question": question, "protocol": 2},
+                stream=True,
+            ) as response:
+                if response.status_code != 200:
+                    message_placeholder.error("⚠️ 질문 처리 중 오류 발생")
+                else:
+                    text_stream = io.TextIOWrapper(response.raw, encoding="utf-8")
+                    for event, data in iter_sse_events(text_stream):
+                        if event == "delta":
+                            full_answer += data["text"]
+                        elif event == "reset":
+                            full_answer = data["answer"]
+                        elif event == "follow_up":
+                            full_followup = data["follow_up"]
+                        elif event == "done":
+                            break
+                        # 화면 갱신은 최대 초당 20회로 제한
+                        if event in ("delta", "reset") and time.monotonic() - last_render > 0.05:
+                            message_placeholder.markdown(full_answer)
+                            last_render = time.monotonic()
+                    message_placeholder.markdown(full_answer)
+                    if full_followup:
+                        st.info("유도질문:\n" + "\n".join(f"- {q}" for q in full_followup))
 
     # 대화 기록 저장
     st.session_state.chat_history.append({"role": "assistant", "content": full_answer})
 
+# 사이드바 - FAQ 제목 검색 (답변 생성 없이 FAQ 원문 확인)
+st.sidebar.title("🔎 FAQ 찾기")
+faq_query = st.sidebar.text_input("FAQ 제목 검색")
+if faq_query:
+    try:
+        response = requests.get("http://localhost:8000/suggest", params={"q": faq_query}, timeout=1)
+        suggestions = response.json()["suggestions"] if response.status_code == 200 else []
+    except requests.RequestException:
+        suggestions = []
+    # 문서 원문은 제목을 눌렀을 때만 조회 (추천 목록을 그릴 때마다 제목 수만큼 요청하지 않도록)
+    for suggestion in suggestions:
+        if st.sidebar.button(suggestion["title"], key=f"faq_{suggestion['id']}"):
+            st.session_state.faq_id = suggestion["id"]
+    if not suggestions:
+        st.sidebar.caption("일치하는 FAQ가 없습니다.")
+    if st.session_state.get("faq_id") in {suggestion["id"] for suggestion in suggestions}:
+        try:
+            faq = requests.get(f"http://localhost:8000/faq/{st.session_state.faq_id}", timeout=2)
+            if faq.status_code == 200:
+                st.sidebar.markdown(faq.json()["document"])
+            else:
+                st.sidebar.error("FAQ 조회 실패")
+        except requests.RequestException:
+            st.sidebar.error("FAQ 조회 실패")
+
 # 사이드바 - 로그
 st.sidebar.title("📜 로그 기록")
 if st.sidebar.button("로그 불러오기"):
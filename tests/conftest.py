@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 앱 모듈은 app/ 기준 최상위 import (core, services, ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
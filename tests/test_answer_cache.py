@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import numpy as np
+from services.answer_cache import SemanticAnswerCache
+
+
+def unit(*values: float) -> list[float]:
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def make_cache(**kwargs) -> SemanticAnswerCache:
+    return SemanticAnswerCache(SimpleNamespace(version="v1"), **kwargs)
+
+
+def test_lookup_hits_above_threshold_and_misses_below():
+    cache = make_cache(threshold=0.95)
+    cache.store("환불 방법", unit(1.0, 0.0, 0.0), {"answer": "환불 답변"})
+
+    assert cache.lookup(unit(1.0, 0.1, 0.0)) == {"answer": "환불 답변"}  # cos ≈ 0.995
+    assert cache.lookup(unit(1.0, 0.5, 0.0)) is None  # cos ≈ 0.894
+    assert cache.lookup([]) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3, "entries": 1}
+
+
+def test_unnormalized_embeddings_compare_by_cosine():
+    # 청크 평균 임베딩처럼 길이가 1이 아닌 벡터도 코사인 유사도로 비교
+    cache = make_cache(threshold=0.95)
+    cache.store("긴 질문", [0.3, 0.3, 0.0], {"answer": "답변"})
+
+    assert cache.lookup([0.3, 0.31, 0.0]) == {"answer": "답변"}  # 내적은 0.18이지만 cos ≈ 1.0
+    assert cache.lookup([5.0, 0.0, 0.0]) is None  # 내적은 1.5이지만 cos ≈ 0.707
+    cache.store("영벡터", [0.0, 0.0, 0.0], {"answer": "저장 안 함"})
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(threshold=0.99, max_entries=2)
+    cache.store("a", unit(1.0, 0.0, 0.0), {"answer": "A"})
+    cache.store("b", unit(0.0, 1.0, 0.0), {"answer": "B"})
+    assert cache.lookup(unit(1.0, 0.0, 0.0)) == {"answer": "A"}  # a를 최근 사용으로
+
+    cache.store("c", unit(0.0, 0.0, 1.0), {"answer": "C"})
+    assert cache.lookup(unit(0.0, 1.0, 0.0)) is None
+    assert cache.lookup(unit(1.0, 0.0, 0.0)) == {"answer": "A"}
+    assert cache.lookup(unit(0.0, 0.0, 1.0)) == {"answer": "C"}
+
+
+def test_entries_expire_with_corpus_version_and_ttl():
+    document_store = SimpleNamespace(version="v1")
+    cache = SemanticAnswerCache(document_store, threshold=0.95)
+    cache.store("a", unit(1.0, 0.0), {"answer": "A"})
+    document_store.version = "v2"
+    assert cache.lookup(unit(1.0, 0.0)) is None and cache.stats()["entries"] == 0
+
+    cache = SemanticAnswerCache(document_store, threshold=0.95, ttl_seconds=-1)
+    cache.store("a", unit(1.0, 0.0), {"answer": "A"})
+    assert cache.lookup(unit(1.0, 0.0)) is None
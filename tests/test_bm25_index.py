@@ -0,0 +1,69 @@
+import math
+from collections import Counter
+
+import pytest
+from core.bm25_index import BM25Index, tokenize
+
+DOCUMENTS = [
+    "Q: 스마트스토어 환불은 어떻게 하나요?\nA: 판매자센터에서 환불을 처리합니다.",
+    "Q: 정산 주기는 어떻게 되나요?\nA: 구매확정 후 다음 영업일에 정산됩니다.",
+    "Q: 배송비 환불\nA: 반품 시 배송비는 구매자가 부담합니다.",
+    "Q: 스마트스토어 가입 방법\nA: 판매자 가입 페이지에서 신청합니다.",
+]
+
+
+def reference_scores(documents: list[str], query: str, k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """정의대로 모든 문서를 계산한 BM25 점수 (인덱스 결과 비교용)"""
+    term_freqs = [Counter(tokenize(doc)) for doc in documents]
+    avgdl = sum(sum(tf.values()) for tf in term_freqs) / len(documents)
+    scores = []
+    for tf in term_freqs:
+        score, dl = 0.0, sum(tf.values())
+        for term, query_tf in Counter(tokenize(query)).items():
+            if term not in tf:
+                continue
+            df = sum(term in other for other in term_freqs)
+            idf = math.log(1.0 + (len(documents) - df + 0.5) / (df + 0.5))
+            score += query_tf * idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * dl / avgdl))
+        scores.append(score)
+    return scores
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.build(DOCUMENTS)
+    return index
+
+
+def test_tokenize_adds_bigrams_for_long_korean_words():
+    assert tokenize("스마트스토어 FAQ 환불") == ["스마트스토어", "스마", "마트", "트스", "스토", "토어", "faq", "환불"]
+
+
+@pytest.mark.parametrize("query", ["환불", "스마트스토어에서 환불", "정산 주기", "가입", "배송비 환불 환불"])
+def test_search_matches_reference_bm25(index, query):
+    expected = reference_scores(DOCUMENTS, query)
+    results = index.search(query, top_k=10)
+
+    assert {row for row, _ in results} == {row for row, score in enumerate(expected) if score > 0}
+    for row, score in results:
+        assert score == pytest.approx(expected[row], rel=1e-5)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_search_top_k_and_unknown_terms(index):
+    assert [row for row, _ in index.search("환불", top_k=1)] == [0]
+    assert index.search("없는단어", top_k=5) == []
+    assert index.search("환불", top_k=0) == []
+
+
+def test_search_batch_matches_search_and_survives_reload(index, tmp_path):
+    queries = ["환불", "없는단어", "스마트스토어 가입", "정산"]
+    index.save()
+    loaded = BM25Index(str(tmp_path))
+
+    assert loaded.is_ready
+    for query, batch in zip(queries, loaded.search_batch(queries, top_k=3)):
+        single = index.search(query, top_k=3)
+        assert [row for row, _ in batch] == [row for row, _ in single]
+        assert [score for _, score in batch] == pytest.approx([score for _, score in single], rel=1e-5)
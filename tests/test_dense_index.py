@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from core.dense_index import DenseIndex
+
+IDS = ["qa_a", "qa_b", "qa_c", "qa_d"]
+EMBEDDINGS = [[1.0, 0.0, 0.0], None, [0.0, 1.0, 0.0], [0.6, 0.8, 0.0]]
+
+
+@pytest.fixture(params=["float32", "float16"])
+def index(request, tmp_path):
+    index = DenseIndex(str(tmp_path), dtype=request.param)
+    index.build(IDS, EMBEDDINGS)
+    return index
+
+
+def test_search_ranks_by_cosine_similarity(index):
+    rows = index.search([2.0, 0.1, 0.0], top_k=2)
+    assert [row for row, _ in rows] == [0, 3]
+    assert rows[0][1] == pytest.approx(0.9988, abs=1e-3)
+
+
+def test_rows_without_embedding_never_appear(index):
+    # 질문과 직교해 모든 점수가 0 이하여도 임베딩이 없는 행(1)은 나오지 않음
+    rows = index.search([0.0, 0.0, 1.0], top_k=10)
+    assert sorted(row for row, _ in rows) == [0, 2, 3]
+    assert all(np.isfinite(score) for _, score in rows)
+    assert index.search([0.0, 0.0, 0.0]) == []
+
+
+def test_search_batch_matches_search(index):
+    queries = [[2.0, 0.1, 0.0], [], [0.0, 0.0, 1.0], [0.0, 0.0, 0.0], [0.1, 1.0, 0.0]]
+    batch = index.search_batch(queries, top_k=10)
+    assert batch[1] == [] and batch[3] == []
+    for query, rows in zip(queries, batch):
+        if len(query) and any(query):
+            single = index.search(query, top_k=10)
+            assert [row for row, _ in rows] == [row for row, _ in single]
+            assert 1 not in [row for row, _ in rows]
+
+
+def test_save_and_load_keep_empty_rows_masked(index, tmp_path):
+    index.save()
+    loaded = DenseIndex(str(tmp_path), dtype=index.dtype.name)
+    assert list(loaded.ids) == IDS and loaded.searchable == 3
+    assert [row for row, _ in loaded.search([0.0, 0.0, 1.0], top_k=10)] == [
+        row for row, _ in index.search([0.0, 0.0, 1.0], top_k=10)
+    ]
+
+
+def test_index_without_any_embedding_returns_nothing(tmp_path):
+    index = DenseIndex(str(tmp_path))
+    index.build(["qa_a"], [None])
+    assert index.search([1.0], top_k=3) == [] and index.search_batch([[1.0]]) == [[]]
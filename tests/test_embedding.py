@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from core.embedding_cache import EmbeddingCache
+from services.embedding import EmbeddingService
+
+
+class CharEncoding:
+    """글자 하나를 토큰 하나로 세는 가짜 tiktoken 인코딩"""
+
+    def encode(self, text: str) -> list[str]:
+        return list(text)
+
+    def decode(self, tokens: list[str]) -> str:
+        return "".join(tokens)
+
+
+class APIError(Exception):
+    def __init__(self, status_code: int, message: str, code: str | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+class FakeEmbeddings:
+    """입력에 "bad"가 있으면 400, error가 주어지면 그 오류로 실패하는 가짜 embeddings 엔드포인트"""
+
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.requests: list[list[str]] = []
+        self.with_raw_response = self
+
+    async def create(self, input, model):
+        texts = [input] if isinstance(input, str) else input
+        self.requests.append(texts)
+        if self.error is not None:
+            raise self.error
+        if any("bad" in text for text in texts):
+            raise APIError(400, "'$.input' is invalid. Please check the API reference.")
+        data = [SimpleNamespace(index=i, embedding=[float(len(text)), 1.0]) for i, text in enumerate(texts)]
+        response = SimpleNamespace(data=data, usage=SimpleNamespace(total_tokens=sum(map(len, texts))))
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+
+def make_service(embeddings: FakeEmbeddings) -> EmbeddingService:
+    client = SimpleNamespace(embeddings=embeddings)
+    return EmbeddingService(client, CharEncoding(), chunk_size=100, embedding_model="fake", max_tokens=100)
+
+
+def test_input_error_isolates_the_bad_item():
+    embeddings = FakeEmbeddings()
+    texts = ["환불", "bad", "배송 조회", "정산"]
+
+    results = asyncio.run(make_service(embeddings).get_all_embeddings_async(texts))
+    assert results[1] == []
+    assert [len(r) for r in results] == [2, 0, 2, 2]
+    assert len(embeddings.requests) == 5  # 4개 → 2+2 → 1+1 (bad가 든 쪽만 다시 나눔)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [APIError(401, "Incorrect API key provided"), APIError(500, "server error"), ConnectionError("reset")],
+)
+def test_other_errors_fail_the_batch_without_splitting(error):
+    embeddings = FakeEmbeddings(error=error)
+
+    texts = ["환불", "배송", "정산", "취소"]
+    results = asyncio.run(make_service(embeddings).get_all_embeddings_async(texts, max_retries=1))
+    assert results == [[], [], [], []]  # get_embedding과 같이 실패한 항목은 []
+    assert len(embeddings.requests) == 1
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (APIError(400, "This model's maximum context length is 8192 tokens"), True),
+        (APIError(400, "bad", code="context_length_exceeded"), True),
+        (APIError(400, "The model `x` does not exist", code="model_not_found"), False),
+        (APIError(429, "Rate limit reached"), False),
+    ],
+)
+def test_is_input_error(error, expected):
+    assert EmbeddingService.is_input_error(error) is expected
+
+
+def test_cache_io_runs_off_the_event_loop_thread(tmp_path):
+    embeddings = FakeEmbeddings()
+    service = make_service(embeddings)
+    service.cache = cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    threads = []
+    for name in ("get_many", "put_many"):
+        method = getattr(cache, name)
+
+        def recorded(*args, _method=method):
+            threads.append(threading.get_ident())
+            return _method(*args)
+
+        setattr(cache, name, recorded)
+
+    async def main():
+        first = await service.get_all_embeddings_async(["환불", "정산"])
+        second = await service.get_all_embeddings_async(["환불", "정산"])
+        single = await service.get_embedding_with_chunking("환불")
+        return first, second, single, threading.get_ident()
+
+    first, second, single, loop_thread = asyncio.run(main())
+    assert np.allclose(first, second) and single == second[0]  # 캐시는 float32로 저장
+    assert len(embeddings.requests) == 1  # 두 번째 호출부터는 캐시 적중
+    assert len(threads) == 4 and loop_thread not in threads
+    cache.close()
@@ -0,0 +1,47 @@
+import pytest
+from services.fusion import fuse
+
+RANKED = {
+    "bm25": [("a", 12.0), ("b", 8.0), ("c", 2.0)],
+    "dense": [("c", 0.91), ("a", 0.85), ("d", 0.40)],
+}
+
+
+def test_rrf_sums_reciprocal_ranks_by_document_id():
+    candidates = fuse(RANKED, method="rrf", rrf_k=60)
+
+    assert [c.doc_id for c in candidates] == ["a", "c", "b", "d"]
+    a = candidates[0]
+    assert a.fused_score == pytest.approx(1 / 61 + 1 / 62)
+    assert a.ranks == {"bm25": 1, "dense": 2} and a.scores == {"bm25": 12.0, "dense": 0.85}
+    assert candidates[2].ranks == {"bm25": 2} and candidates[3].ranks == {"dense": 3}
+    assert a.text == "" and a.rerank_score is None
+
+
+def test_rrf_weights_and_limit():
+    candidates = fuse(RANKED, method="rrf", weights={"dense": 3.0}, rrf_k=60, limit=2)
+
+    assert [c.doc_id for c in candidates] == ["c", "a"]
+    assert candidates[0].fused_score == pytest.approx(1 / 63 + 3 / 61)
+
+
+def test_weighted_fusion_min_max_normalizes_each_retriever():
+    candidates = fuse(RANKED, method="weighted", weights={"bm25": 1.0, "dense": 0.5})
+    scores = {c.doc_id: c.fused_score for c in candidates}
+
+    assert scores["a"] == pytest.approx(1.0 + 0.5 * (0.85 - 0.40) / (0.91 - 0.40))
+    assert scores["b"] == pytest.approx(0.6)
+    assert scores["c"] == pytest.approx(0.0 + 0.5 * 1.0)
+    assert scores["d"] == pytest.approx(0.0)
+    assert [c.doc_id for c in candidates] == ["a", "b", "c", "d"]
+
+
+def test_weighted_fusion_handles_equal_and_empty_scores():
+    candidates = fuse({"bm25": [("a", 3.0), ("b", 3.0)], "dense": []}, method="weighted")
+
+    assert [(c.doc_id, c.fused_score) for c in candidates] == [("a", 1.0), ("b", 1.0)]
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        fuse(RANKED, method="max")
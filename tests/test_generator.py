@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+from core.rate_limiter import RateLimiter
+from services.generator import OpenAIClient
+
+
+class FakeStream:
+    """beta.chat.completions.stream()이 돌려주는 스트림 흉내 (first_token_delay 뒤에 답변 하나를 보냄)"""
+
+    def __init__(self, first_token_delay: float, headers: dict | None = None):
+        self.first_token_delay = first_token_delay
+        self._raw_stream = SimpleNamespace(response=SimpleNamespace(headers=headers or {}))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.first_token_delay)
+        yield SimpleNamespace(type="content.delta", parsed={"answer": "네", "follow_up": []})
+
+    async def get_final_completion(self):
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12))
+
+
+class FakeClient:
+    """호출마다 first_token_delays의 다음 지연으로 스트림을 여는 가짜 AsyncOpenAI"""
+
+    def __init__(self, *first_token_delays: float, headers: dict | None = None, error: Exception | None = None):
+        self.delays = list(first_token_delays)
+        self.headers = headers
+        self.error = error
+        self.calls = 0
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=self))
+
+    def stream(self, **kwargs):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return FakeStream(delay, self.headers)
+
+
+async def collect(generator: OpenAIClient) -> list[dict]:
+    return [partial async for partial in generator.stream_answer_and_followup([{"role": "user", "content": "환불"}])]
+
+
+def make_generator(client: FakeClient, limiter: RateLimiter) -> OpenAIClient:
+    return OpenAIClient(client, hedge_initial_delay=0.1, idle_timeout=5.0, limiter=limiter)
+
+
+def test_hedges_when_first_token_is_late():
+    generator = make_generator(FakeClient(1.0, 0.01), RateLimiter(max_concurrency=4))
+
+    assert asyncio.run(collect(generator)) == [{"answer": "네", "follow_up": []}]
+    assert generator.counts["hedged"] == 1 and generator.counts["hedge_wins"] == 1
+
+
+def test_limiter_queue_wait_does_not_trigger_hedge_or_count_as_latency():
+    limiter = RateLimiter(max_concurrency=1)
+    client = FakeClient(0.02)
+    generator = make_generator(client, limiter)
+
+    async def main():
+        async with limiter.limit():
+            task = asyncio.create_task(collect(generator))
+            await asyncio.sleep(0.3)  # 마감 시간(0.1초)보다 오래 슬롯을 잡고 있음
+        return await task
+
+    assert asyncio.run(main())
+    assert client.calls == 1 and generator.counts["hedged"] == 0
+    assert generator._first_token_latencies[0] < 0.2
+
+
+def test_skips_hedge_while_limiter_has_waiters():
+    limiter = RateLimiter(max_concurrency=1)
+    client = FakeClient(0.3, 0.01)
+    generator = make_generator(client, limiter)
+
+    async def main():
+        task = asyncio.create_task(collect(generator))
+        await asyncio.sleep(0.02)  # 첫 스트림이 슬롯을 받은 뒤 다른 호출이 대기
+        waiter = asyncio.create_task(limiter.acquire())
+        result = await task
+        limiter.release(await waiter)
+        return result
+
+    assert asyncio.run(main())
+    assert client.calls == 1
+    assert generator.counts["hedged"] == 0 and generator.counts["hedges_skipped"] == 1
+
+
+def test_stream_response_headers_teach_the_limiter():
+    limiter = RateLimiter()
+    client = FakeClient(0.0, headers={"x-ratelimit-limit-requests": "500", "x-ratelimit-limit-tokens": "200000"})
+
+    asyncio.run(collect(make_generator(client, limiter)))
+    assert limiter.stats()["rpm_limit"] == 500 and limiter.stats()["tpm_limit"] == 200000
+
+
+def test_fallback_model_uses_its_own_limiter():
+    limiter, fallback_limiter = RateLimiter(name="chat"), RateLimiter(name="chat-fallback")
+    generator = OpenAIClient(
+        FakeClient(0.0, error=RuntimeError("down")),
+        fallback_client=FakeClient(0.0),
+        fallback_model="gpt-4o",
+        limiter=limiter,
+        fallback_limiter=fallback_limiter,
+    )
+
+    assert asyncio.run(collect(generator)) == [{"answer": "네", "follow_up": []}]
+    assert generator.counts["fallbacks"] == 1
+    assert limiter.stats()["errors"] == 1 and limiter.stats()["calls"] == 1
+    assert fallback_limiter.stats()["calls"] == 1 and fallback_limiter.stats()["errors"] == 0
@@ -0,0 +1,165 @@
+import asyncio
+import pickle
+
+from core.ingestion import CorpusIngestor
+
+
+class FakeCollection:
+    """Chroma 컬렉션의 get/upsert/delete만 흉내 낸 메모리 컬렉션"""
+
+    def __init__(self):
+        self.rows: dict[str, dict] = {}
+
+    def count(self) -> int:
+        return len(self.rows)
+
+    def get(self, ids=None, include=()):
+        ids = [doc_id for doc_id in (ids if ids is not None else self.rows) if doc_id in self.rows]
+        return {
+            "ids": ids,
+            "documents": [self.rows[doc_id]["document"] for doc_id in ids],
+            "embeddings": [self.rows[doc_id]["embedding"] for doc_id in ids],
+            "metadatas": [self.rows[doc_id]["metadata"] for doc_id in ids],
+        }
+
+    def upsert(self, ids, documents, embeddings, metadatas=None):
+        for i, doc_id in enumerate(ids):
+            metadata = metadatas[i] if metadatas else None
+            self.rows[doc_id] = {"document": documents[i], "embedding": embeddings[i], "metadata": metadata}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+
+class FakeChromaClient:
+    title_collection_name = "title"
+    full_collection_name = "full"
+    document_store = None
+    index_dir = None
+
+    def __init__(self):
+        self.collections = {"title": FakeCollection(), "full": FakeCollection()}
+        self.chroma_client = self
+
+    def get_or_create_collection(self, name: str) -> FakeCollection:
+        return self.collections[name]
+
+    @staticmethod
+    def clean_context(text: str) -> list[str]:
+        return [line.strip() for line in text.split("\n") if line.strip()]
+
+    def build_lexical_index(self, ids, documents):
+        self.lexical, self.lexical_texts = list(ids), list(documents)
+
+    def build_dense_index(self, title_collection):
+        pass
+
+    def reset(self):
+        pass
+
+
+class FakeEmbedder:
+    def __init__(self, fail: set[str] = frozenset()):
+        self.fail = fail
+        self.texts: list[str] = []
+
+    async def __call__(self, texts, priority=None):
+        self.texts += texts
+        return [[] if text in self.fail else [float(len(text)), 1.0] for text in texts]
+
+
+FAQ = {
+    "환불은 어떻게 하나요?": "판매자센터에서 처리합니다.",
+    "정산 주기는?": "매일 정산됩니다.",
+    "배송 조회": "주문 내역에서 확인합니다.",
+}
+
+
+def make_ingestor(tmp_path, faq: dict) -> tuple[CorpusIngestor, FakeChromaClient]:
+    path = tmp_path / "faq.pkl"
+    path.write_bytes(pickle.dumps(faq))
+    chroma_client = FakeChromaClient()
+    return CorpusIngestor(chroma_client, str(path), batch_size=2), chroma_client
+
+
+def reingest(ingestor: CorpusIngestor, tmp_path, faq: dict):
+    (tmp_path / "faq.pkl").write_bytes(pickle.dumps(faq))
+    return ingestor.plan(ingestor.chroma_client.collections["full"])
+
+
+def test_plan_tracks_added_updated_and_removed(tmp_path):
+    ingestor, chroma_client = make_ingestor(tmp_path, FAQ)
+    full = chroma_client.collections["full"]
+
+    plan = ingestor.plan(full)
+    assert plan.summary() == {"documents": 3, "added": 3, "updated": 0, "removed": 0, "renamed": 0, "failed": 0}
+    asyncio.run(ingestor.run(FakeEmbedder()))
+    assert full.count() == 3 and chroma_client.collections["title"].count() == 3
+    assert reingest(ingestor, tmp_path, FAQ).pending == []
+    shipping_id = ingestor.load_corpus()[0][2]
+
+    changed = {**FAQ, "정산 주기는?": "매주 정산됩니다.", "반품 신청": "반품 메뉴에서 신청합니다."}
+    del changed["배송 조회"]
+    plan = reingest(ingestor, tmp_path, changed)
+    assert [plan.titles[row] for row in plan.added] == ["반품 신청"]
+    assert [plan.titles[row] for row in plan.updated] == ["정산 주기는?"]
+    assert plan.removed == [shipping_id]
+
+
+def test_legacy_ids_are_migrated_without_re_embedding(tmp_path):
+    ingestor, chroma_client = make_ingestor(tmp_path, {**FAQ, "새 질문": "새 답변"})
+    ids, titles, full_texts, _ = ingestor.load_corpus()
+    title, full = chroma_client.collections["title"], chroma_client.collections["full"]
+    # 이전 버전은 해시 메타데이터 없이 qa_<i> id로 저장 (마지막 항목은 덤프에서 사라진 문서)
+    legacy_texts = full_texts[:3] + ["Q: ['삭제된 질문']\nA: ['삭제된 답변']"]
+    for i, (legacy_title, legacy_text) in enumerate(zip(titles[:3] + ["삭제된 질문"], legacy_texts)):
+        title.upsert(ids=[f"qa_{i}"], documents=[legacy_title], embeddings=[[i, 0.0]])
+        full.upsert(ids=[f"qa_{i}"], documents=[legacy_text], embeddings=[[i, 1.0]])
+
+    plan = ingestor.plan(full)
+    assert plan.renamed == {"qa_0": 0, "qa_1": 1, "qa_2": 2}
+    assert plan.removed == ["qa_3"] and [ids[row] for row in plan.added] == [ids[3]]
+
+    embedder = FakeEmbedder()
+    manifest = asyncio.run(ingestor.run(embedder))
+    assert embedder.texts == [titles[3], full_texts[3]]  # 새 항목만 임베딩
+    assert manifest["renamed"] == 3
+    assert sorted(full.rows) == sorted(ids) and sorted(title.rows) == sorted(ids)
+    assert full.rows[ids[1]]["embedding"] == [1, 1.0] and title.rows[ids[1]]["embedding"] == [1, 0.0]
+    assert full.rows[ids[1]]["metadata"]["hash"] == plan.hashes[1]
+    assert reingest(ingestor, tmp_path, {**FAQ, "새 질문": "새 답변"}).summary()["added"] == 0
+
+
+def test_failed_embeddings_are_skipped_and_retried(tmp_path):
+    ingestor, chroma_client = make_ingestor(tmp_path, FAQ)
+    ids, titles, full_texts, _ = ingestor.load_corpus()
+    full = chroma_client.collections["full"]
+
+    manifest = asyncio.run(ingestor.run(FakeEmbedder(fail={full_texts[1]})))
+    assert manifest["failed"] == 1
+    assert sorted(full.rows) == sorted([ids[0], ids[2]])
+    assert chroma_client.lexical == [ids[0], ids[2]]  # 컬렉션에 없는 항목은 키워드 검색에서도 제외
+    assert manifest["documents"] == 2
+
+    plan = reingest(ingestor, tmp_path, FAQ)
+    assert plan.added == [1]
+    asyncio.run(ingestor.run(FakeEmbedder()))
+    assert full.count() == 3
+
+
+def test_failed_update_keeps_previous_text(tmp_path):
+    ingestor, chroma_client = make_ingestor(tmp_path, FAQ)
+    full = chroma_client.collections["full"]
+    asyncio.run(ingestor.run(FakeEmbedder()))
+    ids, _, old_texts, _ = ingestor.load_corpus()
+
+    changed = {**FAQ, "정산 주기는?": "매주 정산됩니다."}
+    (tmp_path / "faq.pkl").write_bytes(pickle.dumps(changed))
+    new_texts = ingestor.load_corpus()[2]
+    manifest = asyncio.run(ingestor.run(FakeEmbedder(fail={new_texts[1]})))
+
+    assert manifest["failed"] == 1 and manifest["documents"] == 3
+    assert chroma_client.lexical_texts == [old_texts[0], old_texts[1], old_texts[2]]
+    assert full.rows[ids[1]]["document"] == old_texts[1]  # 컬렉션과 같은 이전 문서
+    assert reingest(ingestor, tmp_path, changed).updated == [1]
@@ -0,0 +1,61 @@
+import asyncio
+
+import anyio
+from core.logger import Logger
+from starlette.concurrency import iterate_in_threadpool
+
+
+def make_logger(tmp_path, n: int) -> Logger:
+    logger = Logger(str(tmp_path / "chat_log.sqlite3"))
+    for i in range(n):
+        logger.save_log(question=f"q{i}", context="", response=f"a{i}", doc_ids=[f"d{i}"], timings={"total": 0.1})
+    return logger
+
+
+def test_iter_logs_streams_across_threadpool_threads(tmp_path):
+    # StreamingResponse는 동기 생성기를 iterate_in_threadpool로 읽으므로 next()마다 다른 스레드에서 실행될 수 있음
+    logger = make_logger(tmp_path, 300)
+
+    async def main():
+        stop = False
+
+        async def load():
+            while not stop:
+                await anyio.to_thread.run_sync(lambda: sum(range(1000)))
+
+        background = [asyncio.create_task(load()) for _ in range(8)]
+        try:
+            id_range, _ = logger.page_range(limit=300)
+            return [
+                row async for row in iterate_in_threadpool(logger.iter_logs(limit=300, chunk_size=5, id_range=id_range))
+            ]
+        finally:
+            stop = True
+            await asyncio.gather(*background)
+
+    rows = asyncio.run(main())
+    assert [row["question"] for row in rows] == [f"q{i}" for i in range(299, -1, -1)]
+    assert rows[0]["doc_ids"] == ["d299"] and rows[0]["timings"] == {"total": 0.1}
+
+
+def test_page_is_pinned_to_its_id_range_and_cursor_is_last_emitted_id(tmp_path):
+    logger = make_logger(tmp_path, 25)
+
+    id_range, next_cursor = logger.page_range(limit=10)
+    # 커서를 구한 뒤 본문을 읽기 전에 새 로그가 쓰여도 페이지는 바뀌지 않음
+    logger.save_log(question="late", context="", response="")
+    page = list(logger.iter_logs(limit=10, id_range=id_range))
+    assert [row["question"] for row in page] == [f"q{i}" for i in range(24, 14, -1)]
+    assert next_cursor == page[-1]["id"]
+
+    # 다음 페이지는 빠지거나 겹치는 행 없이 이어짐
+    id_range, next_cursor = logger.page_range(cursor=next_cursor, limit=10)
+    page = list(logger.iter_logs(cursor=page[-1]["id"], limit=10, id_range=id_range))
+    assert [row["question"] for row in page] == [f"q{i}" for i in range(14, 4, -1)]
+
+    id_range, next_cursor = logger.page_range(cursor=next_cursor, limit=10)
+    page = list(logger.iter_logs(limit=10, id_range=id_range))
+    assert [row["question"] for row in page] == [f"q{i}" for i in range(4, -1, -1)]
+    assert next_cursor is None
+
+    assert logger.page_range(cursor=page[-1]["id"], limit=10) == (None, None)
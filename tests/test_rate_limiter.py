@@ -0,0 +1,160 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from core.rate_limiter import (
+    Priority,
+    RateLimiter,
+    TokenBucket,
+    estimate_message_tokens,
+    parse_duration,
+)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after_ms: int):
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(headers={"retry-after-ms": str(retry_after_ms)})
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("20ms", 0.02), ("1s", 1.0), ("6m0s", 360.0), ("1h2m3.5s", 3723.5), ("1.5", 1.5), ("", None), ("soon", None)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+@pytest.mark.parametrize(
+    "headers, seconds",
+    [
+        ({"retry-after-ms": "250"}, 0.25),
+        ({"retry-after-ms": "abc", "retry-after": "2"}, 2.0),
+        ({"retry-after-ms": "abc", "x-ratelimit-reset-requests": "1m"}, 60.0),
+        ({"retry-after-ms": "abc"}, None),
+        ({}, None),
+    ],
+)
+def test_retry_after_falls_back_when_header_is_malformed(headers, seconds):
+    error = RateLimitError(0)
+    error.response.headers = headers
+    assert RateLimiter.retry_after(error) == seconds
+
+
+def test_estimate_message_tokens_without_encoding():
+    assert estimate_message_tokens([{"content": "abcd"}, {"content": None}]) == 3 + (4 + 2) + 4
+
+
+def test_token_bucket_waits_and_refills():
+    bucket = TokenBucket(60)  # 초당 1개
+    bucket.take(60)
+    assert bucket.wait_time(2) == pytest.approx(2.0)
+    bucket.refill(bucket._updated + 1.5)
+    assert bucket.level == pytest.approx(1.5)
+    assert bucket.wait_time(1000) == pytest.approx(58.5)  # 한도보다 큰 요청은 가득 찰 때까지만 대기
+
+    bucket.refill(bucket._updated + 3600)
+    assert bucket.level == 60
+
+
+def test_token_bucket_zero_capacity_is_unlimited_until_learned():
+    bucket = TokenBucket(0)
+    bucket.take(10**6)
+    assert bucket.unlimited and bucket.wait_time(10**6) == 0
+    bucket.set_capacity(100)
+    assert bucket.level == 100 and bucket.wait_time(50) == 0
+
+
+def test_aimd_halves_once_per_burst_and_recovers():
+    limiter = RateLimiter(max_concurrency=8, min_concurrency=1)
+
+    async def main():
+        leases = [await limiter.acquire() for _ in range(3)]
+        for lease in leases:  # 같은 폭주에서 받은 429는 한 번만 줄임
+            limiter.release(lease, error=RateLimitError(retry_after_ms=50))
+        assert limiter.concurrency == 4 and limiter.paused
+        assert limiter.stats()["rate_limited"] == 3 and limiter.stats()["in_flight"] == 0
+
+        await asyncio.sleep(0.06)
+        assert not limiter.paused
+        limiter.release(await limiter.acquire(), error=RateLimitError(retry_after_ms=1))
+        assert limiter.concurrency == 2  # 감소 이후에 보낸 호출의 429는 다시 반영
+
+        for _ in range(4):
+            limiter.release(await limiter.acquire())
+        assert 3 < limiter.concurrency < 4  # 성공할 때마다 1/한도씩 증가
+
+    asyncio.run(main())
+
+
+def test_waits_out_retry_after_before_next_call():
+    limiter = RateLimiter()
+
+    async def main():
+        limiter.release(await limiter.acquire(), error=RateLimitError(retry_after_ms=100))
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        limiter.release(await limiter.acquire())
+        return loop.time() - start
+
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_interactive_callers_are_served_before_bulk():
+    limiter = RateLimiter(max_concurrency=1)
+    order = []
+
+    async def call(name: str, priority: Priority):
+        async with limiter.limit(priority=priority):
+            order.append(name)
+
+    async def main():
+        async with limiter.limit():
+            tasks = [asyncio.create_task(call("bulk", Priority.BULK))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(call("interactive", Priority.INTERACTIVE)))
+            await asyncio.sleep(0)
+            assert limiter.stats()["waiting"] == 2
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["interactive", "bulk"]
+
+
+def test_requests_bucket_learned_from_headers_limits_rate():
+    limiter = RateLimiter()
+    headers = {"x-ratelimit-limit-requests": "600", "x-ratelimit-remaining-requests": "0"}
+
+    async def main():
+        async with limiter.limit() as lease:
+            lease.observe(headers)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await limiter.run(lambda lease: asyncio.sleep(0))  # 분당 600회 → 0.1초마다 1회
+        return loop.time() - start
+
+    assert asyncio.run(main()) >= 0.09
+    assert limiter.stats()["rpm_limit"] == 600
+
+
+def test_run_retries_rate_limited_calls_and_not_client_errors():
+    limiter = RateLimiter()
+    attempts = []
+
+    async def flaky(lease):
+        attempts.append(lease)
+        if len(attempts) == 1:
+            raise RateLimitError(retry_after_ms=10)
+        return "ok"
+
+    assert asyncio.run(limiter.run(flaky)) == "ok"
+    assert len(attempts) == 2 and limiter.stats()["retries"] == 1
+
+    async def bad_request(lease):
+        raise ValueError("400")
+
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.run(bad_request))
+    assert limiter.stats()["retries"] == 1
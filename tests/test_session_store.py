@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from core.session_store import InMemorySessionStore, RedisSessionStore
+from services.chat_session import ChatSessionService
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, *args))
+
+    async def execute(self):
+        self.client.round_trips.append(self.commands)
+
+
+class FakeRedis:
+    """파이프라인에 쌓인 명령만 기록하는 가짜 asyncio Redis 클라이언트"""
+
+    def __init__(self):
+        self.round_trips = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def test_turn_is_saved_in_one_pipelined_round_trip():
+    redis_client = FakeRedis()
+    service = ChatSessionService(RedisSessionStore(redis_client), "chat:", max_session_length=6, session_ttl=3600)
+
+    asyncio.run(service.save_turn("s1", "환불은?", "판매자센터에서 처리합니다."))
+
+    assert len(redis_client.round_trips) == 1
+    rpush, ltrim, expire = redis_client.round_trips[0]
+    assert rpush[:2] == ("rpush", "chat:s1") and len(rpush) == 4
+    assert ltrim == ("ltrim", "chat:s1", -6, -1)  # 최신 메시지만 유지
+    assert expire == ("expire", "chat:s1", 3600)
+
+
+def test_in_memory_store_keeps_newest_messages():
+    service = ChatSessionService(InMemorySessionStore(), "chat:", max_session_length=4)
+
+    async def main():
+        for i in range(3):
+            await service.save_turn("s1", f"질문{i}", f"답변{i}")
+        await service.save_session("s2", "user", "다른 세션")
+        return await service.get_session_history("s1"), await service.get_session_history("s2")
+
+    history, other = asyncio.run(main())
+    assert [m["content"] for m in history] == ["질문1", "답변1", "질문2", "답변2"]
+    assert [m["role"] for m in history] == ["user", "assistant", "user", "assistant"]
+    assert other == [{"role": "user", "content": "다른 세션"}]
+
+
+def test_in_memory_store_expires_sessions():
+    store = InMemorySessionStore()
+
+    async def main():
+        await store.append("k", ["a"], max_length=10, ttl=0.05)
+        await store.append("persistent", ["b"], max_length=10)
+        before = await store.range("k")
+        time.sleep(0.06)
+        return before, await store.range("k"), await store.range("persistent")
+
+    assert asyncio.run(main()) == (["a"], [], ["b"])
@@ -0,0 +1,56 @@
+import json
+
+from models.schemas import QueryInput
+from utils.sse import CumulativeEncoder, DeltaEncoder, format_event, get_encoder
+
+
+def parse(events: list[str]) -> list[tuple[int, str, dict]]:
+    parsed = []
+    for event in events:
+        fields = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+        parsed.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def test_query_input_defaults_to_legacy_protocol():
+    assert QueryInput(question="환불", session_id="s").protocol == 1
+    assert isinstance(get_encoder(QueryInput(question="환불", session_id="s").protocol), CumulativeEncoder)
+    assert isinstance(get_encoder(2), DeltaEncoder)
+
+
+def test_format_event():
+    assert (
+        format_event({"text": "환불"}, event="delta", event_id=3) == 'id: 3\nevent: delta\ndata: {"text": "환불"}\n\n'
+    )
+    assert format_event({"answer": "a"}) == 'data: {"answer": "a"}\n\n'
+
+
+def test_delta_encoder_sends_appended_text_once():
+    encoder = DeltaEncoder()
+    events = encoder.start()
+    for answer in ["환불은", "환불은", "환불은 판매자", None, "환불은 판매자센터에서"]:
+        events += encoder.partial({"answer": answer, "follow_up": []})
+    events += encoder.finish({"answer": "환불은 판매자센터에서 처리됩니다.", "follow_up": ["배송비는요?"]})
+
+    assert parse(events) == [
+        (1, "start", {"protocol": 2}),
+        (2, "delta", {"text": "환불은"}),
+        (3, "delta", {"text": " 판매자"}),
+        (4, "delta", {"text": "센터에서"}),
+        (5, "delta", {"text": " 처리됩니다."}),
+        (6, "follow_up", {"follow_up": ["배송비는요?"]}),
+        (7, "done", {}),
+    ]
+
+
+def test_delta_encoder_resets_when_answer_is_not_an_extension():
+    encoder = DeltaEncoder()
+    encoder.partial({"answer": "정산은 매주"})
+    events = encoder.partial({"answer": "정산은 매일"}) + encoder.partial({"answer": "정산은 매일 진행"})
+    events += encoder.finish({"answer": "정산은 매일 진행", "follow_up": []})
+
+    assert [(kind, data) for _, kind, data in parse(events)] == [
+        ("reset", {"answer": "정산은 매일"}),
+        ("delta", {"text": " 진행"}),
+        ("done", {}),
+    ]
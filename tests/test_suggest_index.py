@@ -0,0 +1,61 @@
+import pytest
+from core.suggest_index import SuggestIndex, normalize_words
+
+TITLES = [
+    "스마트스토어 환불 방법",
+    "환불 신청은 어디서 하나요?",
+    "환불",
+    "배송비 환불 기준",
+    "정산 주기 안내",
+    "스마트 스토어 가입",
+]
+
+
+@pytest.fixture
+def index():
+    index = SuggestIndex(min_overlap=0.5)
+    index.build([f"qa_{i}" for i in range(len(TITLES))], TITLES, version="v1")
+    return index
+
+
+def test_normalize_words_ignores_case_width_and_punctuation():
+    assert normalize_words("ＦＡＱ: 환불, 배송?") == ["faq", "환불", "배송"]
+
+
+def test_match_types_are_ranked(index):
+    results = index.search("환불", limit=10)
+
+    assert [(r["title"], r["match"]) for r in results[:4]] == [
+        ("환불", "exact"),
+        ("환불 신청은 어디서 하나요?", "prefix"),
+        ("배송비 환불 기준", "word_prefix"),
+        ("스마트스토어 환불 방법", "word_prefix"),
+    ]
+    assert index.search("스마트스토어", limit=2) == [
+        {"id": "qa_5", "title": "스마트 스토어 가입", "match": "prefix"},  # 띄어쓰기 차이 무시, 짧은 제목 먼저
+        {"id": "qa_0", "title": "스마트스토어 환불 방법", "match": "prefix"},
+    ]
+
+
+def test_substring_and_fuzzy_fill_remaining_slots(index):
+    assert index.search("토어환불", limit=3) == [
+        {"id": "qa_0", "title": "스마트스토어 환불 방법", "match": "substring"}
+    ]
+    assert [r["match"] for r in index.search("정산주가", limit=3)] == ["fuzzy"]  # 오타
+    assert index.search("", limit=3) == [] and index.search("환불", limit=0) == []
+
+
+def test_title_prefixes_are_not_cut_by_the_word_prefix_cap():
+    # 단어 접두사 키("환가", "환가나")가 제목 키("환불 방법")보다 앞에 정렬되어도 제목 접두사는 항상 포함
+    index = SuggestIndex(max_prefix_matches=1)
+    index.build(["a", "b", "c"], ["배송 환가", "택배 환가나", "환불 방법"])
+
+    results = index.search("환", limit=5)
+    assert results[0] == {"id": "c", "title": "환불 방법", "match": "prefix"}
+    assert [r["match"] for r in results] == ["prefix", "word_prefix"]
+
+
+def test_cache_key_depends_on_version_and_normalized_query(index):
+    assert index.cache_key("환불 신청", 8) == index.cache_key("환불신청!", 8)
+    assert index.cache_key("환불", 8) != index.cache_key("환불", 5)
+    assert index.cache_key("환불", 8).startswith("v1-")